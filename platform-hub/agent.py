@@ -34,6 +34,7 @@ from database import (
     get_connection, upsert_platform_status, upsert_layer_status,
     save_metric, upsert_cross_reference, get_all_agent_status,
     get_all_layers, get_recent_metrics, get_agent_state, set_agent_state,
+    writer,
 )
 from charts import generate_chart_report
 from playlist import generate_playlist, generate_all_playlists
@@ -156,12 +157,15 @@ def _format_ago(iso_timestamp):
 def check_agent_status(hub_conn):
     """Check status of all connector agents."""
     statuses = {}
+    # (agent_name, status, records, size) rows, written after the scan so the
+    # hub write lock isn't held while each agent DB is opened and counted
+    rows = []
 
     for agent_name, db_path in AGENT_DBS.items():
         agent_conn = _open_agent_db(db_path)
 
         if not agent_conn:
-            upsert_platform_status(hub_conn, agent_name, 'offline', 0, 0)
+            rows.append((agent_name, 'offline', 0, 0))
             statuses[agent_name] = {
                 'status': 'offline', 'records': 0, 'size': 0,
                 'last_activity': None, 'size_str': '0 B',
@@ -202,7 +206,7 @@ def check_agent_status(hub_conn):
                 except (ValueError, TypeError):
                     pass
 
-            upsert_platform_status(hub_conn, agent_name, status, total_records, db_size)
+            rows.append((agent_name, status, total_records, db_size))
             statuses[agent_name] = {
                 'status': status, 'records': total_records, 'size': db_size,
                 'last_activity': last_activity, 'size_str': _format_size(db_size),
@@ -212,12 +216,16 @@ def check_agent_status(hub_conn):
 
         except Exception as e:
             log.error(f"Error checking {agent_name}: {e}")
-            upsert_platform_status(hub_conn, agent_name, 'error', 0, _get_db_size(db_path))
+            rows.append((agent_name, 'error', 0, _get_db_size(db_path)))
             statuses[agent_name] = {
                 'status': 'error', 'records': 0, 'size': 0,
                 'last_activity': None, 'size_str': '0 B',
             }
 
+    with writer(hub_conn):
+        for row in rows:
+            upsert_platform_status(hub_conn, *row)
+
     return statuses
 
 
@@ -333,8 +341,9 @@ def collect_metrics(hub_conn):
             pass
 
     # Save metrics to hub DB
-    for name, value in metrics.items():
-        save_metric(hub_conn, today, name, value, '', name.split('_')[0])
+    with writer(hub_conn):
+        for name, value in metrics.items():
+            save_metric(hub_conn, today, name, value, '', name.split('_')[0])
 
     return metrics
 
@@ -343,31 +352,32 @@ def build_layer_status(hub_conn, agent_statuses):
     """Map agents to Power FM layers and calculate health scores."""
     layer_results = {}
 
-    for layer_num, layer_info in LAYERS.items():
-        agents = layer_info['agents']
-        name = layer_info['name']
-
-        online_count = 0
-        total_agents = len(agents)
-        agent_list = []
-
-        for agent in agents:
-            st = agent_statuses.get(agent, {})
-            status = st.get('status', 'offline')
-            if status in ('online', 'idle'):
-                online_count += 1
-            agent_list.append(f"{agent}({status})")
-
-        health = (online_count / total_agents * 100) if total_agents > 0 else 0
-        layer_status = 'online' if online_count == total_agents else (
-            'degraded' if online_count > 0 else 'offline'
-        )
-
-        upsert_layer_status(hub_conn, layer_num, name, layer_status, health, ', '.join(agents))
-        layer_results[layer_num] = {
-            'name': name, 'status': layer_status,
-            'health': health, 'agents': agent_list,
-        }
+    with writer(hub_conn):
+        for layer_num, layer_info in LAYERS.items():
+            agents = layer_info['agents']
+            name = layer_info['name']
+
+            online_count = 0
+            total_agents = len(agents)
+            agent_list = []
+
+            for agent in agents:
+                st = agent_statuses.get(agent, {})
+                status = st.get('status', 'offline')
+                if status in ('online', 'idle'):
+                    online_count += 1
+                agent_list.append(f"{agent}({status})")
+
+            health = (online_count / total_agents * 100) if total_agents > 0 else 0
+            layer_status = 'online' if online_count == total_agents else (
+                'degraded' if online_count > 0 else 'offline'
+            )
+
+            upsert_layer_status(hub_conn, layer_num, name, layer_status, health, ', '.join(agents))
+            layer_results[layer_num] = {
+                'name': name, 'status': layer_status,
+                'health': health, 'agents': agent_list,
+            }
 
     return layer_results
 
@@ -387,15 +397,16 @@ def cross_reference_artists(hub_conn):
 
         sp_by_name = {a['name'].lower(): a for a in sp_artists}
 
-        for cm in cm_artists:
-            name_lower = cm['name'].lower()
-            if name_lower in sp_by_name:
-                sp = sp_by_name[name_lower]
-                upsert_cross_reference(
-                    hub_conn, 'chartmetric', str(cm['id']),
-                    'spotify', str(sp['id']), 'same_artist', 0.9
-                )
-                matches += 1
+        with writer(hub_conn):
+            for cm in cm_artists:
+                name_lower = cm['name'].lower()
+                if name_lower in sp_by_name:
+                    sp = sp_by_name[name_lower]
+                    upsert_cross_reference(
+                        hub_conn, 'chartmetric', str(cm['id']),
+                        'spotify', str(sp['id']), 'same_artist', 0.9
+                    )
+                    matches += 1
     except Exception as e:
         log.debug(f"Cross-reference error: {e}")
     finally:
@@ -626,7 +637,8 @@ def run_daemon(hub_conn):
     check_agent_status(hub_conn)
     collect_metrics(hub_conn)
     generate_report(hub_conn)
-    set_agent_state(hub_conn, 'last_scan_timestamp', datetime.utcnow().isoformat())
+    with writer(hub_conn):
+        set_agent_state(hub_conn, 'last_scan_timestamp', datetime.utcnow().isoformat())
 
     while running:
         log.info(f"Sleeping {POLL_INTERVAL}s until next check...")
@@ -641,7 +653,8 @@ def run_daemon(hub_conn):
         check_agent_status(hub_conn)
         collect_metrics(hub_conn)
         cross_reference_artists(hub_conn)
-        set_agent_state(hub_conn, 'last_scan_timestamp', datetime.utcnow().isoformat())
+        with writer(hub_conn):
+            set_agent_state(hub_conn, 'last_scan_timestamp', datetime.utcnow().isoformat())
 
         # Generate report every hour
         last_report = get_agent_state(hub_conn, 'last_report_timestamp')
@@ -649,7 +662,8 @@ def run_daemon(hub_conn):
             datetime.utcnow() - datetime.fromisoformat(last_report)
         ) > timedelta(hours=1):
             generate_report(hub_conn)
-            set_agent_state(hub_conn, 'last_report_timestamp', datetime.utcnow().isoformat())
+            with writer(hub_conn):
+                set_agent_state(hub_conn, 'last_report_timestamp', datetime.utcnow().isoformat())
 
     log.info("Platform hub stopped.")
 
@@ -4,11 +4,28 @@ Power FM Artist Profiles
 Aggregates artist data from chart_entries (platform_hub.db) and YouTube
 channels/videos (youtube.db) to build unified artist profiles.
 
-Used by the dashboard for artist list and detail pages.
+Used by the dashboard for artist list and detail pages. Callers pass a
+single platform_hub.db connection with youtube.db ATTACHed as `yt`
+(see dashboard._open_ro); if it isn't attached the YouTube side is empty.
 """
 
 import urllib.parse
 
+from markupsafe import Markup, escape
+
+# Chart-history rows rendered inline on the artist page; the rest are
+# fetched on demand from /api/artist/<slug>/chart?offset=N.
+CHART_PAGE_SIZE = 50
+
+# Per-row lookups for the chart table (rank highlight class, movement badge).
+_RANK_CLS = {1: 'rank-1', 2: 'rank-2', 3: 'rank-3'}
+_MOVEMENT_HTML = {
+    'UP': '<span class="movement-up">&#9650; UP</span>',
+    'DOWN': '<span class="movement-down">&#9660; DOWN</span>',
+    'NEW': '<span class="movement-new">&#9679; NEW</span>',
+}
+_MOVEMENT_STABLE_HTML = '<span class="movement-stable">=</span>'
+
 
 def _safe_query(conn, sql, params=(), default=None):
     """Execute a query safely, returning default on any error."""
@@ -31,6 +48,66 @@ def _safe_scalar(conn, sql, params=(), default=0):
         return default
 
 
+def _fmt_int(n):
+    """Format an integer with thousands separators ('1,234'); None -> '0'."""
+    return format(n or 0, ',')
+
+
+def _chart_rows_html(chart_entries, power_score_max):
+    """Render the chart-history table rows in one pass (no Jinja loop)."""
+    rows = []
+    for e in chart_entries:
+        rank = e['rank']
+        title = e['title'] or ''
+        power_score = e['power_score'] or 0
+        bar_pct = (power_score / power_score_max * 100) if power_score_max > 0 else 0
+        if len(title) > 55:
+            title_html = f'{escape(title[:55])}...'
+        else:
+            title_html = escape(title)
+        rows.append(
+            f'<tr><td>{escape(e["chart_date"])}</td>'
+            f'<td class="text-center num {_RANK_CLS.get(rank, "")}">{rank}</td>'
+            f'<td style="font-weight: 600;">{title_html}</td>'
+            f'<td><div class="power-score-cell">'
+            f'<span class="power-score-value">{power_score:.1f}</span>'
+            f'<div class="power-bar-track"><div class="power-bar-fill" style="width: {bar_pct}%;"></div></div>'
+            f'</div></td>'
+            f'<td class="text-center">{_MOVEMENT_HTML.get(e["movement"], _MOVEMENT_STABLE_HTML)}</td>'
+            f'<td class="text-right num">{_fmt_int(e["views"])}</td>'
+            f'<td class="text-right num">{_fmt_int(e["likes"])}</td>'
+            f'<td class="text-right num">{_fmt_int(e["comments"])}</td>'
+            f'<td class="text-center num">{e["weeks_on_chart"] or 1}</td></tr>\n'
+        )
+    return Markup(''.join(rows))
+
+
+def _videos_html(videos):
+    """Render the artist-page video list in one pass (no Jinja loop)."""
+    items = []
+    for v in videos:
+        title_html = escape(v['title'] or 'Untitled')
+        if v['thumbnail_url']:
+            thumb = f'<img class="video-thumb" src="{escape(v["thumbnail_url"])}" alt="{title_html}">'
+        else:
+            thumb = '<div class="video-thumb"></div>'
+        meta = f'Published {escape(v["published_at"][:10])}' if v['published_at'] else ''
+        if v['duration']:
+            meta += f' &middot; {escape(v["duration"])}'
+        items.append(
+            f'<div class="video-item">{thumb}'
+            f'<div class="video-info"><div class="video-title">{title_html}</div>'
+            f'<div class="video-meta">{meta}</div></div>'
+            f'<div class="video-stats">'
+            f'<div class="video-stat"><div class="video-stat-value">{_fmt_int(v["view_count"])}</div>'
+            f'<div class="video-stat-label">Views</div></div>'
+            f'<div class="video-stat"><div class="video-stat-value">{_fmt_int(v["like_count"])}</div>'
+            f'<div class="video-stat-label">Likes</div></div>'
+            f'</div></div>\n'
+        )
+    return Markup(''.join(items))
+
+
 def _name_to_slug(name):
     """Convert an artist name to a URL-safe slug."""
     return urllib.parse.quote(name.strip(), safe='')
@@ -62,12 +139,14 @@ def search_artists(hub_conn, query):
     return [r['artist'].strip() if hasattr(r, 'keys') else r[0].strip() for r in rows]
 
 
-def _match_yt_channel(yt_conn, artist_name):
+def _get_yt_channels(conn):
+    """All rows of the attached yt.channels table ([] if not attached)."""
+    return _safe_query(conn, "SELECT * FROM yt.channels", default=[])
+
+
+def _match_yt_channel(channels, artist_name):
     """Try to find a YouTube channel matching an artist name (case-insensitive)."""
-    if not yt_conn:
-        return None
     name_lower = artist_name.strip().lower()
-    channels = _safe_query(yt_conn, "SELECT * FROM channels", default=[])
     for ch in channels:
         title = (ch['title'] or '').strip().lower()
         if title == name_lower:
@@ -80,33 +159,34 @@ def _match_yt_channel(yt_conn, artist_name):
     return None
 
 
-def _get_yt_videos_for_channel(yt_conn, channel_id):
+def _get_yt_videos_for_channel(conn, channel_id):
     """Get all videos for a YouTube channel."""
-    if not yt_conn or not channel_id:
+    if not channel_id:
         return []
-    rows = _safe_query(yt_conn, """
+    rows = _safe_query(conn, """
         SELECT video_id, title, view_count, like_count, comment_count,
                published_at, duration, thumbnail_url
-        FROM videos
+        FROM yt.videos
         WHERE channel_id = ?
         ORDER BY view_count DESC
     """, (channel_id,), default=[])
     return [dict(r) for r in rows]
 
 
-def get_all_artists(hub_conn, yt_conn):
+def get_all_artists(conn):
     """
     Returns a list of artist dicts aggregated from chart_entries and YouTube channels.
     Each artist has: name, slug, total_views, total_likes, chart_entries (count),
     highest_rank, weeks_on_chart, videos (list), power_score_avg, subscriber_count,
     thumbnail_url
     """
-    names = get_artist_names(hub_conn)
+    names = get_artist_names(conn)
+    yt_channels = _get_yt_channels(conn)
     artists = []
 
     for name in names:
         # Chart data
-        chart_rows = _safe_query(hub_conn, """
+        chart_rows = _safe_query(conn, """
             SELECT rank, power_score, views, likes, weeks_on_chart
             FROM chart_entries
             WHERE TRIM(artist) = TRIM(?) COLLATE NOCASE
@@ -120,7 +200,7 @@ def get_all_artists(hub_conn, yt_conn):
         avg_power = (sum(r['power_score'] or 0 for r in chart_rows) / chart_count) if chart_count > 0 else 0.0
 
         # YouTube data
-        yt_channel = _match_yt_channel(yt_conn, name)
+        yt_channel = _match_yt_channel(yt_channels, name)
         videos = []
         subscriber_count = 0
         thumbnail_url = ''
@@ -130,7 +210,7 @@ def get_all_artists(hub_conn, yt_conn):
             subscriber_count = yt_channel.get('subscriber_count', 0) or 0
             thumbnail_url = yt_channel.get('thumbnail_url', '') or ''
             yt_total_views = yt_channel.get('view_count', 0) or 0
-            videos = _get_yt_videos_for_channel(yt_conn, yt_channel.get('channel_id'))
+            videos = _get_yt_videos_for_channel(conn, yt_channel.get('channel_id'))
 
         # Combine: use YouTube total views if available (more comprehensive), else chart views
         total_views = yt_total_views if yt_total_views > 0 else total_views_chart
@@ -156,28 +236,42 @@ def get_all_artists(hub_conn, yt_conn):
     return artists
 
 
-def get_artist_detail(hub_conn, yt_conn, artist_name_slug):
+def artist_card(artist):
     """
-    Returns detailed info for one artist:
-    - name, slug, thumbnail_url, subscriber_count
-    - all chart entries across all dates
-    - all YouTube videos with stats
-    - total reach (views across all sources)
-    - chart_history: list of {chart_date, rank, power_score, movement, views, likes, ...}
-    - aggregate stats: total_views, total_likes, highest_rank, weeks_on_chart, power_score_avg
+    One get_all_artists() entry plus the display fields the /artists cards use.
+    Kept out of get_all_artists() itself, which /api/artists serializes as is.
     """
+    subscribers = artist['subscriber_count']
+    videos = artist['video_count']
+    entries = artist['chart_entries']
+    weeks = artist['weeks_on_chart']
+    return {
+        **artist,
+        'name_html': escape(artist['name']),
+        'total_views_fmt': _fmt_int(artist['total_views']),
+        'total_likes_fmt': _fmt_int(artist['total_likes']),
+        # Pluralized once per card here, not in the template
+        'subscribers_label': f'{_fmt_int(subscribers)} subscribers' if subscribers > 0 else '',
+        'videos_label': Markup(f' &middot; {videos} videos') if videos > 0 else '',
+        'chart_entries_label': f"{entries} chart entr{'ies' if entries != 1 else 'y'}",
+        'weeks_label': f"{weeks} wk{'s' if weeks != 1 else ''} on chart" if weeks > 0 else '',
+    }
+
+
+def resolve_artist_name(conn, artist_name_slug):
+    """Map a URL slug to the artist name as stored in chart_entries, or None."""
     # Decode the slug back to a name pattern
     name_pattern = _slug_to_name_pattern(artist_name_slug)
 
     # Find exact artist name from chart_entries (case-insensitive)
-    rows = _safe_query(hub_conn, """
+    rows = _safe_query(conn, """
         SELECT DISTINCT artist FROM chart_entries
         WHERE TRIM(artist) = TRIM(?) COLLATE NOCASE
     """, (name_pattern,), default=[])
 
     if not rows:
         # Try partial match
-        rows = _safe_query(hub_conn, """
+        rows = _safe_query(conn, """
             SELECT DISTINCT artist FROM chart_entries
             WHERE TRIM(artist) LIKE ? COLLATE NOCASE
             LIMIT 1
@@ -186,10 +280,57 @@ def get_artist_detail(hub_conn, yt_conn, artist_name_slug):
     if not rows:
         return None
 
-    artist_name = rows[0]['artist'].strip() if hasattr(rows[0], 'keys') else rows[0][0].strip()
+    return rows[0]['artist'].strip() if hasattr(rows[0], 'keys') else rows[0][0].strip()
+
+
+def get_artist_chart_page(conn, artist_name_slug, offset=0, limit=CHART_PAGE_SIZE):
+    """
+    Returns one page of an artist's chart history as pre-rendered <tr> HTML:
+    {html, offset, next_offset, total}, or None if the artist is unknown.
+    """
+    artist_name = resolve_artist_name(conn, artist_name_slug)
+    if not artist_name:
+        return None
+
+    total = _safe_scalar(conn, """
+        SELECT COUNT(*) FROM chart_entries WHERE TRIM(artist) = TRIM(?) COLLATE NOCASE
+    """, (artist_name,))
+    max_power = _safe_scalar(conn, """
+        SELECT MAX(power_score) FROM chart_entries WHERE TRIM(artist) = TRIM(?) COLLATE NOCASE
+    """, (artist_name,))
+    rows = _safe_query(conn, """
+        SELECT chart_date, rank, title, power_score, views, likes, comments,
+               movement, weeks_on_chart
+        FROM chart_entries
+        WHERE TRIM(artist) = TRIM(?) COLLATE NOCASE
+        ORDER BY chart_date DESC, rank ASC
+        LIMIT ? OFFSET ?
+    """, (artist_name, limit, offset), default=[])
+
+    return {
+        'html': _chart_rows_html(rows, round(max_power, 2)),
+        'offset': offset,
+        'next_offset': offset + len(rows),
+        'total': total,
+    }
+
+
+def get_artist_detail(conn, artist_name_slug):
+    """
+    Returns detailed info for one artist:
+    - name, slug, thumbnail_url, subscriber_count
+    - all chart entries across all dates
+    - all YouTube videos with stats
+    - total reach (views across all sources)
+    - chart_history: list of {chart_date, rank, power_score, movement, views, likes, ...}
+    - aggregate stats: total_views, total_likes, highest_rank, weeks_on_chart, power_score_avg
+    """
+    artist_name = resolve_artist_name(conn, artist_name_slug)
+    if not artist_name:
+        return None
 
     # Get all chart entries for this artist across all dates
-    chart_entries = _safe_query(hub_conn, """
+    chart_entries = _safe_query(conn, """
         SELECT chart_date, rank, previous_rank, video_id, title,
                power_score, views, likes, comments, subscriber_count,
                movement, weeks_on_chart
@@ -228,7 +369,7 @@ def get_artist_detail(hub_conn, yt_conn, artist_name_slug):
     unique_dates = set(e['chart_date'] for e in chart_entries)
 
     # YouTube data
-    yt_channel = _match_yt_channel(yt_conn, artist_name)
+    yt_channel = _match_yt_channel(_get_yt_channels(conn), artist_name)
     videos = []
     subscriber_count = 0
     thumbnail_url = ''
@@ -242,17 +383,21 @@ def get_artist_detail(hub_conn, yt_conn, artist_name_slug):
         yt_total_views = yt_channel.get('view_count', 0) or 0
         custom_url = yt_channel.get('custom_url', '') or ''
         channel_description = yt_channel.get('description', '') or ''
-        videos = _get_yt_videos_for_channel(yt_conn, yt_channel.get('channel_id'))
+        videos = _get_yt_videos_for_channel(conn, yt_channel.get('channel_id'))
 
     total_views = yt_total_views if yt_total_views > 0 else total_views_chart
+    power_score_max = round(max_power, 2)
 
     return {
         'name': artist_name,
+        'name_html': escape(artist_name),
         'slug': _name_to_slug(artist_name),
         'thumbnail_url': thumbnail_url,
         'subscriber_count': subscriber_count,
         'custom_url': custom_url,
         'description': channel_description,
+        'description_html': escape(channel_description[:200]) + ('...' if len(channel_description) > 200 else ''),
+        'custom_url_html': escape(custom_url),
         'total_views': total_views,
         'total_likes': total_likes_chart,
         'total_comments': total_comments,
@@ -262,8 +407,14 @@ def get_artist_detail(hub_conn, yt_conn, artist_name_slug):
         'weeks_on_chart': len(unique_dates),
         'max_weeks_single': max_weeks,
         'power_score_avg': round(avg_power, 2),
-        'power_score_max': round(max_power, 2),
+        'power_score_max': power_score_max,
+        'chart_rows_html': _chart_rows_html(chart_entries[:CHART_PAGE_SIZE], power_score_max),
+        'chart_rows_shown': min(chart_count, CHART_PAGE_SIZE),
         'videos': videos,
+        'videos_html': _videos_html(videos),
         'video_count': len(videos),
         'chart_history': chart_history,
+        'total_views_fmt': _fmt_int(total_views),
+        'total_likes_fmt': _fmt_int(total_likes_chart),
+        'subscriber_count_fmt': _fmt_int(subscriber_count),
     }
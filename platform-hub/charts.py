@@ -20,7 +20,8 @@ import logging
 from datetime import datetime, timedelta
 
 from database import (
-    save_chart_entry, save_chart_history,
+    replace_chart_for_date, save_chart_history_bulk,
+    get_agent_state, set_agent_state,
     get_previous_chart, get_chart_entries,
 )
 
@@ -243,6 +244,8 @@ def generate_chart(hub_conn, chart_date=None):
 
     # Build chart entries with movement
     entries = []
+    entry_rows = []
+    history_rows = []
     for rank_idx, v in enumerate(chart):
         rank = rank_idx + 1
         video_id = v['video_id']
@@ -279,19 +282,25 @@ def generate_chart(hub_conn, chart_date=None):
         }
         entries.append(entry)
 
-        # Persist to DB
-        save_chart_entry(
-            hub_conn, chart_date, rank, previous_rank, video_id,
+        entry_rows.append((
+            chart_date, rank, previous_rank, video_id,
             v['title'], v['channel_title'], v['power_score'],
             v['view_count'], v['like_count'], v['comment_count'],
             v['subscriber_count'], movement, weeks_on_chart,
-        )
-        save_chart_history(
-            hub_conn, chart_date, video_id, rank,
+        ))
+        history_rows.append((
+            chart_date, video_id, rank,
             v['power_score'], v['view_count'], v['like_count'], v['comment_count'],
-        )
-
-    hub_conn.commit()
+        ))
+
+    # Persist to DB: both tables in one transaction, one prepared statement each
+    with hub_conn:
+        replace_chart_for_date(hub_conn, chart_date, entry_rows)
+        save_chart_history_bulk(hub_conn, history_rows)
+        # Readers (e.g. /youtube/<id>) look the newest date up here instead of MAX()
+        latest = get_agent_state(hub_conn, 'latest_chart_date')
+        if not latest or chart_date > latest:
+            set_agent_state(hub_conn, 'latest_chart_date', chart_date)
     log.info(f"Power Charts saved: {len(entries)} entries for {chart_date}")
     return entries
 
@@ -14,13 +14,31 @@ import glob
 import json
 import os
 import sqlite3
+import sys
+import threading
 import urllib.request
+import zlib
+from collections import defaultdict
 from datetime import datetime, timedelta
-from flask import Flask, render_template_string, jsonify, request, Response
+from functools import lru_cache
+from flask import Flask, g, render_template, render_template_string, jsonify, request, Response, stream_with_context
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
 from werkzeug.middleware.proxy_fix import ProxyFix
 from cms import cms_bp
+from precompressed import pick_encoding, precompress, precompressed_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 app = Flask(__name__)
+# On-disk templates are compiled once and kept in the Jinja cache; no
+# per-request mtime stat() unless POWER_FM_TEMPLATE_RELOAD is set for dev.
+app.config['TEMPLATES_AUTO_RELOAD'] = bool(os.environ.get('POWER_FM_TEMPLATE_RELOAD'))
+app.jinja_env.cache_size = 400
 app.secret_key = os.environ.get('POWER_FM_SECRET_KEY', 'pfm-secret-2026-change-in-prod')
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_port=1)
 app.register_blueprint(cms_bp)
@@ -56,6 +74,10 @@ NAV_HTML = """
 @app.after_request
 def inject_nav(response):
     """Inject global navigation bar into every HTML page."""
+    # Streamed and pre-compressed pages render the nav themselves;
+    # get_data() would buffer or garble them.
+    if response.is_streamed or response.content_encoding:
+        return response
     if response.content_type and 'text/html' in response.content_type:
         data = response.get_data(as_text=True)
         if '<body>' in data and 'pfm-topnav' not in data and 'class="sidebar"' not in data:
@@ -96,6 +118,12 @@ AGENT_DBS = {
 
 HUB_DB = os.path.join(AGENT_DIR, 'data', 'platform_hub.db')
 
+# Compiled template bytecode persists across restarts, so a fresh worker
+# doesn't re-parse the on-disk templates.
+JINJA_CACHE_DIR = os.environ.get('POWER_FM_JINJA_CACHE', os.path.join(AGENT_DIR, 'data', 'jinja_cache'))
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR, '__jinja2_%s.cache')
+
 # Tables to count per agent for record totals
 AGENT_TABLES = {
     'chartmetric': ['artists', 'chart_entries', 'streaming_stats', 'radio_spins', 'social_metrics', 'playlists'],
@@ -118,18 +146,89 @@ LAYERS = {
 }
 
 
-def _open_ro(db_path):
-    """Open a database read-only. Returns conn or None."""
+RO_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+RO_CACHE_SIZE_KIB = -64 * 1024    # negative = KiB, i.e. 64 MB page cache
+
+
+def _open_ro(db_path, check_same_thread=True, attach=None):
+    """Open a database read-only. Returns conn or None.
+
+    attach: optional {schema_name: db_path} of further databases to ATTACH
+    read-only on the same connection (missing files are skipped), so one
+    connection can query across them, e.g. `SELECT ... FROM yt.videos`.
+    """
     if not os.path.exists(db_path):
         return None
     try:
-        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True,
+                               check_same_thread=check_same_thread)
         conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only=1')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        schemas = ['main']
+        for schema, path in (attach or {}).items():
+            if schema.isidentifier() and os.path.exists(path):
+                conn.execute(f'ATTACH DATABASE ? AS {schema}', (f'file:{path}?mode=ro',))
+                schemas.append(schema)
+        # Read through the OS page cache via mmap instead of read() copies, and
+        # keep more decoded pages around; pooled conns amortize this setup.
+        for schema in schemas:
+            conn.execute(f'PRAGMA {schema}.mmap_size={RO_MMAP_SIZE}')
+            conn.execute(f'PRAGMA {schema}.cache_size={RO_CACHE_SIZE_KIB}')
         return conn
     except Exception:
         return None
 
 
+# --- Pooled read-only connections ---
+# Idle connections per DB path. A request borrows one per path via flask.g
+# and hands it back on teardown, so steady-state requests skip the
+# sqlite3_open + schema load. Safe to share across threads: read-only and
+# only ever used by one request at a time.
+_RO_POOL_MAX_IDLE = 8
+_ro_pool = {}
+_ro_pool_lock = threading.Lock()
+
+
+def _get_ro_conn(db_path, attach=None):
+    """Borrow a pooled read-only connection for this request. Do not close it.
+
+    attach is passed through to _open_ro. A connection opened while one of
+    the attached files was missing is not pooled, so it gets retried later.
+    """
+    key = (db_path, tuple(sorted((attach or {}).items())))
+    held = g.setdefault('_ro_conns', {})
+    conn = held.get(key)
+    if conn is None:
+        with _ro_pool_lock:
+            idle = _ro_pool.get(key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = _open_ro(db_path, check_same_thread=False, attach=attach)
+            if conn is None:
+                return None
+            if not all(os.path.exists(p) for p in (attach or {}).values()):
+                g.setdefault('_ro_unpooled', []).append(conn)
+        held[key] = conn
+    return conn
+
+
+@app.teardown_appcontext
+def _release_ro_conns(exc):
+    """Return borrowed read-only connections to the pool."""
+    held = g.pop('_ro_conns', None)
+    if not held:
+        return
+    unpooled = g.pop('_ro_unpooled', ())
+    with _ro_pool_lock:
+        for key, conn in held.items():
+            idle = _ro_pool.setdefault(key, [])
+            if len(idle) < _RO_POOL_MAX_IDLE and conn not in unpooled:
+                idle.append(conn)
+            else:
+                conn.close()
+
+
 def _safe_query(conn, sql, params=(), default=None):
     """Execute a query safely, returning default on any error."""
     if not conn:
@@ -151,6 +250,16 @@ def _safe_scalar(conn, sql, params=(), default=0):
         return default
 
 
+def _safe_row(conn, sql, params=()):
+    """Execute a single-row query safely; returns the row or None."""
+    if not conn:
+        return None
+    try:
+        return conn.execute(sql, params).fetchone()
+    except Exception:
+        return None
+
+
 def _format_number(n):
     """Format a number with commas."""
     if n is None:
@@ -161,6 +270,11 @@ def _format_number(n):
         return str(n)
 
 
+def _format_count(n):
+    """Format a view/subscriber count as '1,234' (None -> '0')."""
+    return f'{n or 0:,.0f}'
+
+
 def _format_dollars(cents):
     """Format cents as dollar string."""
     if cents is None:
@@ -199,6 +313,26 @@ def _get_db_size(path):
         return 0
 
 
+def _db_freshness_token(*paths):
+    """Cheap change token for a set of SQLite files (max mtime_ns, WAL included)."""
+    token = 0
+    for path in paths:
+        for p in (path, path + '-wal'):
+            try:
+                token = max(token, os.stat(p).st_mtime_ns)
+            except OSError:
+                pass
+    return token
+
+
+def _gzip_stream(chunks):
+    """Gzip a streamed text body, flushing each chunk so it still streams."""
+    comp = zlib.compressobj(5, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield comp.compress(chunk.encode('utf-8')) + comp.flush(zlib.Z_SYNC_FLUSH)
+    yield comp.flush()
+
+
 def _format_size(b):
     """Format bytes as human string."""
     if b < 1024:
@@ -2443,6 +2577,20 @@ def _cors_json(data):
     return response
 
 
+def _json_bytes(data):
+    """Serialize to compact JSON bytes (orjson when available, else stdlib)."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def _cors_json_bytes(body):
+    """Like _cors_json, for an already-serialized JSON body."""
+    response = Response(body, mimetype='application/json')
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
 def _row_to_dict(row):
     """Convert a sqlite3.Row to a plain dict."""
     if row is None:
@@ -3599,721 +3747,125 @@ def api_requests():
 
 
 # =====================================================
-# ARTIST PROFILE TEMPLATES
+# ARTIST ROUTES
+# (templates live on disk: templates/artists_list.html, templates/artist.html)
 # =====================================================
 
-ARTISTS_LIST_TEMPLATE = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Artists - Power FM</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background: #1a1a2e;
-            color: #e0e0e0;
-            line-height: 1.6;
-            padding-bottom: 40px;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-        }
-        .header {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 24px 32px;
-            background: linear-gradient(135deg, #16213e 0%, #0f3460 100%);
-            border-radius: 12px;
-            margin-bottom: 24px;
-            border: 1px solid #e94560;
-            box-shadow: 0 4px 20px rgba(233, 69, 96, 0.15);
-        }
-        .header h1 {
-            font-size: 28px;
-            font-weight: 800;
-            letter-spacing: 3px;
-            color: #fff;
-        }
-        .header h1 span { color: #e94560; }
-        .header-right { text-align: right; }
-        .back-link a {
-            color: #8892b0;
-            text-decoration: none;
-            font-size: 14px;
-            transition: color 0.2s;
-        }
-        .back-link a:hover { color: #e94560; }
-        .artist-count {
-            font-size: 14px;
-            color: #8892b0;
-            margin-bottom: 20px;
-        }
-        .artists-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fill, minmax(340px, 1fr));
-            gap: 20px;
-        }
-        .artist-card {
-            background: #16213e;
-            border-radius: 12px;
-            padding: 24px;
-            border: 1px solid #1a2744;
-            transition: border-color 0.2s, transform 0.15s;
-            text-decoration: none;
-            color: inherit;
-            display: block;
-        }
-        .artist-card:hover {
-            border-color: #e94560;
-            transform: translateY(-2px);
-        }
-        .artist-card-top {
-            display: flex;
-            align-items: center;
-            gap: 16px;
-            margin-bottom: 16px;
-        }
-        .artist-avatar {
-            width: 56px;
-            height: 56px;
-            border-radius: 50%;
-            object-fit: cover;
-            border: 2px solid #e94560;
-            flex-shrink: 0;
-        }
-        .artist-avatar-placeholder {
-            width: 56px;
-            height: 56px;
-            border-radius: 50%;
-            background: linear-gradient(135deg, #e94560, #0f3460);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 22px;
-            font-weight: 800;
-            color: #fff;
-            flex-shrink: 0;
-        }
-        .artist-card-name {
-            font-size: 20px;
-            font-weight: 700;
-            color: #fff;
-        }
-        .artist-card-sub {
-            font-size: 12px;
-            color: #8892b0;
-            margin-top: 2px;
-        }
-        .artist-stats {
-            display: grid;
-            grid-template-columns: repeat(3, 1fr);
-            gap: 12px;
-            margin-bottom: 16px;
-        }
-        .artist-stat {
-            background: #0f1a30;
-            border-radius: 8px;
-            padding: 10px 12px;
-            text-align: center;
-        }
-        .artist-stat-value {
-            font-size: 16px;
-            font-weight: 700;
-            color: #fff;
-        }
-        .artist-stat-label {
-            font-size: 10px;
-            color: #8892b0;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            margin-top: 2px;
-        }
-        .artist-badge {
-            display: inline-block;
-            padding: 3px 10px;
-            border-radius: 12px;
-            font-size: 11px;
-            font-weight: 600;
-        }
-        .badge-rank {
-            background: rgba(233, 69, 96, 0.15);
-            color: #e94560;
-            border: 1px solid rgba(233, 69, 96, 0.3);
-        }
-        .badge-power {
-            background: rgba(0, 255, 136, 0.1);
-            color: #00ff88;
-            border: 1px solid rgba(0, 255, 136, 0.3);
-        }
-        .badge-entries {
-            background: rgba(255, 183, 0, 0.1);
-            color: #ffb700;
-            border: 1px solid rgba(255, 183, 0, 0.3);
-        }
-        .artist-badges {
-            display: flex;
-            flex-wrap: wrap;
-            gap: 8px;
-        }
-        .empty-state {
-            text-align: center;
-            padding: 60px 20px;
-            color: #8892b0;
-        }
-        .empty-state h2 { color: #ccd6f6; margin-bottom: 8px; }
-        @media (max-width: 720px) {
-            .artists-grid { grid-template-columns: 1fr; }
-            .header { flex-direction: column; text-align: center; gap: 12px; }
-            .header-right { text-align: center; }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div>
-                <h1><span>POWER FM</span> ARTISTS</h1>
-            </div>
-            <div class="header-right back-link">
-                <a href="/">&larr; Back to Dashboard</a>
-            </div>
-        </div>
-
-        {% if artists %}
-        <div class="artist-count">{{ artists|length }} artist{{ 's' if artists|length != 1 else '' }} on Power FM</div>
-        <div class="artists-grid">
-            {% for a in artists %}
-            <a class="artist-card" href="/artist/{{ a.slug }}">
-                <div class="artist-card-top">
-                    {% if a.thumbnail_url %}
-                    <img class="artist-avatar" src="{{ a.thumbnail_url }}" alt="{{ a.name }}">
-                    {% else %}
-                    <div class="artist-avatar-placeholder">{{ a.name[0] | upper }}</div>
-                    {% endif %}
-                    <div>
-                        <div class="artist-card-name">{{ a.name }}</div>
-                        <div class="artist-card-sub">
-                            {% if a.subscriber_count > 0 %}{{ '{:,}'.format(a.subscriber_count) }} subscribers{% endif %}
-                            {% if a.video_count > 0 %} &middot; {{ a.video_count }} videos{% endif %}
-                        </div>
-                    </div>
-                </div>
-                <div class="artist-stats">
-                    <div class="artist-stat">
-                        <div class="artist-stat-value">{{ '{:,}'.format(a.total_views) }}</div>
-                        <div class="artist-stat-label">Views</div>
-                    </div>
-                    <div class="artist-stat">
-                        <div class="artist-stat-value">{{ '{:,}'.format(a.total_likes) }}</div>
-                        <div class="artist-stat-label">Likes</div>
-                    </div>
-                    <div class="artist-stat">
-                        <div class="artist-stat-value">{{ '%.1f' % a.power_score_avg }}</div>
-                        <div class="artist-stat-label">Avg Score</div>
-                    </div>
-                </div>
-                <div class="artist-badges">
-                    {% if a.highest_rank > 0 %}
-                    <span class="artist-badge badge-rank">#{{ a.highest_rank }} Peak</span>
-                    {% endif %}
-                    <span class="artist-badge badge-entries">{{ a.chart_entries }} chart entr{{ 'ies' if a.chart_entries != 1 else 'y' }}</span>
-                    {% if a.weeks_on_chart > 0 %}
-                    <span class="artist-badge badge-power">{{ a.weeks_on_chart }} wk{{ 's' if a.weeks_on_chart != 1 else '' }} on chart</span>
-                    {% endif %}
-                </div>
-            </a>
-            {% endfor %}
-        </div>
-        {% else %}
-        <div class="empty-state">
-            <h2>No Artists Yet</h2>
-            <p>Artist profiles will appear here once chart data is generated.</p>
-        </div>
-        {% endif %}
-    </div>
-</body>
-</html>"""
-
-
-ARTIST_TEMPLATE = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ artist.name }} - Power FM</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            background: #1a1a2e;
-            color: #e0e0e0;
-            line-height: 1.6;
-            padding-bottom: 40px;
-        }
-        .container {
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-        }
-        .back-bar {
-            margin-bottom: 20px;
-        }
-        .back-bar a {
-            color: #8892b0;
-            text-decoration: none;
-            font-size: 14px;
-            transition: color 0.2s;
-        }
-        .back-bar a:hover { color: #e94560; }
-
-        /* Artist Hero */
-        .artist-hero {
-            background: linear-gradient(135deg, #16213e 0%, #0f3460 100%);
-            border-radius: 16px;
-            padding: 40px;
-            border: 1px solid #e94560;
-            box-shadow: 0 4px 24px rgba(233, 69, 96, 0.15);
-            margin-bottom: 24px;
-            display: flex;
-            align-items: center;
-            gap: 32px;
-        }
-        .hero-avatar {
-            width: 100px;
-            height: 100px;
-            border-radius: 50%;
-            object-fit: cover;
-            border: 3px solid #e94560;
-            flex-shrink: 0;
-        }
-        .hero-avatar-placeholder {
-            width: 100px;
-            height: 100px;
-            border-radius: 50%;
-            background: linear-gradient(135deg, #e94560, #0f3460);
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-size: 40px;
-            font-weight: 800;
-            color: #fff;
-            flex-shrink: 0;
-        }
-        .hero-info { flex: 1; }
-        .hero-name {
-            font-size: 36px;
-            font-weight: 800;
-            color: #fff;
-            letter-spacing: 1px;
-            margin-bottom: 4px;
-        }
-        .hero-sub {
-            font-size: 14px;
-            color: #8892b0;
-        }
-        .hero-desc {
-            font-size: 13px;
-            color: #8892b0;
-            margin-top: 8px;
-            max-width: 600px;
-            line-height: 1.5;
-        }
-
-        /* Stats Cards */
-        .stats-row {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(180px, 1fr));
-            gap: 16px;
-            margin-bottom: 24px;
-        }
-        .stat-card {
-            background: #16213e;
-            border-radius: 12px;
-            padding: 20px;
-            text-align: center;
-            border: 1px solid #1a2744;
-        }
-        .stat-value {
-            font-size: 28px;
-            font-weight: 800;
-            color: #fff;
-        }
-        .stat-value-accent { color: #e94560; }
-        .stat-value-green { color: #00ff88; }
-        .stat-label {
-            font-size: 11px;
-            color: #8892b0;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            margin-top: 4px;
-        }
-
-        /* Sections */
-        .section {
-            background: #16213e;
-            border-radius: 12px;
-            padding: 24px;
-            margin-bottom: 24px;
-            border: 1px solid #1a2744;
-        }
-        .section-title {
-            font-size: 18px;
-            font-weight: 700;
-            color: #e94560;
-            margin-bottom: 16px;
-            padding-bottom: 8px;
-            border-bottom: 1px solid #1a2744;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }
+def _load_page_shell(name, marker):
+    """Split a static on-disk page shell at `marker` into (head, tail) bytes,
+    with the global nav already in place (so inject_nav has nothing to do)."""
+    with open(os.path.join(AGENT_DIR, 'templates', name), encoding='utf-8') as f:
+        html = f.read()
+    html = html.replace('</head>', NAV_CSS + '</head>', 1).replace('<body>', '<body>' + NAV_HTML, 1)
+    head, tail = html.split(marker, 1)
+    return head.encode('utf-8'), tail.encode('utf-8')
 
-        /* Tables */
-        .table-wrap { overflow-x: auto; }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-        }
-        thead th {
-            text-align: left;
-            padding: 10px 12px;
-            font-size: 11px;
-            font-weight: 700;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-            color: #8892b0;
-            border-bottom: 2px solid #1a2744;
-        }
-        tbody td {
-            padding: 10px 12px;
-            font-size: 14px;
-            border-bottom: 1px solid #0f1a30;
-            color: #ccd6f6;
-        }
-        tbody tr:hover {
-            background: rgba(233, 69, 96, 0.05);
-        }
-        .text-right { text-align: right; }
-        .text-center { text-align: center; }
-        .num {
-            font-variant-numeric: tabular-nums;
-            font-weight: 600;
-        }
 
-        /* Movement badges */
-        .movement-up { color: #00ff88; font-weight: 700; }
-        .movement-down { color: #e94560; font-weight: 700; }
-        .movement-new { color: #ffb700; font-weight: 700; }
-        .movement-stable { color: #8892b0; }
+# Only the artist grid goes through Jinja; the fixed <head>/<style>/header
+# and closing tags are emitted verbatim.
+_ARTISTS_HEAD, _ARTISTS_TAIL = _load_page_shell('artists_list_shell.html', '<!-- artists:body -->\n')
 
-        /* Power score bar */
-        .power-score-cell {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-        }
-        .power-score-value {
-            font-weight: 800;
-            color: #fff;
-            min-width: 44px;
-        }
-        .power-bar-track {
-            flex: 1;
-            height: 6px;
-            background: #0f1a30;
-            border-radius: 3px;
-            overflow: hidden;
-            min-width: 60px;
-        }
-        .power-bar-fill {
-            height: 100%;
-            border-radius: 3px;
-            background: linear-gradient(90deg, #e94560, #ff6b81);
-        }
 
-        /* Video list */
-        .video-item {
-            display: flex;
-            align-items: center;
-            gap: 16px;
-            padding: 12px 0;
-            border-bottom: 1px solid #0f1a30;
-        }
-        .video-item:last-child { border-bottom: none; }
-        .video-thumb {
-            width: 120px;
-            height: 68px;
-            border-radius: 6px;
-            object-fit: cover;
-            background: #0f1a30;
-            flex-shrink: 0;
-        }
-        .video-info { flex: 1; min-width: 0; }
-        .video-title {
-            font-size: 14px;
-            font-weight: 600;
-            color: #ccd6f6;
-            white-space: nowrap;
-            overflow: hidden;
-            text-overflow: ellipsis;
-        }
-        .video-meta {
-            font-size: 12px;
-            color: #8892b0;
-            margin-top: 4px;
-        }
-        .video-stats {
-            display: flex;
-            gap: 16px;
-            flex-shrink: 0;
-        }
-        .video-stat {
-            text-align: right;
-        }
-        .video-stat-value {
-            font-size: 14px;
-            font-weight: 700;
-            color: #ccd6f6;
-        }
-        .video-stat-label {
-            font-size: 10px;
-            color: #8892b0;
-            text-transform: uppercase;
-        }
+def _get_artists_conn():
+    """Hub DB connection with youtube.db attached as `yt` (for artists.py)."""
+    return _get_ro_conn(HUB_DB, attach={'yt': AGENT_DBS.get('youtube', '')})
 
-        .empty-state {
-            text-align: center;
-            padding: 40px 20px;
-            color: #8892b0;
-            font-style: italic;
-        }
 
-        /* Rank highlight */
-        .rank-1 { color: #ffd700; font-weight: 800; }
-        .rank-2 { color: #c0c0c0; font-weight: 700; }
-        .rank-3 { color: #cd7f32; font-weight: 700; }
+@lru_cache(maxsize=2)
+def _render_artists_list(token):
+    """Render the artists list page; memoized on the DB freshness token."""
+    from artists import artist_card, get_all_artists
+    hub = _get_artists_conn()
+    artists = [artist_card(a) for a in get_all_artists(hub)] if hub else []
+    body = render_template('artists_list.html', artists=artists)
+    return precompress(b''.join((_ARTISTS_HEAD, body.encode('utf-8'), _ARTISTS_TAIL)))
 
-        @media (max-width: 720px) {
-            .artist-hero {
-                flex-direction: column;
-                text-align: center;
-                padding: 24px;
-                gap: 16px;
-            }
-            .hero-desc { margin: 8px auto 0 auto; }
-            .stats-row { grid-template-columns: repeat(2, 1fr); }
-            .video-item { flex-direction: column; align-items: flex-start; }
-            .video-stats { width: 100%; justify-content: flex-start; gap: 20px; }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="back-bar">
-            <a href="/artists">&larr; All Artists</a>
-            &nbsp;&middot;&nbsp;
-            <a href="/">Dashboard</a>
-        </div>
 
-        <!-- Artist Hero -->
-        <div class="artist-hero">
-            {% if artist.thumbnail_url %}
-            <img class="hero-avatar" src="{{ artist.thumbnail_url }}" alt="{{ artist.name }}">
-            {% else %}
-            <div class="hero-avatar-placeholder">{{ artist.name[0] | upper }}</div>
-            {% endif %}
-            <div class="hero-info">
-                <div class="hero-name">{{ artist.name }}</div>
-                <div class="hero-sub">
-                    {% if artist.subscriber_count > 0 %}{{ '{:,}'.format(artist.subscriber_count) }} YouTube subscribers{% endif %}
-                    {% if artist.custom_url %} &middot; {{ artist.custom_url }}{% endif %}
-                    {% if artist.video_count > 0 %} &middot; {{ artist.video_count }} videos{% endif %}
-                </div>
-                {% if artist.description %}
-                <div class="hero-desc">{{ artist.description[:200] }}{{ '...' if artist.description|length > 200 else '' }}</div>
-                {% endif %}
-            </div>
-        </div>
+# Artist pages only change when the chart/YouTube DBs do, so let browsers and
+# proxies reuse them briefly and revalidate against Last-Modified after that.
+ARTIST_PAGE_CACHE_CONTROL = 'public, max-age=300, stale-while-revalidate=600'
 
-        <!-- Stats Cards -->
-        <div class="stats-row">
-            <div class="stat-card">
-                <div class="stat-value">{{ '{:,}'.format(artist.total_views) }}</div>
-                <div class="stat-label">Total Views</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value">{{ '{:,}'.format(artist.total_likes) }}</div>
-                <div class="stat-label">Total Likes</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value stat-value-accent">
-                    {% if artist.highest_rank > 0 %}#{{ artist.highest_rank }}{% else %}--{% endif %}
-                </div>
-                <div class="stat-label">Highest Chart Position</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value">{{ artist.weeks_on_chart }}</div>
-                <div class="stat-label">Weeks on Chart</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value stat-value-green">{{ '%.1f' % artist.power_score_avg }}</div>
-                <div class="stat-label">Avg Power Score</div>
-            </div>
-            <div class="stat-card">
-                <div class="stat-value">{{ '%.1f' % artist.power_score_max }}</div>
-                <div class="stat-label">Peak Power Score</div>
-            </div>
-        </div>
 
-        <!-- Chart History -->
-        <div class="section">
-            <div class="section-title">Chart History</div>
-            {% if artist.chart_entries %}
-            <div class="table-wrap">
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Date</th>
-                            <th class="text-center">#</th>
-                            <th style="width: 30%;">Title</th>
-                            <th style="width: 160px;">Power Score</th>
-                            <th class="text-center">Movement</th>
-                            <th class="text-right">Views</th>
-                            <th class="text-right">Likes</th>
-                            <th class="text-right">Comments</th>
-                            <th class="text-center">Wks</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {% for e in artist.chart_entries %}
-                        <tr>
-                            <td>{{ e.chart_date }}</td>
-                            <td class="text-center num {{ 'rank-1' if e.rank == 1 else ('rank-2' if e.rank == 2 else ('rank-3' if e.rank == 3 else '')) }}">
-                                {{ e.rank }}
-                            </td>
-                            <td style="font-weight: 600;">{{ e.title[:55] }}{{ '...' if e.title|length > 55 else '' }}</td>
-                            <td>
-                                <div class="power-score-cell">
-                                    <span class="power-score-value">{{ '%.1f' % e.power_score }}</span>
-                                    <div class="power-bar-track">
-                                        <div class="power-bar-fill" style="width: {{ (e.power_score / artist.power_score_max * 100) if artist.power_score_max > 0 else 0 }}%;"></div>
-                                    </div>
-                                </div>
-                            </td>
-                            <td class="text-center">
-                                {% if e.movement == 'UP' %}
-                                <span class="movement-up">&#9650; UP</span>
-                                {% elif e.movement == 'DOWN' %}
-                                <span class="movement-down">&#9660; DOWN</span>
-                                {% elif e.movement == 'NEW' %}
-                                <span class="movement-new">&#9679; NEW</span>
-                                {% else %}
-                                <span class="movement-stable">=</span>
-                                {% endif %}
-                            </td>
-                            <td class="text-right num">{{ '{:,}'.format(e.views or 0) }}</td>
-                            <td class="text-right num">{{ '{:,}'.format(e.likes or 0) }}</td>
-                            <td class="text-right num">{{ '{:,}'.format(e.comments or 0) }}</td>
-                            <td class="text-center num">{{ e.weeks_on_chart or 1 }}</td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
-                </table>
-            </div>
-            {% else %}
-            <div class="empty-state">No chart entries found for this artist.</div>
-            {% endif %}
-        </div>
+def _not_modified_since(token):
+    """True if the client's If-Modified-Since covers DB freshness token `token`."""
+    since = request.if_modified_since
+    if not token or since is None or request.if_none_match:
+        return False
+    return int(since.timestamp()) >= token // 1_000_000_000
 
-        <!-- Videos Section -->
-        <div class="section">
-            <div class="section-title">Videos ({{ artist.video_count }})</div>
-            {% if artist.videos %}
-            {% for v in artist.videos %}
-            <div class="video-item">
-                {% if v.thumbnail_url %}
-                <img class="video-thumb" src="{{ v.thumbnail_url }}" alt="{{ v.title }}">
-                {% else %}
-                <div class="video-thumb"></div>
-                {% endif %}
-                <div class="video-info">
-                    <div class="video-title">{{ v.title or 'Untitled' }}</div>
-                    <div class="video-meta">
-                        {% if v.published_at %}Published {{ v.published_at[:10] }}{% endif %}
-                        {% if v.duration %} &middot; {{ v.duration }}{% endif %}
-                    </div>
-                </div>
-                <div class="video-stats">
-                    <div class="video-stat">
-                        <div class="video-stat-value">{{ '{:,}'.format(v.view_count or 0) }}</div>
-                        <div class="video-stat-label">Views</div>
-                    </div>
-                    <div class="video-stat">
-                        <div class="video-stat-value">{{ '{:,}'.format(v.like_count or 0) }}</div>
-                        <div class="video-stat-label">Likes</div>
-                    </div>
-                </div>
-            </div>
-            {% endfor %}
-            {% else %}
-            <div class="empty-state">No YouTube videos found for this artist.</div>
-            {% endif %}
-        </div>
-    </div>
-</body>
-</html>"""
 
+def _set_artist_cache_headers(resp, token):
+    """Attach Last-Modified (from the DB freshness token) and Cache-Control."""
+    if token:
+        resp.last_modified = token // 1_000_000_000
+    resp.headers['Cache-Control'] = ARTIST_PAGE_CACHE_CONTROL
+    return resp
 
-# =====================================================
-# ARTIST ROUTES
-# =====================================================
 
 @app.route('/artists')
 def artists_list():
     """List all artists on Power FM."""
-    from artists import get_all_artists
-    hub = _open_ro(os.path.join(AGENT_DIR, 'data', 'platform_hub.db'))
-    yt = _open_ro(AGENT_DBS.get('youtube', ''))
-    artists = get_all_artists(hub, yt) if hub else []
-    if hub:
-        hub.close()
-    if yt:
-        yt.close()
-    return render_template_string(ARTISTS_LIST_TEMPLATE, artists=artists)
+    token = _db_freshness_token(HUB_DB, AGENT_DBS.get('youtube', ''))
+    resp = precompressed_response(_render_artists_list(token), f'{token:x}',
+                                  not_modified=_not_modified_since(token))
+    return _set_artist_cache_headers(resp, token)
 
 
 @app.route('/artist/<path:name>')
 def artist_detail(name):
     """Artist profile page."""
-    from artists import get_artist_detail
-    hub = _open_ro(os.path.join(AGENT_DIR, 'data', 'platform_hub.db'))
-    yt = _open_ro(AGENT_DBS.get('youtube', ''))
-    artist = get_artist_detail(hub, yt, name) if hub else None
-    if hub:
-        hub.close()
-    if yt:
-        yt.close()
+    from artists import get_artist_detail, resolve_artist_name
+    token = _db_freshness_token(HUB_DB, AGENT_DBS.get('youtube', ''))
+    hub = _get_artists_conn()
+    # Only an existing artist can be "not modified"; unknown names stay 404
+    if not hub or not resolve_artist_name(hub, name):
+        return 'Artist not found', 404
+    if _not_modified_since(token):
+        resp = Response(status=304)
+        resp.vary.add('Accept-Encoding')
+        return _set_artist_cache_headers(resp, token)
+    artist = get_artist_detail(hub, name)
     if not artist:
         return 'Artist not found', 404
-    return render_template_string(ARTIST_TEMPLATE, artist=artist)
+    # Stream so <head> and the hero reach the browser before the chart rows render
+    stream = app.jinja_env.get_template('artist.html').stream(
+        artist=artist, nav_css=Markup(NAV_CSS), nav_html=Markup(NAV_HTML))
+    stream.enable_buffering(64)
+    if pick_encoding(('gzip',)) == 'gzip':
+        resp = Response(stream_with_context(_gzip_stream(stream)), mimetype='text/html')
+        resp.content_encoding = 'gzip'
+    else:
+        resp = Response(stream_with_context(stream), mimetype='text/html')
+    resp.vary.add('Accept-Encoding')
+    return _set_artist_cache_headers(resp, token)
+
+
+@lru_cache(maxsize=2)
+def _render_artists_json(token):
+    """Serialize the /api/artists payload; memoized on the DB freshness token."""
+    from artists import get_all_artists
+    hub = _get_artists_conn()
+    artists = get_all_artists(hub) if hub else []
+    return _json_bytes({'artists': artists, 'count': len(artists)})
 
 
 @app.route('/api/artists')
 def api_artists():
     """GET /api/artists -- All artists with stats."""
-    from artists import get_all_artists
-    hub = _open_ro(os.path.join(AGENT_DIR, 'data', 'platform_hub.db'))
-    yt = _open_ro(AGENT_DBS.get('youtube', ''))
-    artists = get_all_artists(hub, yt) if hub else []
-    if hub:
-        hub.close()
-    if yt:
-        yt.close()
-    return _cors_json({'artists': artists, 'count': len(artists)})
+    token = _db_freshness_token(HUB_DB, AGENT_DBS.get('youtube', ''))
+    return _cors_json_bytes(_render_artists_json(token))
+
+
+@app.route('/api/artist/<path:name>/chart')
+def api_artist_chart(name):
+    """GET /api/artist/<name>/chart?offset=N -- Next page of chart-history rows."""
+    from artists import get_artist_chart_page
+    offset = request.args.get('offset', 0, type=int)
+    hub = _get_artists_conn()
+    page = get_artist_chart_page(hub, name, max(offset, 0)) if hub else None
+    if page is None:
+        return _cors_json({'error': 'Artist not found'}), 404
+    return _cors_json(page)
 
 
 # =====================================================
@@ -4353,16 +3905,16 @@ body { background:#1a1a2e; color:#eee; font-family:-apple-system,BlinkMacSystemF
 <div class="stats">
     <div class="stat"><div class="num">{{ channels|length }}</div><div class="lbl">CHANNELS</div></div>
     <div class="stat"><div class="num">{{ total_videos }}</div><div class="lbl">VIDEOS</div></div>
-    <div class="stat"><div class="num">{{ "{:,.0f}".format(total_views) }}</div><div class="lbl">TOTAL VIEWS</div></div>
-    <div class="stat"><div class="num">{{ "{:,.0f}".format(total_subs) }}</div><div class="lbl">SUBSCRIBERS</div></div>
+    <div class="stat"><div class="num">{{ total_views_fmt }}</div><div class="lbl">TOTAL VIEWS</div></div>
+    <div class="stat"><div class="num">{{ total_subs_fmt }}</div><div class="lbl">SUBSCRIBERS</div></div>
 </div>
 <div class="channels">
 {% for ch in channels %}
 <a class="channel" href="/youtube/{{ ch.channel_id }}">
     <h2>{{ ch.title }} {% if ch.subscriber_count > 50000 %}<span class="badge">VERIFIED</span>{% endif %}</h2>
     <div class="channel-stats">
-        <div class="channel-stat"><div class="v">{{ "{:,.0f}".format(ch.view_count) }}</div><div class="l">Views</div></div>
-        <div class="channel-stat"><div class="v">{{ "{:,.0f}".format(ch.subscriber_count) }}</div><div class="l">Subscribers</div></div>
+        <div class="channel-stat"><div class="v">{{ ch.view_fmt }}</div><div class="l">Views</div></div>
+        <div class="channel-stat"><div class="v">{{ ch.sub_fmt }}</div><div class="l">Subscribers</div></div>
         <div class="channel-stat"><div class="v">{{ ch.video_count }}</div><div class="l">Videos</div></div>
     </div>
     <div class="desc">{{ ch.extracted }} tracks extracted for Power FM rotation</div>
@@ -4370,6 +3922,12 @@ body { background:#1a1a2e; color:#eee; font-family:-apple-system,BlinkMacSystemF
 {% endfor %}
 </div>
 </div></body></html>"""
+# Compiled once here; render_template_string re-parses the source on every call
+_YT_CHANNELS_TMPL = app.jinja_env.from_string(YOUTUBE_CHANNELS_TEMPLATE)
+# Rendered once: served as-is whenever there are no channels (e.g. youtube.db missing)
+_YT_CHANNELS_EMPTY = _YT_CHANNELS_TMPL.render(
+    channels=[], total_views=0, total_subs=0, total_videos=0,
+    total_views_fmt='0', total_subs_fmt='0')
 
 YOUTUBE_CHANNEL_DETAIL_TEMPLATE = """<!DOCTYPE html>
 <html><head>
@@ -4400,13 +3958,13 @@ body { background:#1a1a2e; color:#eee; font-family:-apple-system,BlinkMacSystemF
 </style></head><body>
 <div class="header">
     <h1><span>{{ channel.title }}</span></h1>
-    <p>{{ "{:,.0f}".format(channel.subscriber_count) }} subscribers — {{ "{:,.0f}".format(channel.view_count) }} total views — {{ videos|length }} videos</p>
+    <p>{{ channel.sub_fmt }} subscribers — {{ channel.view_fmt }} total views — {{ videos|length }} videos</p>
 </div>
 <div class="container">
 <a class="back" href="/youtube">← All Channels</a>
 <div class="stats">
-    <div class="stat"><div class="num">{{ "{:,.0f}".format(channel.view_count) }}</div><div class="lbl">TOTAL VIEWS</div></div>
-    <div class="stat"><div class="num">{{ "{:,.0f}".format(channel.subscriber_count) }}</div><div class="lbl">SUBSCRIBERS</div></div>
+    <div class="stat"><div class="num">{{ channel.view_fmt }}</div><div class="lbl">TOTAL VIEWS</div></div>
+    <div class="stat"><div class="num">{{ channel.sub_fmt }}</div><div class="lbl">SUBSCRIBERS</div></div>
     <div class="stat"><div class="num">{{ videos|length }}</div><div class="lbl">VIDEOS</div></div>
     <div class="stat"><div class="num">{{ extracted_count }}</div><div class="lbl">EXTRACTED FOR FM</div></div>
 </div>
@@ -4419,8 +3977,8 @@ body { background:#1a1a2e; color:#eee; font-family:-apple-system,BlinkMacSystemF
     <div class="info">
         <h3>{{ v.title }}{% if v.extracted %}<span class="badge-extracted">ON FM</span>{% endif %}{% if v.chart_pos %}<span class="badge-chart">#{{ v.chart_pos }}</span>{% endif %}</h3>
         <div class="meta">
-            <span>{{ "{:,.0f}".format(v.view_count) }} views</span>
-            <span>{{ "{:,.0f}".format(v.like_count) }} likes</span>
+            <span>{{ v.view_fmt }} views</span>
+            <span>{{ v.like_fmt }} likes</span>
             <span>{{ v.comment_count }} comments</span>
         </div>
     </div>
@@ -4428,103 +3986,121 @@ body { background:#1a1a2e; color:#eee; font-family:-apple-system,BlinkMacSystemF
 {% endfor %}
 </div>
 </div></body></html>"""
+_YT_CHANNEL_DETAIL_TMPL = app.jinja_env.from_string(YOUTUBE_CHANNEL_DETAIL_TEMPLATE)
+
+
+YT_EXTRACTIONS_DIR = os.path.join(AGENTS_DIR, 'youtube-agent', 'extractions')
+
+
+def _extracted_video_ids():
+    """Set of video_ids with an extracted .mp3 in the youtube-agent extractions dir."""
+    # scandir gets the file type from the directory read itself, no stat() per entry
+    try:
+        with os.scandir(YT_EXTRACTIONS_DIR) as it:
+            return {e.name[:-4] for e in it if e.name.endswith('.mp3') and e.is_file()}
+    except OSError:
+        return set()
 
 
 @app.route('/youtube')
 def youtube_channels_page():
     """Public YouTube channels page."""
-    yt = _open_ro(AGENT_DBS['youtube'])
+    yt = _get_ro_conn(AGENT_DBS['youtube'])
     channels = []
     total_views = 0
     total_subs = 0
     total_videos = 0
 
     if yt:
-        try:
-            raw = _safe_query(yt, """
-                SELECT channel_id, title, subscriber_count, video_count, view_count
-                FROM channels ORDER BY view_count DESC
-            """, default=[])
-            for r in raw:
-                ch = dict(r)
-                # Count extracted audio files for this channel
-                extracted = _safe_query(yt, """
-                    SELECT COUNT(*) as cnt FROM videos WHERE channel_id = ?
-                """, (ch['channel_id'],), default=[])
-                ext_ids = _safe_query(yt, """
-                    SELECT video_id FROM videos WHERE channel_id = ?
-                """, (ch['channel_id'],), default=[])
-                ext_count = 0
-                for e in ext_ids:
-                    fpath = os.path.join(AGENTS_DIR, 'youtube-agent', 'extractions', e['video_id'] + '.mp3')
-                    if os.path.isfile(fpath):
-                        ext_count += 1
-                ch['extracted'] = ext_count
-                channels.append(ch)
-                total_views += ch['view_count'] or 0
-                total_subs += ch['subscriber_count'] or 0
-                total_videos += ch['video_count'] or 0
-        finally:
-            yt.close()
-
-    return render_template_string(YOUTUBE_CHANNELS_TEMPLATE,
+        totals = _safe_query(yt, """
+            SELECT COALESCE(SUM(view_count), 0), COALESCE(SUM(subscriber_count), 0),
+                   COALESCE(SUM(video_count), 0)
+            FROM channels
+        """, default=[])
+        if totals:
+            total_views, total_subs, total_videos = totals[0]
+        raw = _safe_query(yt, """
+            SELECT channel_id, title, subscriber_count, video_count, view_count
+            FROM channels ORDER BY view_count DESC
+        """, default=[])
+        # One pass over all videos plus one directory listing, instead of
+        # per-channel queries and a stat() per video
+        vids_by_channel = defaultdict(list)
+        for v in _safe_query(yt, "SELECT channel_id, video_id FROM videos", default=[]):
+            vids_by_channel[v['channel_id']].append(v['video_id'])
+        extracted_ids = _extracted_video_ids()
+        # Columns are known, so build the dicts directly (NULL counts -> 0)
+        channels = [{
+            'channel_id': r[0],
+            'title': r[1],
+            'subscriber_count': r[2] or 0,
+            'video_count': r[3] or 0,
+            'view_count': r[4] or 0,
+            'extracted': sum(1 for v in vids_by_channel[r[0]] if v in extracted_ids),
+            'view_fmt': _format_count(r[4]),
+            'sub_fmt': _format_count(r[2]),
+        } for r in raw]
+
+    if not channels:
+        return _YT_CHANNELS_EMPTY
+    return _YT_CHANNELS_TMPL.render(
         channels=channels, total_views=total_views,
-        total_subs=total_subs, total_videos=total_videos)
+        total_subs=total_subs, total_videos=total_videos,
+        total_views_fmt=_format_count(total_views),
+        total_subs_fmt=_format_count(total_subs))
 
 
 @app.route('/youtube/<channel_id>')
 def youtube_channel_detail(channel_id):
     """Per-channel page with embedded YouTube players."""
-    yt = _open_ro(AGENT_DBS['youtube'])
-    channel = None
+    yt = _get_ro_conn(AGENT_DBS['youtube'])
+    row = _safe_row(yt, """
+        SELECT channel_id, title, subscriber_count, video_count, view_count
+        FROM channels WHERE channel_id = ?
+    """, (channel_id,))
+    if row is None:
+        return 'Channel not found', 404
+    channel = dict(row)
+    channel['view_fmt'] = _format_count(channel['view_count'])
+    channel['sub_fmt'] = _format_count(channel['subscriber_count'])
     videos = []
     extracted_count = 0
 
-    if yt:
-        try:
-            ch_raw = _safe_query(yt, """
-                SELECT channel_id, title, subscriber_count, video_count, view_count
-                FROM channels WHERE channel_id = ?
-            """, (channel_id,), default=[])
-            if ch_raw:
-                channel = dict(ch_raw[0])
-
-            vid_raw = _safe_query(yt, """
-                SELECT video_id, title, view_count, like_count, comment_count, published_at
-                FROM videos WHERE channel_id = ? ORDER BY view_count DESC
-            """, (channel_id,), default=[])
-
-            # Load chart positions
-            hub = _open_ro(os.path.join(AGENT_DIR, 'data', 'platform_hub.db'))
-            chart_positions = {}
-            if hub:
-                try:
-                    chart_raw = _safe_query(hub, """
-                        SELECT video_id, position FROM chart_entries
-                        WHERE chart_date = (SELECT MAX(chart_date) FROM chart_entries)
-                    """, default=[])
-                    for cr in chart_raw:
-                        chart_positions[cr['video_id']] = cr['position']
-                except Exception:
-                    pass
-                finally:
-                    hub.close()
-
-            for r in vid_raw:
-                v = dict(r)
-                fpath = os.path.join(AGENTS_DIR, 'youtube-agent', 'extractions', v['video_id'] + '.mp3')
-                v['extracted'] = os.path.isfile(fpath)
-                v['chart_pos'] = chart_positions.get(v['video_id'])
-                if v['extracted']:
-                    extracted_count += 1
-                videos.append(v)
-        finally:
-            yt.close()
+    vid_raw = _safe_query(yt, """
+        SELECT video_id, title, view_count, like_count, comment_count, published_at
+        FROM videos WHERE channel_id = ? ORDER BY view_count DESC
+    """, (channel_id,), default=[])
 
-    if not channel:
-        return 'Channel not found', 404
-
-    return render_template_string(YOUTUBE_CHANNEL_DETAIL_TEMPLATE,
+    # Latest chart positions, for this channel's videos only
+    chart_positions = {}
+    vids = [r['video_id'] for r in vid_raw]
+    hub = _get_ro_conn(HUB_DB) if vids else None
+    if hub:
+        # charts.generate_chart records the newest date in agent_state;
+        # fall back to MAX() for hubs that predate that.
+        latest = _safe_query(hub, "SELECT value FROM agent_state WHERE key = 'latest_chart_date'", default=[])
+        if not latest:
+            latest = _safe_query(hub, "SELECT MAX(chart_date) FROM chart_entries", default=[])
+        qmarks = ','.join('?' * len(vids))
+        chart_raw = _safe_query(hub, f"""
+            SELECT video_id, rank FROM chart_entries
+            WHERE chart_date = ? AND video_id IN ({qmarks})
+        """, (latest[0][0] if latest else None, *vids), default=[])
+        for cr in chart_raw:
+            chart_positions[cr['video_id']] = cr['rank']
+
+    extracted_ids = _extracted_video_ids()
+    for r in vid_raw:
+        v = dict(r)
+        v['extracted'] = v['video_id'] in extracted_ids
+        v['chart_pos'] = chart_positions.get(v['video_id'])
+        v['view_fmt'] = _format_count(v['view_count'])
+        v['like_fmt'] = _format_count(v['like_count'])
+        if v['extracted']:
+            extracted_count += 1
+        videos.append(v)
+
+    return _YT_CHANNEL_DETAIL_TMPL.render(
         channel=channel, videos=videos, extracted_count=extracted_count)
 
 
@@ -4611,6 +4187,8 @@ async function subscribe(priceId) {
 }
 </script>
 </body></html>"""
+_MEMBERSHIP_TMPL = app.jinja_env.from_string(MEMBERSHIP_TEMPLATE)
+_MEMBERSHIP_EMPTY = _MEMBERSHIP_TMPL.render(plans=[])
 
 # Features for each tier
 PLAN_FEATURES = {
@@ -4640,56 +4218,77 @@ PLAN_FEATURES = {
 RECOMMENDED_PLAN = 'Power FM Pro'
 
 
+# Last rendered /membership page, keyed by the catalog rows it was built from
+_membership_page = {}
+
+
 @app.route('/membership')
 def membership():
     """Public membership page showing subscription plans."""
     stripe_db = _open_ro(AGENT_DBS.get('stripe', ''))
-    plans = []
+    products = []
 
     if stripe_db:
         try:
+            # Cheapest active price per product in the same query (no per-product lookup)
             products = _safe_query(stripe_db, """
-                SELECT stripe_id, name, description FROM products
-                WHERE active = 1 ORDER BY name
+                SELECT p.stripe_id, p.name, p.description,
+                       (SELECT pr.stripe_id FROM prices pr
+                        WHERE pr.product_id = p.stripe_id AND pr.active = 1
+                        ORDER BY pr.unit_amount_cents ASC LIMIT 1) AS price_id,
+                       (SELECT MIN(pr.unit_amount_cents) FROM prices pr
+                        WHERE pr.product_id = p.stripe_id AND pr.active = 1) AS price_cents
+                FROM products p
+                WHERE p.active = 1 ORDER BY p.name
             """, default=[])
-
-            for prod in products:
-                prod_dict = dict(prod)
-                price_row = _safe_query(stripe_db, """
-                    SELECT stripe_id, unit_amount_cents FROM prices
-                    WHERE product_id = ? AND active = 1
-                    ORDER BY unit_amount_cents ASC LIMIT 1
-                """, (prod_dict['stripe_id'],), default=[])
-
-                if price_row:
-                    price_data = dict(price_row[0])
-                    amount_cents = price_data.get('unit_amount_cents', 0)
-                    plans.append({
-                        'name': prod_dict['name'],
-                        'description': prod_dict.get('description', ''),
-                        'price': f"{amount_cents / 100:.2f}",
-                        'price_id': price_data['stripe_id'],
-                        'features': PLAN_FEATURES.get(prod_dict['name'], []),
-                        'recommended': prod_dict['name'] == RECOMMENDED_PLAN,
-                    })
         finally:
             stripe_db.close()
 
+    # The page depends only on this catalog snapshot; re-render only when it changes
+    key = tuple(tuple(prod) for prod in products)
+    cached = _membership_page.get('page')
+    if cached and cached[0] == key:
+        return cached[1]
+
+    plans = []
+    for prod in products:
+        if prod['price_id'] is None:
+            continue
+        amount_cents = prod['price_cents'] or 0
+        dollars, cents = divmod(amount_cents, 100)
+        plans.append({
+            'name': prod['name'],
+            'description': prod['description'],
+            'price': f"{dollars}.{cents:02d}",
+            'price_cents': amount_cents,
+            'price_id': prod['price_id'],
+            'features': PLAN_FEATURES.get(prod['name'], []),
+            'recommended': prod['name'] == RECOMMENDED_PLAN,
+        })
+
     # Sort by price ascending
-    plans.sort(key=lambda p: float(p['price']))
+    plans.sort(key=lambda p: p['price_cents'])
 
-    return render_template_string(MEMBERSHIP_TEMPLATE, plans=plans)
+    html = _MEMBERSHIP_TMPL.render(plans=plans) if plans else _MEMBERSHIP_EMPTY
+    _membership_page['page'] = (key, html)
+    return html
+
+
+# Stripe client, set up once at import so checkout requests don't pay for the
+# sys.path tweak, module import and config load. Config changes need a restart.
+STRIPE_AGENT_DIR = os.path.join(AGENTS_DIR, 'stripe-agent')
+if STRIPE_AGENT_DIR not in sys.path:
+    sys.path.append(STRIPE_AGENT_DIR)  # appended: its database.py/agent.py must not shadow ours
+try:
+    from api_client import StripeClient
+    _stripe_client = StripeClient()
+except Exception:
+    _stripe_client = None
 
 
 @app.route('/api/checkout', methods=['POST'])
 def api_checkout():
     """Create a Stripe Checkout session and return the URL."""
-    import sys
-    stripe_agent_dir = os.path.join(AGENTS_DIR, 'stripe-agent')
-    if stripe_agent_dir not in sys.path:
-        sys.path.insert(0, stripe_agent_dir)
-    from api_client import StripeClient
-
     body = request.get_json(force=True)
     price_id = body.get('price_id')
     if not price_id:
@@ -4699,8 +4298,8 @@ def api_checkout():
     success_url = f"{base_url}/membership?status=success"
     cancel_url = f"{base_url}/membership?status=cancelled"
 
-    client = StripeClient()
-    if not client.is_configured():
+    client = _stripe_client
+    if client is None or not client.is_configured():
         return jsonify({'error': 'Stripe is not configured'}), 503
 
     session = client.create_checkout_session(price_id, success_url, cancel_url)
@@ -5,6 +5,7 @@ Tracks agent status, cross-references, platform metrics, and layer health.
 
 import sqlite3
 import os
+from contextlib import contextmanager
 from datetime import datetime
 
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'platform_hub.db')
@@ -13,9 +14,16 @@ DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'platform_hub.db')
 def get_connection():
     """Get a database connection, creating tables if needed."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    # Room for every distinct statement text we issue, so repeats skip the SQL parse
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA journal_mode=WAL")
+    # WAL makes synchronous=NORMAL durable enough (only the last commits can
+    # roll back on power loss) and it skips the fsync on every commit.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
     _create_tables(conn)
     return conn
 
@@ -112,12 +120,31 @@ def _create_tables(conn):
         CREATE INDEX IF NOT EXISTS idx_layer_number ON layer_status(layer_number);
         CREATE INDEX IF NOT EXISTS idx_chart_entries_date ON chart_entries(chart_date);
         CREATE INDEX IF NOT EXISTS idx_chart_entries_video ON chart_entries(video_id);
+        CREATE INDEX IF NOT EXISTS idx_chart_entries_date_video ON chart_entries(chart_date, video_id);
+        CREATE INDEX IF NOT EXISTS idx_chart_entries_date_rank_video
+            ON chart_entries(chart_date, rank, video_id, weeks_on_chart);
         CREATE INDEX IF NOT EXISTS idx_chart_history_date ON chart_history(chart_date);
         CREATE INDEX IF NOT EXISTS idx_chart_history_video ON chart_history(video_id);
     """)
+    # Give the planner table stats once (fresh DBs only) so it picks the
+    # covering index above for get_previous_chart's date + ORDER BY rank scan.
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute("ANALYZE")
     conn.commit()
 
 
+@contextmanager
+def writer(conn):
+    """Group hub writes into one transaction: commit on success, roll back on error.
+
+    The upsert/save helpers below don't commit on their own, so callers
+    wrap them, e.g. `with writer(conn): upsert_platform_status(...); ...`,
+    and pay for a single commit per group.
+    """
+    with conn:
+        yield conn
+
+
 def upsert_platform_status(conn, agent_name, status, record_count, db_size_bytes, last_report=None):
     """Insert or update agent platform status."""
     now = datetime.utcnow().isoformat()
@@ -132,7 +159,6 @@ def upsert_platform_status(conn, agent_name, status, record_count, db_size_bytes
             last_report = COALESCE(excluded.last_report, last_report),
             updated_at = excluded.updated_at
     """, (agent_name, now, status, record_count, db_size_bytes, last_report, now))
-    conn.commit()
 
 
 def upsert_cross_reference(conn, source_agent, source_id, target_agent, target_id, rel_type, confidence=1.0):
@@ -144,7 +170,6 @@ def upsert_cross_reference(conn, source_agent, source_id, target_agent, target_i
             relationship_type = excluded.relationship_type,
             confidence = excluded.confidence
     """, (source_agent, source_id, target_agent, target_id, rel_type, confidence))
-    conn.commit()
 
 
 def save_metric(conn, date_str, name, value, unit, source_agent):
@@ -153,7 +178,6 @@ def save_metric(conn, date_str, name, value, unit, source_agent):
         INSERT INTO platform_metrics (date, metric_name, metric_value, metric_unit, source_agent)
         VALUES (?, ?, ?, ?, ?)
     """, (date_str, name, value, unit, source_agent))
-    conn.commit()
 
 
 def upsert_layer_status(conn, layer_number, layer_name, status, health_score, active_agents):
@@ -169,7 +193,6 @@ def upsert_layer_status(conn, layer_number, layer_name, status, health_score, ac
             active_agents = excluded.active_agents,
             last_updated = excluded.last_updated
     """, (layer_number, layer_name, status, health_score, active_agents, now))
-    conn.commit()
 
 
 def get_all_agent_status(conn):
@@ -183,17 +206,17 @@ def get_all_layers(conn):
 
 
 def get_recent_metrics(conn, limit=50):
-    """Get recent platform metrics."""
+    """Get recent platform metrics as a row iterator (wrap in list() if needed)."""
     return conn.execute("""
         SELECT * FROM platform_metrics ORDER BY date DESC, created_at DESC LIMIT ?
-    """, (limit,)).fetchall()
+    """, (limit,))
 
 
 def get_cross_references(conn, limit=50):
-    """Get all cross-references."""
+    """Get all cross-references as a row iterator (wrap in list() if needed)."""
     return conn.execute("""
         SELECT * FROM cross_references ORDER BY created_at DESC LIMIT ?
-    """, (limit,)).fetchall()
+    """, (limit,))
 
 
 def get_agent_state(conn, key, default=None):
@@ -206,50 +229,79 @@ def set_agent_state(conn, key, value):
         INSERT OR REPLACE INTO agent_state (key, value, updated_at)
         VALUES (?, ?, ?)
     """, (key, value, datetime.utcnow().isoformat()))
-    conn.commit()
 
 
 # --- Power Charts tables ---
 
+_CHART_ENTRY_UPSERT = """
+    INSERT INTO chart_entries
+        (chart_date, rank, previous_rank, video_id, title, artist,
+         power_score, views, likes, comments, subscriber_count,
+         movement, weeks_on_chart)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(chart_date, rank) DO UPDATE SET
+        previous_rank = excluded.previous_rank,
+        video_id = excluded.video_id,
+        title = excluded.title,
+        artist = excluded.artist,
+        power_score = excluded.power_score,
+        views = excluded.views,
+        likes = excluded.likes,
+        comments = excluded.comments,
+        subscriber_count = excluded.subscriber_count,
+        movement = excluded.movement,
+        weeks_on_chart = excluded.weeks_on_chart
+"""
+
+_CHART_HISTORY_UPSERT = """
+    INSERT INTO chart_history (chart_date, video_id, rank, power_score, views, likes, comments)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(chart_date, video_id) DO UPDATE SET
+        rank = excluded.rank,
+        power_score = excluded.power_score,
+        views = excluded.views,
+        likes = excluded.likes,
+        comments = excluded.comments
+"""
+
+
 def save_chart_entry(conn, chart_date, rank, previous_rank, video_id, title, artist,
                      power_score, views, likes, comments, subscriber_count,
                      movement, weeks_on_chart):
     """Insert or update a chart entry for a given date and rank."""
-    conn.execute("""
+    conn.execute(_CHART_ENTRY_UPSERT, (
+        chart_date, rank, previous_rank, video_id, title, artist,
+        power_score, views, likes, comments, subscriber_count,
+        movement, weeks_on_chart))
+
+
+def replace_chart_for_date(conn, chart_date, rows):
+    """Swap in a freshly built chart: drop chart_date's entries, then plain-INSERT rows.
+
+    Cheaper than upserting rank by rank when the whole chart is rebuilt, and
+    no stale ranks survive if the new chart is shorter. rows are tuples in
+    save_chart_entry's order. Does not commit; wrap in `with conn:` so the
+    delete and inserts land as one transaction.
+    """
+    conn.execute("DELETE FROM chart_entries WHERE chart_date = ?", (chart_date,))
+    conn.executemany("""
         INSERT INTO chart_entries
             (chart_date, rank, previous_rank, video_id, title, artist,
              power_score, views, likes, comments, subscriber_count,
              movement, weeks_on_chart)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(chart_date, rank) DO UPDATE SET
-            previous_rank = excluded.previous_rank,
-            video_id = excluded.video_id,
-            title = excluded.title,
-            artist = excluded.artist,
-            power_score = excluded.power_score,
-            views = excluded.views,
-            likes = excluded.likes,
-            comments = excluded.comments,
-            subscriber_count = excluded.subscriber_count,
-            movement = excluded.movement,
-            weeks_on_chart = excluded.weeks_on_chart
-    """, (chart_date, rank, previous_rank, video_id, title, artist,
-          power_score, views, likes, comments, subscriber_count,
-          movement, weeks_on_chart))
+    """, rows)
 
 
 def save_chart_history(conn, chart_date, video_id, rank, power_score, views, likes, comments):
     """Save a weekly snapshot for trend tracking."""
-    conn.execute("""
-        INSERT INTO chart_history (chart_date, video_id, rank, power_score, views, likes, comments)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(chart_date, video_id) DO UPDATE SET
-            rank = excluded.rank,
-            power_score = excluded.power_score,
-            views = excluded.views,
-            likes = excluded.likes,
-            comments = excluded.comments
-    """, (chart_date, video_id, rank, power_score, views, likes, comments))
+    conn.execute(_CHART_HISTORY_UPSERT, (
+        chart_date, video_id, rank, power_score, views, likes, comments))
+
+
+def save_chart_history_bulk(conn, rows):
+    """Save many weekly snapshots; rows are tuples in save_chart_history's order."""
+    conn.executemany(_CHART_HISTORY_UPSERT, rows)
 
 
 def get_previous_chart(conn, before_date):
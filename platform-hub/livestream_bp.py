@@ -7,73 +7,279 @@ Socket.IO signaling for mediasoup WebRTC.
 import os
 import sys
 import uuid
+import queue
 import time
+import hashlib
+import secrets
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+from functools import cache
 from datetime import datetime
+from collections import OrderedDict
 
-from flask import Blueprint, render_template_string, jsonify, request
+from flask import Blueprint, Response, jsonify, request
+from jinja2 import Environment
 
-# Add livestream-agent to path for database + SFU access
+from precompressed import precompress, precompressed_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# livestream-agent provides database + SFU access; its directory is only put on
+# sys.path the first time one of the lazy getters below needs it.
 LIVESTREAM_AGENT_DIR = os.path.join(os.path.expanduser('~'), 'Agents', 'livestream-agent')
-if LIVESTREAM_AGENT_DIR not in sys.path:
-    sys.path.insert(0, LIVESTREAM_AGENT_DIR)
 
-from flask_socketio import SocketIO, emit, join_room, leave_room
 
-# Lazy imports from livestream-agent (may fail if agent not installed)
-_ls_db = None
-_sfu = None
-_ls_config = None
+def _add_agent_path():
+    if LIVESTREAM_AGENT_DIR not in sys.path:
+        sys.path.insert(0, LIVESTREAM_AGENT_DIR)
 
 
+# Lazy imports from livestream-agent (may fail if agent not installed).
+# Each getter runs once; @cache keeps the module (or None) for later calls.
+@cache
 def _get_ls_db():
-    global _ls_db
-    if _ls_db is None:
-        try:
-            import database as ls_database
-            _ls_db = ls_database
-        except ImportError:
-            _ls_db = False
-    return _ls_db if _ls_db else None
+    try:
+        _add_agent_path()
+        import database as ls_database
+        return ls_database
+    except ImportError:
+        return None
 
 
+@cache
 def _get_sfu():
-    global _sfu
-    if _sfu is None:
-        try:
-            import sfu_client
-            _sfu = sfu_client
-        except ImportError:
-            _sfu = False
-    return _sfu if _sfu else None
+    try:
+        _add_agent_path()
+        import sfu_client
+        return sfu_client
+    except ImportError:
+        return None
+
+
+# Idle livestream DB connections. Under eventlet/gevent every handler runs on
+# the one OS thread, so a connection can be handed from event to event instead
+# of being reopened (and its schema re-checked) each time. sqlite3 connections
+# can't cross real threads, so under threading each use gets its own.
+_GREEN_MODES = ('eventlet', 'gevent', 'gevent_uwsgi')
+_CONN_POOL_MAX = 4
+_conn_pool = []
+
+
+@contextmanager
+def _ls_connection(db):
+    """A livestream DB connection for one unit of work, pooled where that is safe."""
+    pooled = get_socketio().async_mode in _GREEN_MODES
+    conn = _conn_pool.pop() if pooled and _conn_pool else db.get_connection()
+    try:
+        yield conn
+    except BaseException:
+        conn.close()
+        raise
+    if pooled and len(_conn_pool) < _CONN_POOL_MAX:
+        _conn_pool.append(conn)
+    else:
+        conn.close()
 
 
+@cache
 def _get_ls_config():
-    global _ls_config
-    if _ls_config is None:
-        try:
-            from config import ICE_SERVERS, ROOM_PREFIX, SFU_SOCKET
-            _ls_config = {
-                'ICE_SERVERS': ICE_SERVERS,
-                'ROOM_PREFIX': ROOM_PREFIX,
-                'SFU_SOCKET': SFU_SOCKET,
-            }
-        except ImportError:
-            _ls_config = {
-                'ICE_SERVERS': [
-                    {'urls': 'stun:stun.l.google.com:19302'},
-                    {'urls': 'stun:stun1.l.google.com:19302'},
-                ],
-                'ROOM_PREFIX': 'live-',
-                'SFU_SOCKET': os.path.join(os.path.expanduser('~'), 'Agents', 'secure-call', 'sfu', 'mediasoup.sock'),
-            }
-    return _ls_config
+    try:
+        _add_agent_path()
+        from config import ICE_SERVERS, ROOM_PREFIX, SFU_SOCKET
+        return {
+            'ICE_SERVERS': ICE_SERVERS,
+            'ROOM_PREFIX': ROOM_PREFIX,
+            'SFU_SOCKET': SFU_SOCKET,
+        }
+    except ImportError:
+        return {
+            'ICE_SERVERS': [
+                {'urls': 'stun:stun.l.google.com:19302'},
+                {'urls': 'stun:stun1.l.google.com:19302'},
+            ],
+            'ROOM_PREFIX': 'live-',
+            'SFU_SOCKET': os.path.join(os.path.expanduser('~'), 'Agents', 'secure-call', 'sfu', 'mediasoup.sock'),
+        }
 
 
 # In-memory state for active streams (supplements DB)
-active_streams = {}  # stream_id -> {host_sid, room_id, producers: {sid: [producer_ids]}, listeners: {sid: peer_info}}
+class _StreamShards:
+    """stream_id -> info dict, split across shards that each have their own lock.
+
+    Writers only contend with streams hashed to the same shard. Each stream's
+    `listeners` is an immutable tuple of (sid, peer_info) that is swapped out
+    under the shard lock, so broadcast code can iterate it without locking.
+    Each shard also keeps the number of listeners across its streams, so the
+    total is a sum over the shards rather than over every stream.
+    """
+
+    def __init__(self, count=16):
+        self._shards = [({}, threading.Lock()) for _ in range(count)]
+        self._listener_counts = [0] * count
+
+    def _index(self, stream_id):
+        return hash(stream_id) % len(self._shards)
+
+    def _shard(self, stream_id):
+        return self._shards[self._index(stream_id)]
+
+    def lock_for(self, stream_id):
+        return self._shard(stream_id)[1]
+
+    def __contains__(self, stream_id):
+        return stream_id in self._shard(stream_id)[0]
+
+    def __getitem__(self, stream_id):
+        return self._shard(stream_id)[0][stream_id]
+
+    def get(self, stream_id, default=None):
+        return self._shard(stream_id)[0].get(stream_id, default)
+
+    def __setitem__(self, stream_id, info):
+        index = self._index(stream_id)
+        shard, lock = self._shards[index]
+        with lock:
+            old = shard.get(stream_id)
+            shard[stream_id] = info
+            self._listener_counts[index] += (len(info.get('listeners', ()))
+                                             - (len(old.get('listeners', ())) if old else 0))
+
+    def pop(self, stream_id, default=None):
+        index = self._index(stream_id)
+        shard, lock = self._shards[index]
+        with lock:
+            info = shard.pop(stream_id, None)
+            if info is None:
+                return default
+            self._listener_counts[index] -= len(info.get('listeners', ()))
+            return info
+
+    def set_listeners(self, stream_id, info, listeners):
+        """Swap in a stream's listener tuple; call with lock_for(stream_id) held."""
+        index = self._index(stream_id)
+        if self._shards[index][0].get(stream_id) is info:
+            self._listener_counts[index] += len(listeners) - len(info['listeners'])
+        info['listeners'] = listeners
+
+    def listener_total(self):
+        return sum(self._listener_counts)
+
+    def __len__(self):
+        return sum(len(shard) for shard, _ in self._shards)
+
+    def items(self):
+        """Point-in-time list of (stream_id, info) across all shards."""
+        return [item for shard, _ in self._shards for item in list(shard.items())]
+
+    def values(self):
+        return [info for shard, _ in self._shards for info in list(shard.values())]
+
+
+# stream_id -> {host_sid, room_id, producers: {sid: [producer_ids]}, listeners: ((sid, peer_info), ...)}
+active_streams = _StreamShards()
+# SFU room_id -> stream_id for live streams, so SFU events can find their room
+room_to_stream = {}
+
+
+def _add_listener(stream_id, info, sid, peer_info):
+    """Copy-on-write add of a listener; returns the new listener count."""
+    with active_streams.lock_for(stream_id):
+        listeners = tuple(l for l in info['listeners'] if l[0] != sid) + ((sid, peer_info),)
+        active_streams.set_listeners(stream_id, info, listeners)
+        if len(listeners) > info['max_listeners']:
+            info['max_listeners'] = len(listeners)
+    return len(listeners)
+
+
+def _remove_listener(stream_id, info, sid):
+    """Copy-on-write removal; returns (peer_info or None, remaining count)."""
+    with active_streams.lock_for(stream_id):
+        listeners = info.get('listeners', ())
+        for i, (lsid, peer_info) in enumerate(listeners):
+            if lsid == sid:
+                active_streams.set_listeners(stream_id, info, listeners[:i] + listeners[i + 1:])
+                return peer_info, len(listeners) - 1
+    return None, len(listeners)
 
 livestream_bp = Blueprint('livestream', __name__)
-socketio = SocketIO()
+
+# flask_socketio (and engineio / eventlet behind it) is only imported once the
+# Socket.IO server is first asked for, so importing this module just to
+# register the blueprint's routes stays cheap. Handlers declared with @_on are
+# attached when that happens; `livestream_bp.socketio` resolves through the
+# module __getattr__ below.
+_socketio = None
+_socket_handlers = []
+
+
+def _on(event):
+    """Declare a Socket.IO handler, registered when the server is created."""
+    def decorator(fn):
+        _socket_handlers.append((event, fn))
+        if _socketio is not None:
+            _socketio.on(event)(fn)
+        return fn
+    return decorator
+
+
+class _OrjsonCodec:
+    """json-module shim so python-socketio encodes packets with orjson."""
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return orjson.dumps(obj).decode('utf-8')
+
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
+def get_socketio():
+    """The blueprint's SocketIO server, created on first use."""
+    global _socketio
+    if _socketio is None:
+        from flask_socketio import SocketIO
+        # Flask-SocketIO is WSGI-only and has no 'asyncio' mode; the densest
+        # option it offers is a green-thread server. None lets it pick
+        # eventlet > gevent > threading from what is installed,
+        # POWER_FM_SOCKETIO_MODE pins one explicitly.
+        options = {'json': _OrjsonCodec} if orjson is not None else {}
+        # The pages connect WebSocket-only, so there is no polling handshake to
+        # upgrade from. http_compression only covers long-polling responses;
+        # WebSocket frames are compressed by the transport itself, which
+        # accepts the browser's permessage-deflate offer (simple-websocket
+        # under threading, eventlet.websocket under eventlet).
+        _socketio = SocketIO(async_mode=os.environ.get('POWER_FM_SOCKETIO_MODE') or None,
+                             allow_upgrades=False, http_compression=False,
+                             **options)
+        for event, fn in _socket_handlers:
+            _socketio.on(event)(fn)
+    return _socketio
+
+
+def __getattr__(name):
+    if name == 'socketio':
+        return get_socketio()
+    if name in ('SocketIO', 'leave_room'):
+        import flask_socketio
+        return getattr(flask_socketio, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def emit(*args, **kwargs):
+    """flask_socketio.emit for the current handler's client, imported lazily."""
+    from flask_socketio import emit as _emit
+    return _emit(*args, **kwargs)
+
+
+def join_room(room):
+    from flask_socketio import join_room as _join_room
+    return _join_room(room)
 
 # ─── Color scheme constants ───
 BG = '#1a1a2e'
@@ -81,6 +287,9 @@ PANEL = '#16213e'
 ACCENT = '#e94560'
 TEXT = '#eee'
 MUTED = '#999'
+# Emitted once per page as CSS custom properties; the page CSS (and the few
+# inline style attributes) refer to them as var(--bg), var(--accent), ...
+_CSS_VARS = f':root{{--bg:{BG};--panel:{PANEL};--accent:{ACCENT};--text:{TEXT};--muted:{MUTED}}}'
 
 # ─── Spotlight & Tip config ───
 SPOTLIGHT_TIERS = {
@@ -89,35 +298,77 @@ SPOTLIGHT_TIERS = {
     '10min': {'price': 2500, 'duration': 600},
 }
 
-TIP_PRESETS = [200, 500, 1000, 2000, 5000]  # cents
+SPOTLIGHT_TIER_PRICE = {tier: info['price'] for tier, info in SPOTLIGHT_TIERS.items()}
+
+TIP_PRESETS = frozenset({200, 500, 1000, 2000, 5000})  # cents
+
+
+def _cents_label(cents):
+    return f'${cents // 100}' if cents % 100 == 0 else f'${cents / 100:.2f}'
+
+
+# The listener page's purchase buttons are generated from the two tables above,
+# so the UI can only offer tiers and tip amounts the server will accept.
+_SPOTLIGHT_BUTTONS_HTML = '\n'.join(
+    f'                    <button class="btn-tier" onclick="handlePurchase(\'spotlight\',\'{tier}\')">'
+    f'Join DJ — {_cents_label(info["price"])} ({tier})</button>'
+    for tier, info in SPOTLIGHT_TIERS.items()
+)
+_TIP_BUTTONS_HTML = '\n'.join(
+    f'                    <button class="btn-tip" onclick="handlePurchase(\'tip\',null,{cents})">'
+    f'{_cents_label(cents)}</button>'
+    for cents in sorted(TIP_PRESETS)
+)
+
+# ─── Client script assets ───
+STATIC_JS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'js')
+SOCKETIO_CLIENT_URL = 'https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.4/socket.io.min.js'
+STATIC_JS_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _static_js_url(filename):
+    """/static/js URL with a content-hash ?v= so it can be cached forever."""
+    try:
+        with open(os.path.join(STATIC_JS_DIR, filename), 'rb') as f:
+            return f'/static/js/{filename}?v={hashlib.sha256(f.read()).hexdigest()[:12]}'
+    except OSError:
+        return f'/static/js/{filename}'
+
+
+MEDIASOUP_CLIENT_URL = _static_js_url('mediasoup-client.bundle.js')
+
+# Preload in <head>, execute deferred so neither script blocks first paint.
+_MEDIA_SCRIPT_PRELOADS = (
+    '<link rel="preload" as="script" href="' + MEDIASOUP_CLIENT_URL + '">\n'
+    '<link rel="preload" as="script" href="' + SOCKETIO_CLIENT_URL + '" crossorigin>'
+)
+_SOCKETIO_SCRIPT = '<script defer src="' + SOCKETIO_CLIENT_URL + '" crossorigin></script>'
+_MEDIA_SCRIPTS = '<script defer src="' + MEDIASOUP_CLIENT_URL + '"></script>\n' + _SOCKETIO_SCRIPT
 
 # Stripe client lazy loader
-_stripe_client = None
 STRIPE_AGENT_DIR = os.path.join(os.path.expanduser('~'), 'Agents', 'stripe-agent')
 
 
+@cache
 def _get_stripe_client():
-    global _stripe_client
-    if _stripe_client is None:
-        try:
-            if STRIPE_AGENT_DIR not in sys.path:
-                sys.path.insert(0, STRIPE_AGENT_DIR)
-            from api_client import StripeClient
-            _stripe_client = StripeClient()
-            if not _stripe_client.is_configured():
-                _stripe_client = False
-        except Exception:
-            _stripe_client = False
-    return _stripe_client if _stripe_client else None
+    try:
+        if STRIPE_AGENT_DIR not in sys.path:
+            sys.path.insert(0, STRIPE_AGENT_DIR)
+        from api_client import StripeClient
+        client = StripeClient()
+        return client if client.is_configured() else None
+    except Exception:
+        return None
 
 
 PAYMENT_SUCCESS_HTML = """
 <!DOCTYPE html>
 <html><head><title>Payment Complete</title>
 <style>
-body{background:""" + BG + """;color:""" + TEXT + """;font-family:sans-serif;display:flex;align-items:center;justify-content:center;height:100vh;margin:0}
+""" + _CSS_VARS + """
+body{background:var(--bg);color:var(--text);font-family:sans-serif;display:flex;align-items:center;justify-content:center;height:100vh;margin:0}
 .box{text-align:center;padding:40px}
-h2{color:""" + ACCENT + """;margin-bottom:12px}
+h2{color:var(--accent);margin-bottom:12px}
 </style></head><body>
 <div class="box">
 <h2>Payment Successful!</h2>
@@ -155,23 +406,24 @@ DIRECTORY_HTML = """
 <meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Power FM LIVE</title>
 <style>
+""" + _CSS_VARS + """
 *{margin:0;padding:0;box-sizing:border-box}
-body{background:""" + BG + """;color:""" + TEXT + """;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
+body{background:var(--bg);color:var(--text);font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
 .container{max-width:960px;margin:0 auto;padding:20px}
-h1{font-size:28px;margin-bottom:6px;color:""" + ACCENT + """}
-.subtitle{color:""" + MUTED + """;margin-bottom:24px;font-size:15px}
-.stream-card{background:""" + PANEL + """;border-radius:12px;padding:20px;margin-bottom:16px;border-left:4px solid """ + ACCENT + """;cursor:pointer;transition:transform .15s,box-shadow .15s}
+h1{font-size:28px;margin-bottom:6px;color:var(--accent)}
+.subtitle{color:var(--muted);margin-bottom:24px;font-size:15px}
+.stream-card{background:var(--panel);border-radius:12px;padding:20px;margin-bottom:16px;border-left:4px solid var(--accent);cursor:pointer;transition:transform .15s,box-shadow .15s}
 .stream-card:hover{transform:translateY(-2px);box-shadow:0 6px 20px rgba(233,69,96,.2)}
 .stream-card h3{font-size:18px;margin-bottom:4px}
-.stream-card .meta{color:""" + MUTED + """;font-size:13px;display:flex;gap:16px;margin-top:8px}
-.stream-card .live-badge{background:""" + ACCENT + """;color:#fff;padding:2px 10px;border-radius:12px;font-size:12px;font-weight:700;letter-spacing:1px;animation:pulse 2s infinite}
+.stream-card .meta{color:var(--muted);font-size:13px;display:flex;gap:16px;margin-top:8px}
+.stream-card .live-badge{background:var(--accent);color:#fff;padding:2px 10px;border-radius:12px;font-size:12px;font-weight:700;letter-spacing:1px;animation:pulse 2s infinite}
 @keyframes pulse{0%,100%{opacity:1}50%{opacity:.6}}
-.empty{text-align:center;padding:60px 20px;color:""" + MUTED + """}
+.empty{text-align:center;padding:60px 20px;color:var(--muted)}
 .empty h2{margin-bottom:10px}
-.btn-broadcast{display:inline-block;background:""" + ACCENT + """;color:#fff;padding:12px 28px;border-radius:10px;text-decoration:none;font-weight:700;font-size:16px;transition:transform .15s}
+.btn-broadcast{display:inline-block;background:var(--accent);color:#fff;padding:12px 28px;border-radius:10px;text-decoration:none;font-weight:700;font-size:16px;transition:transform .15s}
 .btn-broadcast:hover{transform:scale(1.05)}
 .section-title{font-size:20px;margin:32px 0 16px;color:#ccc;border-bottom:1px solid #333;padding-bottom:8px}
-a{color:""" + ACCENT + """;text-decoration:none}
+a{color:var(--accent);text-decoration:none}
 </style>
 </head>
 <body>
@@ -182,57 +434,114 @@ a{color:""" + ACCENT + """;text-decoration:none}
         <a href="/live/broadcast" class="btn-broadcast">Start Broadcasting</a>
     </div>
 
-    <div id="live-streams"></div>
-    <div id="recent-streams"></div>
+    <div id="live-streams">
+        <h2 class="section-title" id="live-title" hidden>Live Now</h2>
+        <div id="live-list"></div>
+        <div class="empty" id="live-empty" hidden><h2>No live streams right now</h2><p>Check back soon or start your own broadcast!</p></div>
+    </div>
+    <div id="recent-streams" hidden>
+        <h2 class="section-title">Recent Broadcasts</h2>
+        <div id="recent-list"></div>
+    </div>
+    <template id="live-card-tpl"><a style="text-decoration:none;color:inherit"><div class="stream-card"><div style="display:flex;justify-content:space-between;align-items:center"><h3></h3><span class="live-badge">LIVE</span></div><div class="meta"><span></span><span></span><span></span></div></div></a></template>
+    <template id="recent-card-tpl"><div class="stream-card" style="border-left-color:#555;cursor:default"><h3></h3><div class="meta"><span></span><span></span><span></span></div></div></template>
 </div>
+""" + _SOCKETIO_SCRIPT + """
 <script>
+let streams = [];
+
 async function loadStreams() {
     try {
         const res = await fetch('/api/livestream/streams');
         const data = await res.json();
-        const liveDiv = document.getElementById('live-streams');
-        const recentDiv = document.getElementById('recent-streams');
-
-        const live = (data.streams || []).filter(s => s.status === 'live');
-        const recent = (data.streams || []).filter(s => s.status === 'ended');
-
-        if (live.length > 0) {
-            liveDiv.innerHTML = '<h2 class="section-title">Live Now</h2>' +
-                live.map(s => `
-                    <a href="/live/${s.id}" style="text-decoration:none;color:inherit">
-                    <div class="stream-card">
-                        <div style="display:flex;justify-content:space-between;align-items:center">
-                            <h3>${s.title}</h3>
-                            <span class="live-badge">LIVE</span>
-                        </div>
-                        <div class="meta">
-                            <span>DJ ${s.host_name}</span>
-                            <span>${s.listener_count || 0} listeners</span>
-                            <span>${s.stream_type || 'audio'}</span>
-                        </div>
-                    </div></a>
-                `).join('');
-        } else {
-            liveDiv.innerHTML = '<div class="empty"><h2>No live streams right now</h2><p>Check back soon or start your own broadcast!</p></div>';
-        }
+        streams = data.streams || [];
+        renderStreams();
+    } catch(e) { console.error('Failed to load streams:', e); }
+}
 
-        if (recent.length > 0) {
-            recentDiv.innerHTML = '<h2 class="section-title">Recent Broadcasts</h2>' +
-                recent.slice(0, 10).map(s => `
-                    <div class="stream-card" style="border-left-color:#555;cursor:default">
-                        <h3>${s.title}</h3>
-                        <div class="meta">
-                            <span>DJ ${s.host_name}</span>
-                            <span>${s.ended_at ? new Date(s.ended_at).toLocaleDateString() : ''}</span>
-                            <span>Peak: ${s.max_listeners || 0} listeners</span>
-                        </div>
-                    </div>
-                `).join('');
+// Server pushes {op: 'upsert', stream} on go-live, listener changes and end
+function applyPatch(patch) {
+    if (patch.op !== 'upsert') return;
+    const i = streams.findIndex(s => s.id === patch.stream.id);
+    if (i >= 0 && streams[i].status === patch.stream.status) {
+        Object.assign(streams[i], patch.stream);
+    } else {
+        const s = i >= 0 ? Object.assign(streams.splice(i, 1)[0], patch.stream) : patch.stream;
+        streams.unshift(s);
+    }
+    renderStreams();
+}
+
+// Cards are cloned from <template>s only when a list grows; every push just
+// patches the text that changed. Names and titles go in as textContent.
+const DOM = {
+    liveTitle: document.getElementById('live-title'),
+    liveList: document.getElementById('live-list'),
+    liveEmpty: document.getElementById('live-empty'),
+    liveTpl: document.getElementById('live-card-tpl'),
+    recent: document.getElementById('recent-streams'),
+    recentList: document.getElementById('recent-list'),
+    recentTpl: document.getElementById('recent-card-tpl'),
+};
+
+function setText(el, text) {
+    if (el.textContent !== text) el.textContent = text;
+}
+
+function syncCards(list, tpl, items, fill) {
+    while (list.children.length > items.length) list.lastElementChild.remove();
+    if (list.children.length < items.length) {
+        const frag = document.createDocumentFragment();
+        for (let i = list.children.length; i < items.length; i++) {
+            frag.appendChild(tpl.content.firstElementChild.cloneNode(true));
         }
-    } catch(e) { console.error('Failed to load streams:', e); }
+        list.appendChild(frag);
+    }
+    items.forEach((s, i) => fill(list.children[i], s));
+}
+
+function fillLiveCard(link, s) {
+    const href = '/live/' + s.id;
+    if (link.getAttribute('href') !== href) link.setAttribute('href', href);
+    const [head, meta] = link.firstElementChild.children;
+    setText(head.firstElementChild, s.title);
+    setText(meta.children[0], 'DJ ' + s.host_name);
+    setText(meta.children[1], (s.listener_count || 0) + ' listeners');
+    setText(meta.children[2], s.stream_type || 'audio');
+}
+
+function fillRecentCard(card, s) {
+    const [title, meta] = card.children;
+    setText(title, s.title);
+    setText(meta.children[0], 'DJ ' + s.host_name);
+    setText(meta.children[1], s.ended_at ? new Date(s.ended_at).toLocaleDateString() : '');
+    setText(meta.children[2], 'Peak: ' + (s.max_listeners || 0) + ' listeners');
+}
+
+function renderStreams() {
+    const live = streams.filter(s => s.status === 'live');
+    const recent = streams.filter(s => s.status === 'ended').slice(0, 10);
+
+    DOM.liveTitle.hidden = live.length === 0;
+    DOM.liveEmpty.hidden = live.length > 0;
+    syncCards(DOM.liveList, DOM.liveTpl, live, fillLiveCard);
+
+    DOM.recent.hidden = recent.length === 0;
+    syncCards(DOM.recentList, DOM.recentTpl, recent, fillRecentCard);
 }
-loadStreams();
-setInterval(loadStreams, 15000);
+
+// Full list on load (even if the socket never connects) and again on every
+// (re)connect, then incremental pushes instead of polling
+document.addEventListener('DOMContentLoaded', () => {
+    loadStreams();
+    if (typeof io === 'undefined') return;
+    const socket = io({ transports: ['websocket'], upgrade: false, reconnectionDelayMax: 2000 });
+    socket.on('connect', () => {
+        socket.emit('join-directory');
+        loadStreams();
+    });
+    socket.on('directory-updated', applyPatch);
+});
 </script>
 </body>
 </html>
@@ -245,58 +554,58 @@ BROADCAST_HTML = """
 <head>
 <meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Power FM — Go Live</title>
-<script src="/static/js/mediasoup-client.bundle.js"></script>
-<script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.4/socket.io.min.js"></script>
+""" + _MEDIA_SCRIPT_PRELOADS + """
 <style>
+""" + _CSS_VARS + """
 *{margin:0;padding:0;box-sizing:border-box}
-body{background:""" + BG + """;color:""" + TEXT + """;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
+body{background:var(--bg);color:var(--text);font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
 .container{max-width:800px;margin:0 auto;padding:20px}
-h1{font-size:24px;margin-bottom:20px;color:""" + ACCENT + """}
-.panel{background:""" + PANEL + """;border-radius:12px;padding:20px;margin-bottom:16px}
-label{display:block;color:""" + MUTED + """;font-size:13px;margin-bottom:6px;font-weight:600}
-input,select,textarea{width:100%;padding:10px 14px;background:#0d1b36;border:1px solid #333;border-radius:8px;color:""" + TEXT + """;font-size:14px;margin-bottom:12px}
-input:focus,select:focus,textarea:focus{outline:none;border-color:""" + ACCENT + """}
+h1{font-size:24px;margin-bottom:20px;color:var(--accent)}
+.panel{background:var(--panel);border-radius:12px;padding:20px;margin-bottom:16px}
+label{display:block;color:var(--muted);font-size:13px;margin-bottom:6px;font-weight:600}
+input,select,textarea{width:100%;padding:10px 14px;background:#0d1b36;border:1px solid #333;border-radius:8px;color:var(--text);font-size:14px;margin-bottom:12px}
+input:focus,select:focus,textarea:focus{outline:none;border-color:var(--accent)}
 .btn{padding:12px 28px;border-radius:10px;border:none;font-weight:700;font-size:16px;cursor:pointer;transition:all .15s}
-.btn-go{background:""" + ACCENT + """;color:#fff}.btn-go:hover{transform:scale(1.05)}
+.btn-go{background:var(--accent);color:#fff}.btn-go:hover{transform:scale(1.05)}
 .btn-stop{background:#c0392b;color:#fff}.btn-stop:hover{background:#e74c3c}
 .btn-mute{background:#555;color:#fff;padding:8px 16px;font-size:13px}
-.btn-mute.active{background:""" + ACCENT + """}
+.btn-mute.active{background:var(--accent)}
 #status{padding:10px;border-radius:8px;margin-bottom:16px;font-weight:600;text-align:center;display:none}
-.status-live{background:rgba(233,69,96,.2);color:""" + ACCENT + """;display:block!important}
+.status-live{background:rgba(233,69,96,.2);color:var(--accent);display:block!important}
 .status-error{background:rgba(231,76,60,.2);color:#e74c3c;display:block!important}
 .status-ready{background:rgba(46,204,113,.15);color:#2ecc71;display:block!important}
 
 /* Self-view video */
-.self-view-container{position:fixed;top:80px;right:20px;width:320px;z-index:1000;border-radius:12px;overflow:hidden;background:#000;box-shadow:0 8px 32px rgba(0,0,0,.5);border:2px solid """ + ACCENT + """}
+.self-view-container{position:fixed;top:80px;right:20px;width:320px;z-index:1000;border-radius:12px;overflow:hidden;background:#000;box-shadow:0 8px 32px rgba(0,0,0,.5);border:2px solid var(--accent)}
 .self-view-container video{width:100%;display:block}
 .self-view-container .self-view-label{position:absolute;bottom:8px;left:8px;background:rgba(0,0,0,.7);color:#fff;padding:2px 8px;border-radius:4px;font-size:11px;font-weight:600}
 .self-view-container .self-view-close{position:absolute;top:6px;right:6px;background:rgba(0,0,0,.6);color:#fff;border:none;border-radius:50%;width:24px;height:24px;cursor:pointer;font-size:14px;line-height:24px;text-align:center}
-.self-view-container .self-view-audio-bar{position:absolute;bottom:0;left:0;right:0;height:4px;background:#333}
-.self-view-container .self-view-audio-fill{height:100%;background:linear-gradient(90deg,#2ecc71,""" + ACCENT + """);width:0%;transition:width 50ms}
+.self-view-container .self-view-audio-bar{position:absolute;bottom:0;left:0;right:0;height:4px;background:#333;contain:strict}
+.self-view-container .self-view-audio-fill{height:100%;background:linear-gradient(90deg,#2ecc71,var(--accent));width:100%;transform-origin:left;transform:scaleX(0);will-change:transform;transition:transform 50ms}
 
 /* Audio-only waveform canvas */
 .self-view-container canvas#self-view-waveform{width:100%;height:180px;display:none}
 
-/* Mic level meter */
-.mic-meter{height:6px;background:#333;border-radius:3px;margin-top:4px;overflow:hidden}
-.mic-meter-fill{height:100%;background:linear-gradient(90deg,#2ecc71,#e94560);width:0%;transition:width 50ms}
+/* Mic level meter (scaled on the compositor; no layout per update) */
+.mic-meter{height:6px;background:#333;border-radius:3px;margin-top:4px;overflow:hidden;contain:strict}
+.mic-meter-fill{height:100%;background:linear-gradient(90deg,#2ecc71,#e94560);width:100%;transform-origin:left;transform:scaleX(0);will-change:transform;transition:transform 50ms}
 
 /* Chat */
 .chat-box{height:250px;overflow-y:auto;background:#0d1b36;border-radius:8px;padding:10px;margin-bottom:10px}
-.chat-msg{margin-bottom:6px;font-size:13px}.chat-msg .name{color:""" + ACCENT + """;font-weight:700}
-.chat-msg .tipper-badge{background:""" + ACCENT + """;color:#fff;padding:1px 5px;border-radius:4px;font-size:10px;font-weight:700;margin-right:4px}
+.chat-msg{margin-bottom:6px;font-size:13px}.chat-msg .name{color:var(--accent);font-weight:700}
+.chat-msg .tipper-badge{background:var(--accent);color:#fff;padding:1px 5px;border-radius:4px;font-size:10px;font-weight:700;margin-right:4px}
 .chat-input-row{display:flex;gap:8px}
 .chat-input-row input{flex:1;margin-bottom:0}
-.chat-input-row button{padding:8px 16px;background:""" + ACCENT + """;color:#fff;border:none;border-radius:8px;font-weight:700;cursor:pointer}
+.chat-input-row button{padding:8px 16px;background:var(--accent);color:#fff;border:none;border-radius:8px;font-weight:700;cursor:pointer}
 
 .controls{display:flex;gap:10px;align-items:center;flex-wrap:wrap;margin-top:12px}
-.listener-count{color:""" + MUTED + """;font-size:14px}
+.listener-count{color:var(--muted);font-size:14px}
 
 /* Guest Queue */
 .queue-item{display:flex;justify-content:space-between;align-items:center;padding:10px;background:#0d1b36;border-radius:8px;margin-bottom:8px}
 .queue-item .qi-info{flex:1}
 .queue-item .qi-name{font-weight:700;font-size:14px}
-.queue-item .qi-tier{color:""" + MUTED + """;font-size:12px}
+.queue-item .qi-tier{color:var(--muted);font-size:12px}
 .queue-item .qi-actions{display:flex;gap:6px}
 .btn-sm{padding:6px 14px;border-radius:6px;border:none;font-weight:700;font-size:12px;cursor:pointer}
 .btn-approve{background:#2ecc71;color:#fff}
@@ -306,7 +615,7 @@ input:focus,select:focus,textarea:focus{outline:none;border-color:""" + ACCENT +
 /* Active guest */
 .active-guest-bar{display:flex;align-items:center;gap:12px;padding:12px;background:rgba(233,69,96,.15);border-radius:8px;margin-bottom:12px}
 .active-guest-bar .ag-name{font-weight:700;font-size:15px}
-.active-guest-bar .ag-timer{font-family:'SF Mono',Consolas,monospace;font-variant-numeric:tabular-nums;font-size:18px;color:""" + ACCENT + """;font-weight:700}
+.active-guest-bar .ag-timer{font-family:'SF Mono',Consolas,monospace;font-variant-numeric:tabular-nums;font-size:18px;color:var(--accent);font-weight:700}
 .active-guest-bar .ag-spacer{flex:1}
 
 /* Tip overlay */
@@ -317,10 +626,10 @@ input:focus,select:focus,textarea:focus{outline:none;border-color:""" + ACCENT +
 /* Leaderboard */
 .lb-list{list-style:none}
 .lb-list li{display:flex;align-items:center;gap:10px;padding:6px 0;font-size:14px;border-bottom:1px solid #1a1a2e}
-.lb-rank{width:24px;text-align:center;font-weight:700;color:""" + MUTED + """}
+.lb-rank{width:24px;text-align:center;font-weight:700;color:var(--muted)}
 .lb-rank.gold{color:#ffd700}.lb-rank.silver{color:#c0c0c0}.lb-rank.bronze{color:#cd7f32}
 .lb-name{flex:1}
-.lb-amount{font-weight:700;color:""" + ACCENT + """}
+.lb-amount{font-weight:700;color:var(--accent)}
 </style>
 </head>
 <body>
@@ -371,19 +680,22 @@ input:focus,select:focus,textarea:focus{outline:none;border-color:""" + ACCENT +
 
         <!-- Guest Queue -->
         <div id="guest-queue-panel" class="panel" style="display:none">
-            <h3 style="margin-bottom:10px">Guest Queue <span id="queue-count" style="color:""" + MUTED + """;font-size:13px;font-weight:400"></span></h3>
+            <h3 style="margin-bottom:10px">Guest Queue <span id="queue-count" style="color:var(--muted);font-size:13px;font-weight:400"></span></h3>
             <div id="guest-queue-list"></div>
+            <template id="queue-item-tpl"><div class="queue-item"><div class="qi-info"><div class="qi-name"></div><div class="qi-tier"></div></div><div class="qi-actions"><button class="btn-sm btn-approve">Approve</button><button class="btn-sm btn-reject">Reject</button></div></div></template>
         </div>
 
         <!-- Leaderboard -->
         <div id="dj-leaderboard-panel" class="panel" style="display:none">
-            <h3 style="margin-bottom:10px">Tip Leaderboard <span id="dj-total-tips" style="color:""" + ACCENT + """;font-size:14px;font-weight:400;margin-left:8px"></span></h3>
+            <h3 style="margin-bottom:10px">Tip Leaderboard <span id="dj-total-tips" style="color:var(--accent);font-size:14px;font-weight:400;margin-left:8px"></span></h3>
             <ul class="lb-list" id="dj-lb-list"></ul>
+            <template id="lb-item-tpl"><li><span class="lb-rank"></span><span class="lb-name"></span><span class="lb-amount"></span></li></template>
         </div>
 
         <div class="panel">
             <h3 style="margin-bottom:10px">Chat</h3>
             <div class="chat-box" id="chat-box"></div>
+            <template id="chat-msg-tpl"><div class="chat-msg"><span class="tipper-badge" hidden>Tipper</span><span class="name"></span> <span class="msg"></span></div></template>
             <div class="chat-input-row">
                 <input id="chat-input" type="text" placeholder="Type a message..." onkeydown="if(event.key==='Enter')sendChat()">
                 <button onclick="sendChat()">Send</button>
@@ -418,9 +730,41 @@ let peerId = null;
 let micMuted = false;
 let camOff = false;
 let audioContext = null;
+let micSource = null;
 let analyser = null;
+let meterTimer = null;
 let selfViewVisible = true;
 
+// Elements touched by the live-panel event handlers, resolved once. This
+// script runs at the end of <body>, so they all exist already.
+const DOM = {
+    setupPanel: document.getElementById('setup-panel'),
+    livePanel: document.getElementById('live-panel'),
+    btnGoLive: document.getElementById('btn-go-live'),
+    status: document.getElementById('status'),
+    listenerCount: document.getElementById('listener-count'),
+    chatBox: document.getElementById('chat-box'),
+    chatTpl: document.getElementById('chat-msg-tpl'),
+    micMeter: document.getElementById('mic-meter'),
+    btnMute: document.getElementById('btn-mute'),
+    btnCam: document.getElementById('btn-cam'),
+    hostName: document.getElementById('host-name'),
+    chatInput: document.getElementById('chat-input'),
+    waveform: document.getElementById('self-view-waveform'),
+    tipOverlay: document.getElementById('tip-overlay'),
+    queuePanel: document.getElementById('guest-queue-panel'),
+    queueList: document.getElementById('guest-queue-list'),
+    queueCount: document.getElementById('queue-count'),
+    queueTpl: document.getElementById('queue-item-tpl'),
+    agPanel: document.getElementById('active-guest-panel'),
+    agName: document.getElementById('ag-name'),
+    agTimer: document.getElementById('ag-timer'),
+    lbPanel: document.getElementById('dj-leaderboard-panel'),
+    lbList: document.getElementById('dj-lb-list'),
+    lbTotal: document.getElementById('dj-total-tips'),
+    lbTpl: document.getElementById('lb-item-tpl'),
+};
+
 // --- Go Live ---
 async function goLive() {
     const title = document.getElementById('stream-title').value.trim() || 'Power FM Live';
@@ -429,7 +773,7 @@ async function goLive() {
     const desc = document.getElementById('stream-desc').value.trim();
 
     setStatus('Requesting media access...', 'ready');
-    document.getElementById('btn-go-live').disabled = true;
+    DOM.btnGoLive.disabled = true;
 
     try {
         // Get media
@@ -446,7 +790,8 @@ async function goLive() {
         setupMicMeter(localStream);
 
         // Connect Socket.IO
-        socket = io({ transports: ['websocket', 'polling'] });
+        socket = io({ transports: ['websocket'], upgrade: false, reconnectionDelayMax: 2000 });
+        attachRequestRouter();
 
         socket.on('connect', () => {
             peerId = 'host-' + Date.now();
@@ -464,8 +809,8 @@ async function goLive() {
             roomId = data.roomId;
 
             setStatus('LIVE — ' + title, 'live');
-            document.getElementById('setup-panel').style.display = 'none';
-            document.getElementById('live-panel').style.display = 'block';
+            DOM.setupPanel.style.display = 'none';
+            DOM.livePanel.style.display = 'block';
             document.getElementById('live-title').textContent = title;
 
             if (streamType === 'audio+video') {
@@ -489,27 +834,23 @@ async function goLive() {
                     });
 
                     sendTransport.on('connect', ({ dtlsParameters }, callback, errback) => {
-                        socket.emit('connect-transport', {
+                        sfuRequest('connect-transport', {
                             transportId: sendTransport.id,
                             dtlsParameters: dtlsParameters,
                             roomId: roomId,
                             peerId: peerId
-                        });
-                        socket.once('transport-connected', () => callback());
-                        socket.once('transport-connect-error', (err) => errback(new Error(err.message)));
+                        }).then(() => callback(), errback);
                     });
 
                     sendTransport.on('produce', ({ kind, rtpParameters, appData }, callback, errback) => {
-                        socket.emit('produce', {
+                        sfuRequest('produce', {
                             transportId: sendTransport.id,
                             kind: kind,
                             rtpParameters: rtpParameters,
                             appData: appData,
                             roomId: roomId,
                             peerId: peerId
-                        });
-                        socket.once('produced', (data) => callback({ id: data.producerId }));
-                        socket.once('produce-error', (err) => errback(new Error(err.message)));
+                        }).then((d) => callback({ id: d.producerId }), errback);
                     });
 
                     // Produce audio
@@ -533,12 +874,12 @@ async function goLive() {
 
         socket.on('listener-joined', (data) => {
             updateListenerCount(data.listenerCount);
-            appendChat('System', data.name + ' joined');
+            queuePresence(data.name, true);
         });
 
         socket.on('listener-left', (data) => {
             updateListenerCount(data.listenerCount);
-            appendChat('System', data.name + ' left');
+            queuePresence(data.name, false);
         });
 
         socket.on('chat-message', (data) => {
@@ -551,7 +892,7 @@ async function goLive() {
 
         socket.on('connect_error', (err) => {
             setStatus('Connection error: ' + err.message, 'error');
-            document.getElementById('btn-go-live').disabled = false;
+            DOM.btnGoLive.disabled = false;
         });
 
         // --- Spotlight events for DJ ---
@@ -578,33 +919,63 @@ async function goLive() {
         });
 
         socket.on('leaderboard-update', (data) => {
-            renderLeaderboard(data.leaderboard, data.total_cents);
+            scheduleLeaderboard(data);
+        });
+
+        // Coalesced server events: [[event, data], ...]
+        socket.on('batch', (events) => {
+            events.forEach(([event, data]) => {
+                socket.listeners(event).forEach(fn => fn(data));
+            });
         });
 
     } catch(e) {
         setStatus('Error: ' + e.message, 'error');
-        document.getElementById('btn-go-live').disabled = false;
+        DOM.btnGoLive.disabled = false;
     }
 }
 
 // --- Guest Queue (DJ view) ---
+// Lists are patched in place: rows are cloned from a <template> only when the
+// list grows, and existing rows just get their changed text updated.
+function syncRows(list, tpl, n, init) {
+    while (list.children.length > n) list.lastElementChild.remove();
+    while (list.children.length < n) {
+        const row = tpl.content.firstElementChild.cloneNode(true);
+        init(row, list.children.length);
+        list.appendChild(row);
+    }
+    return list.children;
+}
+function setText(el, text) {
+    if (el.textContent !== text) el.textContent = text;
+}
+
+const LB_ICONS = ['gold', 'silver', 'bronze'];
+const LB_MEDALS = [0x1F451, 0x1F948, 0x1F949].map(c => String.fromCodePoint(c));
+function initLbRow(row, i) {
+    const rank = row.children[0];
+    if (i < 3) rank.classList.add(LB_ICONS[i]);
+    rank.textContent = i < 3 ? LB_MEDALS[i] : String(i + 1);
+}
+
+function initQueueRow(row, i) {
+    row.querySelector('.btn-approve').onclick = () => approveGuest(i);
+    row.querySelector('.btn-reject').onclick = () => rejectGuest(i);
+}
+
 function renderGuestQueue(queue) {
-    const panel = document.getElementById('guest-queue-panel');
-    const list = document.getElementById('guest-queue-list');
-    const count = document.getElementById('queue-count');
     if (!queue || queue.length === 0) {
-        panel.style.display = 'none';
+        DOM.queuePanel.style.display = 'none';
         return;
     }
-    panel.style.display = 'block';
-    count.textContent = '(' + queue.length + ')';
-    list.innerHTML = queue.map((g, i) => '<div class="queue-item">' +
-        '<div class="qi-info"><div class="qi-name">' + escHtml(g.name) + '</div>' +
-        '<div class="qi-tier">' + escHtml(g.tier) + ' — $' + (g.price / 100).toFixed(2) + '</div></div>' +
-        '<div class="qi-actions">' +
-        '<button class="btn-sm btn-approve" onclick="approveGuest(' + i + ')">Approve</button>' +
-        '<button class="btn-sm btn-reject" onclick="rejectGuest(' + i + ')">Reject</button>' +
-        '</div></div>').join('');
+    DOM.queuePanel.style.display = 'block';
+    DOM.queueCount.textContent = '(' + queue.length + ')';
+    const rows = syncRows(DOM.queueList, DOM.queueTpl, queue.length, initQueueRow);
+    queue.forEach((g, i) => {
+        setText(rows[i].querySelector('.qi-name'), g.name);
+        setText(rows[i].querySelector('.qi-tier'), g.tier + ' — $' + (g.price / 100).toFixed(2));
+    });
 }
 
 function approveGuest(index) {
@@ -624,44 +995,59 @@ function endSpotlight() {
 }
 
 function showActiveGuest(name, duration) {
-    document.getElementById('active-guest-panel').style.display = 'block';
-    document.getElementById('ag-name').textContent = name;
+    DOM.agPanel.style.display = 'block';
+    DOM.agName.textContent = name;
     updateGuestTimer(duration);
 }
+// "M:SS" strings are memoised per second, and the element is only written when
+// the text changes, so repeated or sub-second ticks cost nothing
+const TIMER_TEXT = [];
+function timerText(remaining) {
+    return TIMER_TEXT[remaining] || (TIMER_TEXT[remaining] =
+        Math.floor(remaining / 60) + ':' + String(remaining % 60).padStart(2, '0'));
+}
 function updateGuestTimer(remaining) {
-    const m = Math.floor(remaining / 60);
-    const s = remaining % 60;
-    document.getElementById('ag-timer').textContent = m + ':' + String(s).padStart(2, '0');
+    setText(DOM.agTimer, timerText(remaining));
 }
 function hideActiveGuest() {
-    document.getElementById('active-guest-panel').style.display = 'none';
+    DOM.agPanel.style.display = 'none';
 }
 
 // --- Tips & Leaderboard ---
+// Bubbles are recycled round-robin from a fixed pool (grown on first use)
+// instead of creating and removing a node for every tip.
+const TIP_POOL_SIZE = 32;
+const tipPool = [];
+let tipPoolNext = 0;
+
 function showTipBubble(name, cents) {
-    const overlay = document.getElementById('tip-overlay');
-    const bubble = document.createElement('div');
-    bubble.className = 'tip-bubble';
+    let bubble = tipPool[tipPoolNext];
+    if (!bubble) {
+        bubble = tipPool[tipPoolNext] = document.createElement('div');
+        bubble.className = 'tip-bubble';
+        bubble.addEventListener('animationend', () => { bubble.style.display = 'none'; });
+        DOM.tipOverlay.appendChild(bubble);
+    }
+    tipPoolNext = (tipPoolNext + 1) % TIP_POOL_SIZE;
     const scale = Math.min(2, 0.8 + (cents / 2000));
     bubble.style.fontSize = (14 * scale) + 'px';
     bubble.textContent = name + ' $' + (cents / 100).toFixed(2);
-    overlay.appendChild(bubble);
-    setTimeout(() => bubble.remove(), 3200);
+    // Restart the float animation (a reflow in between makes it replay)
+    bubble.style.animation = 'none';
+    bubble.style.display = '';
+    void bubble.offsetWidth;
+    bubble.style.animation = '';
 }
 
 function renderLeaderboard(lb, totalCents) {
-    const panel = document.getElementById('dj-leaderboard-panel');
-    const list = document.getElementById('dj-lb-list');
-    const total = document.getElementById('dj-total-tips');
-    if (!lb || lb.length === 0) { panel.style.display = 'none'; return; }
-    panel.style.display = 'block';
-    total.textContent = '$' + (totalCents / 100).toFixed(2) + ' total';
-    const icons = ['gold', 'silver', 'bronze'];
-    const medals = ['&#128081;', '&#129352;', '&#129353;'];
-    list.innerHTML = lb.map((entry, i) => '<li>' +
-        '<span class="lb-rank ' + (icons[i] || '') + '">' + (i < 3 ? medals[i] : (i + 1)) + '</span>' +
-        '<span class="lb-name">' + escHtml(entry[0]) + '</span>' +
-        '<span class="lb-amount">$' + (entry[1] / 100).toFixed(2) + '</span></li>').join('');
+    if (!lb || lb.length === 0) { DOM.lbPanel.style.display = 'none'; return; }
+    DOM.lbPanel.style.display = 'block';
+    DOM.lbTotal.textContent = '$' + (totalCents / 100).toFixed(2) + ' total';
+    const rows = syncRows(DOM.lbList, DOM.lbTpl, lb.length, initLbRow);
+    lb.forEach((entry, i) => {
+        setText(rows[i].children[1], entry[0]);
+        setText(rows[i].children[2], '$' + (entry[1] / 100).toFixed(2));
+    });
 }
 
 // --- Self-View ---
@@ -687,54 +1073,182 @@ function setupSelfView(stream, streamType) {
     }
 }
 
+// --- Request/response over Socket.IO ---
+// One persistent handler per reply event settles the matching request by reqId,
+// instead of a socket.once() pair registered for every connect/produce call.
+const pendingRequests = new Map();
+let lastReqId = 0;
+
+function sfuRequest(event, payload) {
+    return new Promise((resolve, reject) => {
+        const reqId = ++lastReqId;
+        pendingRequests.set(reqId, { resolve, reject });
+        socket.emit(event, Object.assign({ reqId }, payload));
+    });
+}
+
+function settleRequest(failed) {
+    return (data) => {
+        const req = pendingRequests.get(data.reqId);
+        if (!req) return;
+        pendingRequests.delete(data.reqId);
+        if (failed) req.reject(new Error(data.message));
+        else req.resolve(data);
+    };
+}
+
+function attachRequestRouter() {
+    for (const [ok, fail] of [['transport-connected', 'transport-connect-error'],
+                              ['produced', 'produce-error'],
+                              ['consumed', 'consume-error']]) {
+        socket.on(ok, settleRequest(false));
+        socket.on(fail, settleRequest(true));
+    }
+}
+
+// Self-view level meter: an AudioWorklet posts one RMS value every 50 ms from
+// the audio thread, so the page never runs an FFT just to draw a volume bar.
+// Loaded from a Blob so no extra static file is needed.
+const RMS_METER_WORKLET = `
+class RmsMeter extends AudioWorkletProcessor {
+    constructor() { super(); this.sum = 0; this.n = 0; }
+    process(inputs) {
+        const ch = inputs[0] && inputs[0][0];
+        if (ch) {
+            for (let i = 0; i < ch.length; i++) this.sum += ch[i] * ch[i];
+            this.n += ch.length;
+            if (this.n >= sampleRate / 20) {
+                this.port.postMessage(Math.sqrt(this.sum / this.n));
+                this.sum = 0;
+                this.n = 0;
+            }
+        }
+        return true;
+    }
+}
+registerProcessor('rms-meter', RmsMeter);
+`;
+
+// Every meter and the waveform tap the same AudioContext and source node
+function getMicSource(stream) {
+    if (!audioContext) audioContext = new (window.AudioContext || window.webkitAudioContext)();
+    if (!micSource) micSource = audioContext.createMediaStreamSource(stream);
+    return micSource;
+}
+
 function startSelfViewAudioMeter(stream) {
-    const actx = new (window.AudioContext || window.webkitAudioContext)();
-    const src = actx.createMediaStreamSource(stream);
+    const src = getMicSource(stream);
+    const actx = audioContext;
+    const fill = document.getElementById('self-view-audio-fill');
+    const show = (pct) => { if (selfViewVisible && !document.hidden) fill.style.transform = 'scaleX(' + Math.min(1, pct / 100) + ')'; };
+
+    if (!actx.audioWorklet) { startAnalyserMeter(actx, src, show); return; }
+    const url = URL.createObjectURL(new Blob([RMS_METER_WORKLET], { type: 'application/javascript' }));
+    actx.audioWorklet.addModule(url).then(() => {
+        const node = new AudioWorkletNode(actx, 'rms-meter', { numberOfOutputs: 0 });
+        node.port.onmessage = (e) => show(e.data * 400);
+        src.connect(node);
+    }).catch(() => startAnalyserMeter(actx, src, show))
+      .finally(() => URL.revokeObjectURL(url));
+}
+
+// Fallback for browsers without AudioWorklet
+function startAnalyserMeter(actx, src, show) {
     const a = actx.createAnalyser();
-    a.fftSize = 256;
+    a.fftSize = 32;  // only the average is used, so the smallest FFT will do
     src.connect(a);
     const buf = new Uint8Array(a.frequencyBinCount);
-    const fill = document.getElementById('self-view-audio-fill');
+    const invLen = 1 / buf.length;
 
+    // 20 Hz is plenty for a 4px bar, and nothing is sampled while it is hidden
     function tick() {
-        requestAnimationFrame(tick);
+        setTimeout(tick, 50);
+        if (!selfViewVisible || document.hidden) return;
         a.getByteFrequencyData(buf);
         let sum = 0;
         for (let i = 0; i < buf.length; i++) sum += buf[i];
-        const avg = sum / buf.length;
-        fill.style.width = Math.min(100, (avg / 128) * 100) + '%';
+        const avg = sum * invLen;
+        show((avg / 128) * 100);
     }
     tick();
 }
 
 function drawAudioWaveform(stream, canvas) {
     const ctx = canvas.getContext('2d');
-    const actx = new (window.AudioContext || window.webkitAudioContext)();
-    const src = actx.createMediaStreamSource(stream);
-    const a = actx.createAnalyser();
+    const src = getMicSource(stream);
+    const a = audioContext.createAnalyser();
     a.fftSize = 256;
     src.connect(a);
     const bufLen = a.frequencyBinCount;
     const data = new Uint8Array(bufLen);
 
+    // Frames are written straight into an ImageData buffer and blitted with one
+    // putImageData, bypassing the 2D state machine. Colours are packed once
+    // into 32-bit pixels in the platform's byte order (column = amplitude).
+    const littleEndian = new Uint8Array(new Uint32Array([1]).buffer)[0] === 1;
+    const pack = (r, g, b) => (littleEndian
+        ? (0xFF << 24) | (b << 16) | (g << 8) | r
+        : (r << 24) | (g << 16) | (b << 8) | 0xFF) >>> 0;
+    const BLACK = pack(0, 0, 0);
+    const COLORS = new Uint32Array(256);
+    for (let v = 0; v < 256; v++) COLORS[v] = pack(233, 69 + ((v * 60 / 255) | 0), 96);
+
+    // Assigning canvas.width/height reallocates the backing store even when the
+    // value is unchanged, so only resize after the element itself has changed size
+    const observed = !!window.ResizeObserver;
+    let w = 0, h = 0, barW = 0, sizeDirty = true;
+    let img = null, pixels = null;
+    // Bar height in rows for each amplitude at the current canvas height, rebuilt on resize
+    const barHeights = new Uint16Array(256);
+    if (observed) new ResizeObserver(() => { sizeDirty = true; }).observe(canvas);
+
+    // devicePixelRatio is read once and re-read only when a resolution media
+    // query stops matching (zoom, or the window moving to another display)
+    let dpr = window.devicePixelRatio || 1;
+    function watchDpr() {
+        if (!window.matchMedia) return;
+        matchMedia('(resolution: ' + dpr + 'dppx)').addEventListener('change', () => {
+            dpr = window.devicePixelRatio || 1;
+            sizeDirty = true;
+            watchDpr();
+        }, { once: true });
+    }
+    watchDpr();
+
+    // ~20 fps is enough for a level display; the id lives on the canvas so cleanup() can stop it
     function draw() {
-        requestAnimationFrame(draw);
+        if (!selfViewVisible || document.hidden) return;
         a.getByteFrequencyData(data);
-        const w = canvas.width = canvas.clientWidth * (window.devicePixelRatio || 1);
-        const h = canvas.height = canvas.clientHeight * (window.devicePixelRatio || 1);
-        ctx.fillStyle = '#000';
-        ctx.fillRect(0, 0, w, h);
-        const barW = (w / bufLen) * 2.5;
+        if (sizeDirty || !observed) {
+            const cw = Math.round(canvas.clientWidth * dpr);
+            const ch = Math.round(canvas.clientHeight * dpr);
+            if (cw !== w || ch !== h) {
+                canvas.width = w = cw;
+                canvas.height = h = ch;
+                barW = (w / bufLen) * 2.5;
+                for (let v = 0; v < 256; v++) barHeights[v] = Math.round((v / 255) * h);
+                img = w && h ? ctx.createImageData(w, h) : null;
+                pixels = img && new Uint32Array(img.data.buffer);
+            }
+            sizeDirty = false;
+        }
+        if (!img) return;
+        pixels.fill(BLACK);
         let x = 0;
-        for (let i = 0; i < bufLen; i++) {
-            const barH = (data[i] / 255) * h;
-            const r = 233, g = 69 + Math.floor((data[i] / 255) * 60), b = 96;
-            ctx.fillStyle = 'rgb(' + r + ',' + g + ',' + b + ')';
-            ctx.fillRect(x, h - barH, barW, barH);
+        for (let i = 0; i < bufLen && x < w; i++) {
+            const v = data[i];
+            const x0 = Math.round(x), x1 = Math.min(w, Math.round(x + barW));
             x += barW + 1;
+            if (!v || x1 <= x0) continue;
+            const c = COLORS[v];
+            for (let row = (h - barHeights[v]) * w; row < h * w; row += w) {
+                pixels.fill(c, row + x0, row + x1);
+            }
         }
+        ctx.putImageData(img, 0, 0);
     }
-    draw();
+    clearInterval(canvas.drawTimer);
+    canvas.drawTimer = setInterval(draw, 50);
 }
 
 function toggleSelfView() {
@@ -745,24 +1259,32 @@ function toggleSelfView() {
 
 // --- Mic Meter ---
 function setupMicMeter(stream) {
-    audioContext = new (window.AudioContext || window.webkitAudioContext)();
-    const source = audioContext.createMediaStreamSource(stream);
+    const source = getMicSource(stream);
     analyser = audioContext.createAnalyser();
-    analyser.fftSize = 256;
+    analyser.fftSize = 32;  // only the average is used, so the smallest FFT will do
     source.connect(analyser);
     const dataArray = new Uint8Array(analyser.frequencyBinCount);
-    const meter = document.getElementById('mic-meter');
+    const invLen = 1 / dataArray.length;
+    const meter = DOM.micMeter;
 
+    // Nothing to sample while the tab is hidden, and a muted track reads as silence
+    let zeroed = false;
     function updateMeter() {
-        requestAnimationFrame(updateMeter);
+        if (document.hidden) return;
+        if (micMuted) {
+            if (!zeroed) { meter.style.transform = 'scaleX(0)'; zeroed = true; }
+            return;
+        }
+        zeroed = false;
         analyser.getByteFrequencyData(dataArray);
         let sum = 0;
         for (let i = 0; i < dataArray.length; i++) sum += dataArray[i];
-        const avg = sum / dataArray.length;
+        const avg = sum * invLen;
         const pct = Math.min(100, (avg / 128) * 100);
-        meter.style.width = pct + '%';
+        meter.style.transform = 'scaleX(' + (pct / 100) + ')';
     }
-    updateMeter();
+    clearInterval(meterTimer);
+    meterTimer = setInterval(updateMeter, 50);
 }
 
 // --- Controls ---
@@ -770,32 +1292,34 @@ function toggleMute() {
     if (!localStream) return;
     micMuted = !micMuted;
     localStream.getAudioTracks().forEach(t => t.enabled = !micMuted);
-    const btn = document.getElementById('btn-mute');
+    const btn = DOM.btnMute;
     btn.textContent = micMuted ? 'Unmute Mic' : 'Mute Mic';
     btn.classList.toggle('active', micMuted);
-    if (audioProducer) {
-        if (micMuted) {
-            socket.emit('pause-producer', { producerId: audioProducer.id, roomId, peerId });
-        } else {
-            socket.emit('resume-producer', { producerId: audioProducer.id, roomId, peerId });
-        }
-    }
+    if (audioProducer) syncProducerPaused(audioProducer, micMuted);
 }
 
 function toggleCam() {
     if (!localStream) return;
     camOff = !camOff;
     localStream.getVideoTracks().forEach(t => t.enabled = !camOff);
-    const btn = document.getElementById('btn-cam');
+    const btn = DOM.btnCam;
     btn.textContent = camOff ? 'Camera On' : 'Camera Off';
     btn.classList.toggle('active', camOff);
-    if (videoProducer) {
-        if (camOff) {
-            socket.emit('pause-producer', { producerId: videoProducer.id, roomId, peerId });
-        } else {
-            socket.emit('resume-producer', { producerId: videoProducer.id, roomId, peerId });
-        }
-    }
+    if (videoProducer) syncProducerPaused(videoProducer, camOff);
+}
+
+// The track toggles locally right away; the server is told 50 ms after the
+// last tap, and only if the final state differs from what it already has.
+const producerSync = new Map();  // producerId -> { paused, timer }
+function syncProducerPaused(producer, paused) {
+    let st = producerSync.get(producer.id);
+    if (!st) producerSync.set(producer.id, st = { paused: false, timer: null });
+    clearTimeout(st.timer);
+    st.timer = setTimeout(() => {
+        if (st.paused === paused) return;
+        st.paused = paused;
+        socket.emit(paused ? 'pause-producer' : 'resume-producer', { producerId: producer.id, roomId, peerId });
+    }, 50);
 }
 
 function stopBroadcast() {
@@ -804,9 +1328,9 @@ function stopBroadcast() {
     }
     cleanup();
     setStatus('Broadcast ended', 'ready');
-    document.getElementById('live-panel').style.display = 'none';
-    document.getElementById('setup-panel').style.display = 'block';
-    document.getElementById('btn-go-live').disabled = false;
+    DOM.livePanel.style.display = 'none';
+    DOM.setupPanel.style.display = 'block';
+    DOM.btnGoLive.disabled = false;
     document.getElementById('self-view-container').style.display = 'none';
 }
 
@@ -814,41 +1338,104 @@ function cleanup() {
     if (localStream) { localStream.getTracks().forEach(t => t.stop()); localStream = null; }
     if (sendTransport) { try { sendTransport.close(); } catch(e){} sendTransport = null; }
     if (audioContext) { try { audioContext.close(); } catch(e){} audioContext = null; }
+    micSource = null;
+    clearInterval(meterTimer);
+    meterTimer = null;
+    clearInterval(DOM.waveform.drawTimer);
     audioProducer = null;
     videoProducer = null;
     device = null;
 }
 
 // --- Chat ---
+// Cloned from a <template> and filled with textContent: no HTML parse and
+// no escaping per message
+function chatMessage(name, msg, isTipper) {
+    const div = DOM.chatTpl.content.firstElementChild.cloneNode(true);
+    const [badge, nameSpan, msgSpan] = div.children;
+    badge.hidden = !isTipper;
+    nameSpan.textContent = name + ':';
+    msgSpan.textContent = msg;
+    return div;
+}
+
 function appendChat(name, msg, isTipper) {
-    const box = document.getElementById('chat-box');
-    const div = document.createElement('div');
-    div.className = 'chat-msg';
-    const badge = isTipper ? '<span class="tipper-badge">Tipper</span>' : '';
-    div.innerHTML = badge + '<span class="name">' + escHtml(name) + ':</span> ' + escHtml(msg);
-    box.appendChild(div);
+    const box = DOM.chatBox;
+    box.appendChild(chatMessage(name, msg, isTipper));
     box.scrollTop = box.scrollHeight;
 }
 
+// Appends [name, message] pairs with a single insertion and a single scroll
+function appendChatBatch(messages) {
+    const frag = document.createDocumentFragment();
+    for (const [name, msg] of messages) frag.appendChild(chatMessage(name, msg));
+    DOM.chatBox.appendChild(frag);
+    DOM.chatBox.scrollTop = DOM.chatBox.scrollHeight;
+}
+
 function sendChat() {
-    const input = document.getElementById('chat-input');
+    const input = DOM.chatInput;
     const msg = input.value.trim();
     if (!msg || !socket) return;
-    socket.emit('chat-message', {
-        streamId: streamId,
-        message: msg,
-        name: document.getElementById('host-name').value.trim() || 'DJ'
-    });
-    appendChat(document.getElementById('host-name').value.trim() || 'DJ', msg);
+    const name = DOM.hostName.value.trim() || 'DJ';
+    socket.emit('chat-message', { streamId: streamId, message: msg, name: name });
+    appendChat(name, msg);
     input.value = '';
 }
 
+// Listener counts arrive in bursts when a stream starts; write at most once per frame
+let pendingListenerCount = null;
 function updateListenerCount(n) {
-    document.getElementById('listener-count').textContent = n + ' listener' + (n !== 1 ? 's' : '');
+    const scheduled = pendingListenerCount !== null;
+    pendingListenerCount = n;
+    if (scheduled) return;
+    requestAnimationFrame(() => {
+        const c = pendingListenerCount;
+        pendingListenerCount = null;
+        DOM.listenerCount.textContent = c + ' listener' + (c !== 1 ? 's' : '');
+    });
+}
+
+// Join/leave notices are queued and appended together once per frame. A join
+// and a leave for the same name inside one frame cancel out.
+let pendingPresence = [];
+let presenceScheduled = false;
+function queuePresence(name, joined) {
+    const i = pendingPresence.findIndex(p => p.name === name && p.joined !== joined);
+    if (i >= 0) pendingPresence.splice(i, 1);
+    else pendingPresence.push({ name, joined });
+    if (presenceScheduled) return;
+    presenceScheduled = true;
+    requestAnimationFrame(flushPresence);
+}
+
+function flushPresence() {
+    presenceScheduled = false;
+    if (!pendingPresence.length) return;
+    appendChatBatch(pendingPresence.map(p => ['System', p.name + (p.joined ? ' joined' : ' left')]));
+    pendingPresence = [];
+}
+
+// The leaderboard is not urgent: updates landing within LEADERBOARD_SETTLE_MS
+// of each other collapse into one, and only the latest is rendered, when idle
+const LEADERBOARD_SETTLE_MS = 250;
+const whenIdle = window.requestIdleCallback
+    ? (fn, opts) => window.requestIdleCallback(fn, opts)
+    : (fn) => setTimeout(fn, 50);
+let pendingLeaderboard = null;
+function scheduleLeaderboard(data) {
+    const scheduled = pendingLeaderboard !== null;
+    pendingLeaderboard = data;
+    if (scheduled) return;
+    setTimeout(() => whenIdle(() => {
+        const d = pendingLeaderboard;
+        pendingLeaderboard = null;
+        renderLeaderboard(d.leaderboard, d.total_cents);
+    }, { timeout: 500 }), LEADERBOARD_SETTLE_MS);
 }
 
 function setStatus(msg, type) {
-    const el = document.getElementById('status');
+    const el = DOM.status;
     el.textContent = msg;
     el.className = '';
     if (type === 'live') el.className = 'status-live';
@@ -856,14 +1443,15 @@ function setStatus(msg, type) {
     else if (type === 'ready') el.className = 'status-ready';
 }
 
+// One regex pass with a lookup table; no throwaway DOM node per call
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
 function escHtml(s) {
-    const d = document.createElement('div');
-    d.textContent = s;
-    return d.innerHTML;
+    return s == null ? '' : String(s).replace(/[&<>"']/g, c => HTML_ESCAPES[c]);
 }
 
 window.addEventListener('beforeunload', cleanup);
 </script>
+""" + _MEDIA_SCRIPTS + """
 </body>
 </html>
 """
@@ -875,18 +1463,18 @@ LISTENER_HTML = """
 <head>
 <meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Power FM LIVE</title>
-<script src="/static/js/mediasoup-client.bundle.js"></script>
-<script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.7.4/socket.io.min.js"></script>
+""" + _MEDIA_SCRIPT_PRELOADS + """
 <style>
+""" + _CSS_VARS + """
 *{margin:0;padding:0;box-sizing:border-box}
-body{background:""" + BG + """;color:""" + TEXT + """;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
+body{background:var(--bg);color:var(--text);font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
 .container{max-width:960px;margin:0 auto;padding:20px}
-h1{font-size:24px;margin-bottom:6px;color:""" + ACCENT + """}
-.subtitle{color:""" + MUTED + """;margin-bottom:20px;font-size:14px}
-.panel{background:""" + PANEL + """;border-radius:12px;padding:20px;margin-bottom:16px}
-.live-badge{background:""" + ACCENT + """;color:#fff;padding:4px 12px;border-radius:12px;font-size:12px;font-weight:700;letter-spacing:1px;animation:pulse 2s infinite}
+h1{font-size:24px;margin-bottom:6px;color:var(--accent)}
+.subtitle{color:var(--muted);margin-bottom:20px;font-size:14px}
+.panel{background:var(--panel);border-radius:12px;padding:20px;margin-bottom:16px}
+.live-badge{background:var(--accent);color:#fff;padding:4px 12px;border-radius:12px;font-size:12px;font-weight:700;letter-spacing:1px;animation:pulse 2s infinite}
 @keyframes pulse{0%,100%{opacity:1}50%{opacity:.6}}
-.meta{color:""" + MUTED + """;font-size:13px;display:flex;gap:16px;margin:8px 0}
+.meta{color:var(--muted);font-size:13px;display:flex;gap:16px;margin:8px 0}
 #status{padding:10px;border-radius:8px;margin-bottom:16px;font-weight:600;text-align:center}
 .status-connected{background:rgba(46,204,113,.15);color:#2ecc71}
 .status-connecting{background:rgba(241,196,15,.15);color:#f1c40f}
@@ -907,23 +1495,23 @@ h1{font-size:24px;margin-bottom:6px;color:""" + ACCENT + """}
 
 /* Chat */
 .chat-box{height:250px;overflow-y:auto;background:#0d1b36;border-radius:8px;padding:10px;margin-bottom:10px}
-.chat-msg{margin-bottom:6px;font-size:13px}.chat-msg .name{color:""" + ACCENT + """;font-weight:700}
-.chat-msg .tipper-badge{background:""" + ACCENT + """;color:#fff;padding:1px 5px;border-radius:4px;font-size:10px;font-weight:700;margin-right:4px}
+.chat-msg{margin-bottom:6px;font-size:13px}.chat-msg .name{color:var(--accent);font-weight:700}
+.chat-msg .tipper-badge{background:var(--accent);color:#fff;padding:1px 5px;border-radius:4px;font-size:10px;font-weight:700;margin-right:4px}
 .chat-input-row{display:flex;gap:8px}
-.chat-input-row input{flex:1;padding:10px 14px;background:#0d1b36;border:1px solid #333;border-radius:8px;color:""" + TEXT + """;font-size:14px}
-.chat-input-row input:focus{outline:none;border-color:""" + ACCENT + """}
-.chat-input-row button{padding:8px 16px;background:""" + ACCENT + """;color:#fff;border:none;border-radius:8px;font-weight:700;cursor:pointer}
-.listener-count{color:""" + MUTED + """;font-size:14px}
+.chat-input-row input{flex:1;padding:10px 14px;background:#0d1b36;border:1px solid #333;border-radius:8px;color:var(--text);font-size:14px}
+.chat-input-row input:focus{outline:none;border-color:var(--accent)}
+.chat-input-row button{padding:8px 16px;background:var(--accent);color:#fff;border:none;border-radius:8px;font-weight:700;cursor:pointer}
+.listener-count{color:var(--muted);font-size:14px}
 .name-input{display:flex;gap:8px;margin-bottom:16px;align-items:center}
-.name-input input{padding:8px 12px;background:#0d1b36;border:1px solid #333;border-radius:8px;color:""" + TEXT + """;font-size:14px;width:200px}
-.name-input button{padding:8px 16px;background:""" + ACCENT + """;color:#fff;border:none;border-radius:8px;font-weight:700;cursor:pointer}
-a{color:""" + ACCENT + """}
+.name-input input{padding:8px 12px;background:#0d1b36;border:1px solid #333;border-radius:8px;color:var(--text);font-size:14px;width:200px}
+.name-input button{padding:8px 16px;background:var(--accent);color:#fff;border:none;border-radius:8px;font-weight:700;cursor:pointer}
+a{color:var(--accent)}
 
 /* Fan actions panel */
 .fan-actions{display:flex;flex-wrap:wrap;gap:8px;margin-bottom:16px}
-.fan-actions h4{width:100%;font-size:13px;color:""" + MUTED + """;text-transform:uppercase;letter-spacing:1px;margin-bottom:2px}
-.btn-tier{padding:10px 16px;border-radius:8px;border:2px solid """ + ACCENT + """;background:transparent;color:""" + ACCENT + """;font-weight:700;font-size:13px;cursor:pointer;transition:all .15s}
-.btn-tier:hover{background:""" + ACCENT + """;color:#fff;transform:scale(1.05)}
+.fan-actions h4{width:100%;font-size:13px;color:var(--muted);text-transform:uppercase;letter-spacing:1px;margin-bottom:2px}
+.btn-tier{padding:10px 16px;border-radius:8px;border:2px solid var(--accent);background:transparent;color:var(--accent);font-weight:700;font-size:13px;cursor:pointer;transition:all .15s}
+.btn-tier:hover{background:var(--accent);color:#fff;transform:scale(1.05)}
 .btn-tier:disabled{opacity:.4;cursor:not-allowed;transform:none}
 .btn-tip{padding:8px 14px;border-radius:8px;border:2px solid #f39c12;background:transparent;color:#f39c12;font-weight:700;font-size:13px;cursor:pointer;transition:all .15s}
 .btn-tip:hover{background:#f39c12;color:#fff;transform:scale(1.05)}
@@ -940,13 +1528,13 @@ a{color:""" + ACCENT + """}
 /* Leaderboard */
 .lb-header{display:flex;align-items:center;gap:10px;margin-bottom:10px}
 .lb-header h3{margin:0}
-.lb-total{color:""" + ACCENT + """;font-size:14px;font-weight:400}
+.lb-total{color:var(--accent);font-size:14px;font-weight:400}
 .lb-list{list-style:none}
 .lb-list li{display:flex;align-items:center;gap:10px;padding:6px 0;font-size:14px;border-bottom:1px solid #1a1a2e}
-.lb-rank{width:24px;text-align:center;font-weight:700;color:""" + MUTED + """}
+.lb-rank{width:24px;text-align:center;font-weight:700;color:var(--muted)}
 .lb-rank.gold{color:#ffd700}.lb-rank.silver{color:#c0c0c0}.lb-rank.bronze{color:#cd7f32}
 .lb-name{flex:1}
-.lb-amount{font-weight:700;color:""" + ACCENT + """}
+.lb-amount{font-weight:700;color:var(--accent)}
 
 /* Two-column layout: main + sidebar */
 .main-layout{display:grid;grid-template-columns:1fr 280px;gap:16px}
@@ -982,21 +1570,15 @@ a{color:""" + ACCENT + """}
             <div class="panel" id="fan-actions-panel" style="display:none">
                 <div id="saved-card-indicator" style="display:none;padding:8px 14px;margin-bottom:12px;border-radius:8px;background:rgba(46,204,113,.12);color:#2ecc71;font-size:13px;font-weight:600">
                     <span id="saved-card-text"></span>
-                    <a href="#" onclick="clearSavedCard();return false" style="color:""" + MUTED + """;margin-left:10px;font-weight:400;font-size:12px">Change card</a>
+                    <a href="#" onclick="clearSavedCard();return false" style="color:var(--muted);margin-left:10px;font-weight:400;font-size:12px">Change card</a>
                 </div>
                 <div class="fan-actions">
                     <h4>Join the DJ on screen</h4>
-                    <button class="btn-tier" onclick="handlePurchase('spotlight','2min')">Join DJ — $5 (2min)</button>
-                    <button class="btn-tier" onclick="handlePurchase('spotlight','5min')">Join DJ — $10 (5min)</button>
-                    <button class="btn-tier" onclick="handlePurchase('spotlight','10min')">Join DJ — $25 (10min)</button>
+""" + _SPOTLIGHT_BUTTONS_HTML + """
                 </div>
                 <div class="fan-actions">
                     <h4>Send a Super Tip</h4>
-                    <button class="btn-tip" onclick="handlePurchase('tip',null,200)">$2</button>
-                    <button class="btn-tip" onclick="handlePurchase('tip',null,500)">$5</button>
-                    <button class="btn-tip" onclick="handlePurchase('tip',null,1000)">$10</button>
-                    <button class="btn-tip" onclick="handlePurchase('tip',null,2000)">$20</button>
-                    <button class="btn-tip" onclick="handlePurchase('tip',null,5000)">$50</button>
+""" + _TIP_BUTTONS_HTML + """
                 </div>
             </div>
 
@@ -1011,6 +1593,7 @@ a{color:""" + ACCENT + """}
                     <button onclick="joinStream()">Join Chat</button>
                 </div>
                 <div class="chat-box" id="chat-box"></div>
+                <template id="chat-msg-tpl"><div class="chat-msg"><span class="tipper-badge" hidden>Tipper</span><span class="name"></span> <span class="msg"></span></div></template>
                 <div class="chat-input-row" id="chat-controls" style="display:none">
                     <input id="chat-input" type="text" placeholder="Type a message..." onkeydown="if(event.key==='Enter')sendChat()">
                     <button onclick="sendChat()">Send</button>
@@ -1026,6 +1609,7 @@ a{color:""" + ACCENT + """}
                     <span class="lb-total" id="lb-total"></span>
                 </div>
                 <ul class="lb-list" id="lb-list"></ul>
+                <template id="lb-item-tpl"><li><span class="lb-rank"></span><span class="lb-name"></span><span class="lb-amount"></span></li></template>
             </div>
         </div>
     </div>
@@ -1038,6 +1622,8 @@ a{color:""" + ACCENT + """}
 
 <script>
 const STREAM_ID = '{{ stream_id }}';
+// Chat history and leaderboard rendered into the page, so they show before the socket connects
+const BOOTSTRAP = {{ bootstrap|tojson }};
 let socket = null;
 let device = null;
 let recvTransport = null;
@@ -1050,12 +1636,30 @@ let savedRoomId = null;
 let isTipper = false;
 let paymentPollTimer = null;
 
+// Elements touched by socket event handlers, resolved once. This script runs
+// at the end of <body>, so they all exist already.
+const DOM = {
+    status: document.getElementById('status'),
+    listenerCount: document.getElementById('listener-count'),
+    chatBox: document.getElementById('chat-box'),
+    chatTpl: document.getElementById('chat-msg-tpl'),
+    chatInput: document.getElementById('chat-input'),
+    tipOverlay: document.getElementById('tip-overlay'),
+    spotlightStatus: document.getElementById('spotlight-status'),
+    videoGrid: document.getElementById('video-grid'),
+    lbPanel: document.getElementById('leaderboard-panel'),
+    lbList: document.getElementById('lb-list'),
+    lbTotal: document.getElementById('lb-total'),
+    lbTpl: document.getElementById('lb-item-tpl'),
+};
+
 async function joinStream() {
     displayName = document.getElementById('display-name').value.trim() || 'Listener';
     document.getElementById('name-input').style.display = 'none';
     document.getElementById('chat-controls').style.display = 'flex';
 
-    socket = io({ transports: ['websocket', 'polling'] });
+    socket = io({ transports: ['websocket'], upgrade: false, reconnectionDelayMax: 2000 });
+    attachRequestRouter();
 
     socket.on('connect', () => {
         socket.emit('join-as-listener', {
@@ -1076,11 +1680,6 @@ async function joinStream() {
         // Show fan actions
         document.getElementById('fan-actions-panel').style.display = 'block';
 
-        // Load chat history
-        if (data.recentChat) {
-            data.recentChat.forEach(m => appendChat(m.name, m.message));
-        }
-
         // Set up mediasoup consumer
         if (typeof mediasoupClient !== 'undefined' && data.rtpCapabilities) {
             try {
@@ -1098,21 +1697,18 @@ async function joinStream() {
                     });
 
                     recvTransport.on('connect', ({ dtlsParameters }, callback, errback) => {
-                        socket.emit('connect-transport', {
+                        sfuRequest('connect-transport', {
                             transportId: recvTransport.id,
                             dtlsParameters: dtlsParameters,
                             roomId: data.roomId,
                             peerId: peerId
-                        });
-                        socket.once('transport-connected', () => callback());
-                        socket.once('transport-connect-error', (err) => errback(new Error(err.message)));
+                        }).then(() => callback(), errback);
                     });
 
-                    // Consume existing producers
+                    // Consume existing producers. The requests are independent (reqId-routed),
+                    // and each consumer attaches its track synchronously once consumed.
                     if (data.producers) {
-                        for (const p of data.producers) {
-                            await consumeProducer(p.producerId, p.kind, data.roomId);
-                        }
+                        await Promise.all(data.producers.map(p => consumeProducer(p.producerId, p.kind, data.roomId)));
                     }
                 }
             } catch(e) {
@@ -1132,13 +1728,14 @@ async function joinStream() {
     });
 
     socket.on('listener-joined', (data) => {
+        if (data.peerId === peerId) return;
         updateListenerCount(data.listenerCount);
-        appendChat('System', data.name + ' joined');
+        queuePresence(data.name, true);
     });
 
     socket.on('listener-left', (data) => {
         updateListenerCount(data.listenerCount);
-        appendChat('System', data.name + ' left');
+        queuePresence(data.name, false);
     });
 
     socket.on('stream-ended', () => {
@@ -1155,13 +1752,13 @@ async function joinStream() {
 
     // --- Spotlight events ---
     socket.on('spotlight-pending', (data) => {
-        const el = document.getElementById('spotlight-status');
+        const el = DOM.spotlightStatus;
         el.textContent = 'You are #' + data.position + ' in queue — waiting for DJ approval';
         el.classList.add('active');
     });
 
     socket.on('spotlight-approved', async (data) => {
-        const el = document.getElementById('spotlight-status');
+        const el = DOM.spotlightStatus;
         el.textContent = 'Approved! Starting camera...';
         el.classList.add('active');
         try {
@@ -1182,27 +1779,23 @@ async function joinStream() {
                 });
 
                 sendTransport.on('connect', ({ dtlsParameters }, callback, errback) => {
-                    socket.emit('connect-transport', {
+                    sfuRequest('connect-transport', {
                         transportId: sendTransport.id,
                         dtlsParameters: dtlsParameters,
                         roomId: savedRoomId,
                         peerId: peerId
-                    });
-                    socket.once('transport-connected', () => callback());
-                    socket.once('transport-connect-error', (err) => errback(new Error(err.message)));
+                    }).then(() => callback(), errback);
                 });
 
                 sendTransport.on('produce', ({ kind, rtpParameters, appData }, callback, errback) => {
-                    socket.emit('produce', {
+                    sfuRequest('produce', {
                         transportId: sendTransport.id,
                         kind: kind,
                         rtpParameters: rtpParameters,
                         appData: appData,
                         roomId: savedRoomId,
                         peerId: peerId
-                    });
-                    socket.once('produced', (d) => callback({ id: d.producerId }));
-                    socket.once('produce-error', (err) => errback(new Error(err.message)));
+                    }).then((d) => callback({ id: d.producerId }), errback);
                 });
 
                 const audioTrack = guestStream.getAudioTracks()[0];
@@ -1228,7 +1821,7 @@ async function joinStream() {
 
     socket.on('spotlight-expired', (data) => {
         removeGuestTile();
-        const el = document.getElementById('spotlight-status');
+        const el = DOM.spotlightStatus;
         el.classList.remove('active');
         // Clean up guest send transport
         if (sendTransport) { try { sendTransport.close(); } catch(e){} sendTransport = null; }
@@ -1243,13 +1836,20 @@ async function joinStream() {
     });
 
     socket.on('leaderboard-update', (data) => {
-        renderLeaderboard(data.leaderboard, data.total_cents);
+        scheduleLeaderboard(data);
+    });
+
+    // Coalesced server events: [[event, data], ...]
+    socket.on('batch', (events) => {
+        events.forEach(([event, data]) => {
+            socket.listeners(event).forEach(fn => fn(data));
+        });
     });
 }
 
 // --- Video grid management ---
 function showGuestTile(name, duration) {
-    const grid = document.getElementById('video-grid');
+    const grid = DOM.videoGrid;
     grid.classList.remove('solo');
     grid.classList.add('duo');
     // Add guest tile if not exists
@@ -1265,18 +1865,22 @@ function showGuestTile(name, duration) {
     updateGuestTimer(duration);
 }
 
+// "M:SS" strings are memoised per second, and the element is only written when
+// the text changes, so repeated or sub-second ticks cost nothing
+const TIMER_TEXT = [];
+function timerText(remaining) {
+    return TIMER_TEXT[remaining] || (TIMER_TEXT[remaining] =
+        Math.floor(remaining / 60) + ':' + String(remaining % 60).padStart(2, '0'));
+}
 function updateGuestTimer(remaining) {
     const el = document.getElementById('guest-timer');
-    if (!el) return;
-    const m = Math.floor(remaining / 60);
-    const s = remaining % 60;
-    el.textContent = m + ':' + String(s).padStart(2, '0');
+    if (el) setText(el, timerText(remaining));
 }
 
 function removeGuestTile() {
     const tile = document.getElementById('guest-tile');
     if (tile) tile.remove();
-    const grid = document.getElementById('video-grid');
+    const grid = DOM.videoGrid;
     grid.classList.remove('duo');
     grid.classList.add('solo');
 }
@@ -1440,114 +2044,250 @@ function startPaymentPoll(type, tier, tipCents) {
 }
 
 // --- Tip bubbles ---
+// Bubbles are recycled round-robin from a fixed pool (grown on first use)
+// instead of creating and removing a node for every tip.
+const TIP_POOL_SIZE = 32;
+const tipPool = [];
+let tipPoolNext = 0;
+
 function showTipBubble(name, cents) {
-    const overlay = document.getElementById('tip-overlay');
-    const bubble = document.createElement('div');
-    bubble.className = 'tip-bubble';
+    let bubble = tipPool[tipPoolNext];
+    if (!bubble) {
+        bubble = tipPool[tipPoolNext] = document.createElement('div');
+        bubble.className = 'tip-bubble';
+        bubble.addEventListener('animationend', () => { bubble.style.display = 'none'; });
+        DOM.tipOverlay.appendChild(bubble);
+    }
+    tipPoolNext = (tipPoolNext + 1) % TIP_POOL_SIZE;
     const scale = Math.min(2, 0.8 + (cents / 2000));
     bubble.style.fontSize = (14 * scale) + 'px';
     bubble.textContent = name + ' $' + (cents / 100).toFixed(2);
-    overlay.appendChild(bubble);
-    setTimeout(() => bubble.remove(), 3200);
+    // Restart the float animation (a reflow in between makes it replay)
+    bubble.style.animation = 'none';
+    bubble.style.display = '';
+    void bubble.offsetWidth;
+    bubble.style.animation = '';
 }
 
 // --- Leaderboard ---
+// Lists are patched in place: rows are cloned from a <template> only when the
+// list grows, and existing rows just get their changed text updated.
+function syncRows(list, tpl, n, init) {
+    while (list.children.length > n) list.lastElementChild.remove();
+    while (list.children.length < n) {
+        const row = tpl.content.firstElementChild.cloneNode(true);
+        init(row, list.children.length);
+        list.appendChild(row);
+    }
+    return list.children;
+}
+function setText(el, text) {
+    if (el.textContent !== text) el.textContent = text;
+}
+
+const LB_ICONS = ['gold', 'silver', 'bronze'];
+const LB_MEDALS = [0x1F451, 0x1F948, 0x1F949].map(c => String.fromCodePoint(c));
+function initLbRow(row, i) {
+    const rank = row.children[0];
+    if (i < 3) rank.classList.add(LB_ICONS[i]);
+    rank.textContent = i < 3 ? LB_MEDALS[i] : String(i + 1);
+}
+
 function renderLeaderboard(lb, totalCents) {
-    const panel = document.getElementById('leaderboard-panel');
-    const list = document.getElementById('lb-list');
-    const total = document.getElementById('lb-total');
-    if (!lb || lb.length === 0) { panel.style.display = 'none'; return; }
-    panel.style.display = 'block';
-    total.textContent = '$' + (totalCents / 100).toFixed(2) + ' total';
-    const icons = ['gold', 'silver', 'bronze'];
-    const medals = ['&#128081;', '&#129352;', '&#129353;'];
-    list.innerHTML = lb.map((entry, i) => '<li>' +
-        '<span class="lb-rank ' + (icons[i] || '') + '">' + (i < 3 ? medals[i] : (i + 1)) + '</span>' +
-        '<span class="lb-name">' + escHtml(entry[0]) + '</span>' +
-        '<span class="lb-amount">$' + (entry[1] / 100).toFixed(2) + '</span></li>').join('');
+    if (!lb || lb.length === 0) { DOM.lbPanel.style.display = 'none'; return; }
+    DOM.lbPanel.style.display = 'block';
+    DOM.lbTotal.textContent = '$' + (totalCents / 100).toFixed(2) + ' total';
+    const rows = syncRows(DOM.lbList, DOM.lbTpl, lb.length, initLbRow);
+    lb.forEach((entry, i) => {
+        setText(rows[i].children[1], entry[0]);
+        setText(rows[i].children[2], '$' + (entry[1] / 100).toFixed(2));
+    });
+}
+
+// --- Request/response over Socket.IO ---
+// One persistent handler per reply event settles the matching request by reqId,
+// instead of a socket.once() pair registered for every connect/produce call.
+const pendingRequests = new Map();
+let lastReqId = 0;
+
+function sfuRequest(event, payload) {
+    return new Promise((resolve, reject) => {
+        const reqId = ++lastReqId;
+        pendingRequests.set(reqId, { resolve, reject });
+        socket.emit(event, Object.assign({ reqId }, payload));
+    });
+}
+
+function settleRequest(failed) {
+    return (data) => {
+        const req = pendingRequests.get(data.reqId);
+        if (!req) return;
+        pendingRequests.delete(data.reqId);
+        if (failed) req.reject(new Error(data.message));
+        else req.resolve(data);
+    };
+}
+
+function attachRequestRouter() {
+    for (const [ok, fail] of [['transport-connected', 'transport-connect-error'],
+                              ['produced', 'produce-error'],
+                              ['consumed', 'consume-error']]) {
+        socket.on(ok, settleRequest(false));
+        socket.on(fail, settleRequest(true));
+    }
 }
 
 // --- Media consumers ---
 async function consumeProducer(producerId, kind, roomId) {
-    socket.emit('consume', {
-        producerId: producerId,
-        roomId: roomId,
-        peerId: peerId,
-        rtpCapabilities: device.rtpCapabilities
+    let data;
+    try {
+        data = await sfuRequest('consume', {
+            producerId: producerId,
+            roomId: roomId,
+            peerId: peerId,
+            rtpCapabilities: device.rtpCapabilities
+        });
+    } catch (e) {
+        console.error('Consume failed:', e);
+        return null;
+    }
+
+    const consumer = await recvTransport.consume({
+        id: data.consumerId,
+        producerId: data.producerId,
+        kind: data.kind,
+        rtpParameters: data.rtpParameters
     });
 
-    return new Promise((resolve) => {
-        socket.once('consumed', async (data) => {
-            const consumer = await recvTransport.consume({
-                id: data.consumerId,
-                producerId: data.producerId,
-                kind: data.kind,
-                rtpParameters: data.rtpParameters
-            });
+    const track = consumer.track;
+    if (data.kind === 'video') {
+        const grid = document.getElementById('video-grid');
+        grid.style.display = 'grid';
+        const video = document.getElementById('video-player');
+        const stream = new MediaStream([track]);
+        video.srcObject = stream;
+    } else {
+        const audio = document.getElementById('audio-player');
+        const stream = audio.srcObject ? audio.srcObject : new MediaStream();
+        stream.addTrack(track);
+        audio.srcObject = stream;
+    }
 
-            const track = consumer.track;
-            if (data.kind === 'video') {
-                const grid = document.getElementById('video-grid');
-                grid.style.display = 'grid';
-                const video = document.getElementById('video-player');
-                const stream = new MediaStream([track]);
-                video.srcObject = stream;
-            } else {
-                const audio = document.getElementById('audio-player');
-                const stream = audio.srcObject ? audio.srcObject : new MediaStream();
-                stream.addTrack(track);
-                audio.srcObject = stream;
-            }
+    socket.emit('resume-consumer', {
+        consumerId: data.consumerId,
+        roomId: roomId,
+        peerId: peerId
+    });
 
-            socket.emit('resume-consumer', {
-                consumerId: data.consumerId,
-                roomId: roomId,
-                peerId: peerId
-            });
+    return consumer;
+}
 
-            resolve(consumer);
-        });
-    });
+// Cloned from a <template> and filled with textContent: no HTML parse and
+// no escaping per message
+function chatMessage(name, msg, tipBadge) {
+    const div = DOM.chatTpl.content.firstElementChild.cloneNode(true);
+    const [badge, nameSpan, msgSpan] = div.children;
+    badge.hidden = !tipBadge;
+    nameSpan.textContent = name + ':';
+    msgSpan.textContent = msg;
+    return div;
 }
 
-function appendChat(name, msg, tipBadge) {
-    const box = document.getElementById('chat-box');
-    const div = document.createElement('div');
-    div.className = 'chat-msg';
-    const badge = tipBadge ? '<span class="tipper-badge">Tipper</span>' : '';
-    div.innerHTML = badge + '<span class="name">' + escHtml(name) + ':</span> ' + escHtml(msg);
-    box.appendChild(div);
+function appendChat(name, msg, isTipper) {
+    const box = DOM.chatBox;
+    box.appendChild(chatMessage(name, msg, isTipper));
     box.scrollTop = box.scrollHeight;
 }
 
+// Appends [name, message] pairs with a single insertion and a single scroll
+function appendChatBatch(messages) {
+    const frag = document.createDocumentFragment();
+    for (const [name, msg] of messages) frag.appendChild(chatMessage(name, msg));
+    DOM.chatBox.appendChild(frag);
+    DOM.chatBox.scrollTop = DOM.chatBox.scrollHeight;
+}
+
 function sendChat() {
-    const input = document.getElementById('chat-input');
+    const input = DOM.chatInput;
     const msg = input.value.trim();
     if (!msg || !socket) return;
-    socket.emit('chat-message', { streamId: STREAM_ID, message: msg, name: displayName, isTipper: isTipper });
+    const payload = { streamId: STREAM_ID, message: msg, name: displayName };
+    if (isTipper) payload.isTipper = true;
+    socket.emit('chat-message', payload);
     appendChat(displayName, msg, isTipper);
     input.value = '';
 }
 
+// Listener counts arrive in bursts when a stream starts; write at most once per frame
+let pendingListenerCount = null;
 function updateListenerCount(n) {
-    document.getElementById('listener-count').textContent = n + ' listener' + (n !== 1 ? 's' : '');
+    const scheduled = pendingListenerCount !== null;
+    pendingListenerCount = n;
+    if (scheduled) return;
+    requestAnimationFrame(() => {
+        const c = pendingListenerCount;
+        pendingListenerCount = null;
+        DOM.listenerCount.textContent = c + ' listener' + (c !== 1 ? 's' : '');
+    });
+}
+
+// Join/leave notices are queued and appended together once per frame. A join
+// and a leave for the same name inside one frame cancel out.
+let pendingPresence = [];
+let presenceScheduled = false;
+function queuePresence(name, joined) {
+    const i = pendingPresence.findIndex(p => p.name === name && p.joined !== joined);
+    if (i >= 0) pendingPresence.splice(i, 1);
+    else pendingPresence.push({ name, joined });
+    if (presenceScheduled) return;
+    presenceScheduled = true;
+    requestAnimationFrame(flushPresence);
+}
+
+function flushPresence() {
+    presenceScheduled = false;
+    if (!pendingPresence.length) return;
+    appendChatBatch(pendingPresence.map(p => ['System', p.name + (p.joined ? ' joined' : ' left')]));
+    pendingPresence = [];
+}
+
+// The leaderboard is not urgent: updates landing within LEADERBOARD_SETTLE_MS
+// of each other collapse into one, and only the latest is rendered, when idle
+const LEADERBOARD_SETTLE_MS = 250;
+const whenIdle = window.requestIdleCallback
+    ? (fn, opts) => window.requestIdleCallback(fn, opts)
+    : (fn) => setTimeout(fn, 50);
+let pendingLeaderboard = null;
+function scheduleLeaderboard(data) {
+    const scheduled = pendingLeaderboard !== null;
+    pendingLeaderboard = data;
+    if (scheduled) return;
+    setTimeout(() => whenIdle(() => {
+        const d = pendingLeaderboard;
+        pendingLeaderboard = null;
+        renderLeaderboard(d.leaderboard, d.total_cents);
+    }, { timeout: 500 }), LEADERBOARD_SETTLE_MS);
 }
 
 function setStatus(msg, type) {
-    const el = document.getElementById('status');
+    const el = DOM.status;
     el.textContent = msg;
     el.className = 'status-' + type;
 }
 
+// One regex pass with a lookup table; no throwaway DOM node per call
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
 function escHtml(s) {
-    const d = document.createElement('div');
-    d.textContent = s;
-    return d.innerHTML;
+    return s == null ? '' : String(s).replace(/[&<>"']/g, c => HTML_ESCAPES[c]);
 }
 
-// Auto-join on page load
-joinStream();
+appendChatBatch(BOOTSTRAP.recentChat.map(m => [m.name, m.message]));
+if (BOOTSTRAP.leaderboard) renderLeaderboard(BOOTSTRAP.leaderboard.leaderboard, BOOTSTRAP.leaderboard.total_cents);
+
+// Auto-join once the deferred mediasoup/socket.io scripts have run
+document.addEventListener('DOMContentLoaded', joinStream);
 </script>
+""" + _MEDIA_SCRIPTS + """
 </body>
 </html>
 """
@@ -1560,22 +2300,23 @@ ADMIN_HTML = """
 <meta charset="utf-8"><meta name="viewport" content="width=device-width,initial-scale=1">
 <title>Power FM LIVE — Admin</title>
 <style>
+""" + _CSS_VARS + """
 *{margin:0;padding:0;box-sizing:border-box}
-body{background:""" + BG + """;color:""" + TEXT + """;font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
+body{background:var(--bg);color:var(--text);font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',Roboto,sans-serif;min-height:100vh}
 .container{max-width:960px;margin:0 auto;padding:20px}
-h1{font-size:24px;margin-bottom:20px;color:""" + ACCENT + """}
-.panel{background:""" + PANEL + """;border-radius:12px;padding:20px;margin-bottom:16px}
+h1{font-size:24px;margin-bottom:20px;color:var(--accent)}
+.panel{background:var(--panel);border-radius:12px;padding:20px;margin-bottom:16px}
 table{width:100%;border-collapse:collapse}
-th{text-align:left;color:""" + MUTED + """;font-size:12px;text-transform:uppercase;letter-spacing:1px;padding:8px 12px;border-bottom:1px solid #333}
+th{text-align:left;color:var(--muted);font-size:12px;text-transform:uppercase;letter-spacing:1px;padding:8px 12px;border-bottom:1px solid #333}
 td{padding:10px 12px;border-bottom:1px solid #222;font-size:14px}
 .badge{padding:2px 8px;border-radius:6px;font-size:11px;font-weight:700}
-.badge-live{background:""" + ACCENT + """;color:#fff}
+.badge-live{background:var(--accent);color:#fff}
 .badge-ended{background:#555;color:#ccc}
 .badge-scheduled{background:#2980b9;color:#fff}
-a{color:""" + ACCENT + """}
+a{color:var(--accent)}
 .stat{text-align:center;padding:16px}
-.stat h3{font-size:28px;color:""" + ACCENT + """;margin-bottom:4px}
-.stat p{color:""" + MUTED + """;font-size:12px}
+.stat h3{font-size:28px;color:var(--accent);margin-bottom:4px}
+.stat p{color:var(--muted);font-size:12px}
 .stat-row{display:grid;grid-template-columns:repeat(4,1fr);gap:12px;margin-bottom:20px}
 </style>
 </head>
@@ -1633,10 +2374,10 @@ async function endStream(id) {
     loadAdmin();
 }
 
+// One regex pass with a lookup table; no throwaway DOM node per call
+const HTML_ESCAPES = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
 function esc(s) {
-    const d = document.createElement('div');
-    d.textContent = s || '';
-    return d.innerHTML;
+    return s ? String(s).replace(/[&<>"']/g, c => HTML_ESCAPES[c]) : '';
 }
 
 loadAdmin();
@@ -1647,28 +2388,77 @@ setInterval(loadAdmin, 10000);
 """
 
 
+# Built once at import: the static pages have no placeholders so they are
+# encoded and compressed a single time, and the listener page is compiled once
+# instead of being re-parsed by render_template_string on every request.
+def _precompress(html):
+    """Encode a static page once per supported Content-Encoding, plus its ETag."""
+    body = html.encode('utf-8')
+    return precompress(body), hashlib.sha256(body).hexdigest()[:16]
+
+
+def _static_page(page):
+    """Serve a precompressed page in the best encoding the client accepts."""
+    variants, digest = page
+    return precompressed_response(variants, digest)
+
+
+_DIRECTORY_PAGE = _precompress(DIRECTORY_HTML)
+_BROADCAST_PAGE = _precompress(BROADCAST_HTML)
+_ADMIN_PAGE = _precompress(ADMIN_HTML)
+_PAYMENT_SUCCESS_PAGE = _precompress(PAYMENT_SUCCESS_HTML)
+_LISTENER_TMPL = Environment(autoescape=True).from_string(LISTENER_HTML)
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # FLASK ROUTES
 # ══════════════════════════════════════════════════════════════════════════════
 
+@livestream_bp.after_app_request
+def _cache_versioned_js(resp):
+    """Content-hashed /static/js/ URLs never change, so let browsers keep them."""
+    if request.path.startswith('/static/js/') and request.args.get('v') and resp.status_code == 200:
+        resp.headers['Cache-Control'] = STATIC_JS_CACHE_CONTROL
+    return resp
+
+
 @livestream_bp.route('/live')
 def live_directory():
-    return render_template_string(DIRECTORY_HTML)
+    return _static_page(_DIRECTORY_PAGE)
 
 
 @livestream_bp.route('/live/broadcast')
 def live_broadcast():
-    return render_template_string(BROADCAST_HTML)
+    return _static_page(_BROADCAST_PAGE)
 
 
 @livestream_bp.route('/live/<stream_id>')
 def live_listener(stream_id):
-    return render_template_string(LISTENER_HTML, stream_id=stream_id)
+    return _LISTENER_TMPL.render(stream_id=stream_id, bootstrap=_listener_bootstrap(stream_id))
+
+
+def _listener_bootstrap(stream_id):
+    """Recent chat and the leaderboard for a live stream, embedded in its page."""
+    bootstrap = {'recentChat': [], 'leaderboard': None}
+    info = active_streams.get(stream_id)
+    if info is None:
+        return bootstrap
+    if info['leaderboard']:
+        bootstrap['leaderboard'] = _leaderboard_payload(info)
+    db = _get_ls_db()
+    if db:
+        try:
+            with _ls_connection(db) as conn:
+                msgs = db.get_chat_messages(conn, stream_id, limit=50)
+                bootstrap['recentChat'] = [{'name': m['sender_name'], 'message': m['message']} for m in msgs]
+        except Exception:
+            pass
+    return bootstrap
 
 
 @livestream_bp.route('/live/admin')
 def live_admin():
-    return render_template_string(ADMIN_HTML)
+    return _static_page(_ADMIN_PAGE)
 
 
 # ── API Routes ──
@@ -1684,8 +2474,8 @@ def api_livestream_status():
             pass
     return jsonify({
         'sfu_running': sfu_running,
-        'active_streams': len([s for s in active_streams.values()]),
-        'total_listeners': sum(len(s.get('listeners', {})) for s in active_streams.values()),
+        'active_streams': len(active_streams),
+        'total_listeners': active_streams.listener_total(),
     })
 
 
@@ -1695,33 +2485,34 @@ def api_livestream_streams():
     streams = []
     if db:
         try:
-            conn = db.get_connection()
-            rows = db.get_recent_livestreams(conn, limit=50)
-            for r in rows:
-                s = dict(r)
-                # Add live listener count from memory
-                if s['id'] in active_streams:
-                    s['listener_count'] = len(active_streams[s['id']].get('listeners', {}))
-                else:
-                    s['listener_count'] = 0
-                streams.append(s)
-            conn.close()
+            with _ls_connection(db) as conn:
+                rows = db.get_recent_livestreams(conn, limit=50)
+                for r in rows:
+                    s = dict(r)
+                    # Add live listener count from memory
+                    info = active_streams.get(s['id'])
+                    s['listener_count'] = len(info.get('listeners', ())) if info else 0
+                    streams.append(s)
         except Exception as e:
             return jsonify({'streams': [], 'error': str(e)})
-    # Also include any in-memory-only streams not yet in DB
+    # Also include any in-memory-only streams not yet in DB, ahead of the DB
+    # rows and in reverse iteration order
+    seen_ids = {s['id'] for s in streams}
+    memory_only = []
     for sid, info in active_streams.items():
-        if not any(s['id'] == sid for s in streams):
-            streams.insert(0, {
+        if sid not in seen_ids:
+            memory_only.append({
                 'id': sid,
                 'title': info.get('title', 'Live Stream'),
                 'host_name': info.get('host_name', 'DJ'),
                 'status': 'live',
                 'stream_type': info.get('stream_type', 'audio'),
-                'listener_count': len(info.get('listeners', {})),
+                'listener_count': len(info.get('listeners', ())),
                 'max_listeners': info.get('max_listeners', 0),
                 'started_at': info.get('started_at'),
             })
-    return jsonify({'streams': streams})
+    memory_only.reverse()
+    return jsonify({'streams': memory_only + streams})
 
 
 @livestream_bp.route('/api/livestream/streams/<stream_id>')
@@ -1729,24 +2520,24 @@ def api_livestream_stream(stream_id):
     db = _get_ls_db()
     if db:
         try:
-            conn = db.get_connection()
-            row = db.get_livestream(conn, stream_id)
-            conn.close()
+            with _ls_connection(db) as conn:
+                row = db.get_livestream(conn, stream_id)
             if row:
                 s = dict(row)
-                if stream_id in active_streams:
-                    s['listener_count'] = len(active_streams[stream_id].get('listeners', {}))
+                info = active_streams.get(stream_id)
+                if info:
+                    s['listener_count'] = len(info.get('listeners', ()))
                 return jsonify(s)
         except Exception:
             pass
-    if stream_id in active_streams:
-        info = active_streams[stream_id]
+    info = active_streams.get(stream_id)
+    if info:
         return jsonify({
             'id': stream_id,
             'title': info.get('title', 'Live Stream'),
             'host_name': info.get('host_name', 'DJ'),
             'status': 'live',
-            'listener_count': len(info.get('listeners', {})),
+            'listener_count': len(info.get('listeners', ())),
         })
     return jsonify({'error': 'Stream not found'}), 404
 
@@ -1757,38 +2548,103 @@ def api_end_stream(stream_id):
     return jsonify({'ok': True})
 
 
+# Stripe customers created at checkout, so a fan who checks out again (e.g.
+# after clearing a card that quick-pay could not charge) reuses theirs instead
+# of paying a create_customer round trip. Neither the display name nor the
+# client address identifies a fan, and quick-pay charges whatever customer it
+# is handed, so entries are keyed by a random token that only the browser the
+# customer was created for holds, in an HttpOnly cookie.
+CUSTOMER_CACHE_MAX = 10_000
+CUSTOMER_CACHE_TTL = 3600  # seconds
+CUSTOMER_COOKIE = 'pfm_fan'
+_customer_cache = OrderedDict()  # browser token -> (customer_id, expires_at)
+_customer_cache_lock = threading.Lock()
+
+
+def _cached_customer(key):
+    """Customer id remembered for this browser token, if it has not expired."""
+    if not key:
+        return None
+    with _customer_cache_lock:
+        entry = _customer_cache.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del _customer_cache[key]
+            return None
+        _customer_cache.move_to_end(key)
+        return entry[0]
+
+
+def _remember_customer(key, customer_id):
+    """Remember a new customer, evicting the least recently used past the cap."""
+    with _customer_cache_lock:
+        _customer_cache[key] = (customer_id, time.monotonic() + CUSTOMER_CACHE_TTL)
+        _customer_cache.move_to_end(key)
+        if len(_customer_cache) > CUSTOMER_CACHE_MAX:
+            _customer_cache.popitem(last=False)
+
+
+# The payment endpoints parse and serialize with orjson when it is installed.
+def _json_body():
+    """The request's JSON object body, or {} if it is missing or malformed."""
+    if orjson is None:
+        data = request.get_json(force=True, silent=True)
+    else:
+        try:
+            data = orjson.loads(request.get_data())
+        except orjson.JSONDecodeError:
+            data = None
+    return data if isinstance(data, dict) else {}
+
+
+def _json_response(payload, status=200):
+    """JSON response for the payment endpoints."""
+    if orjson is None:
+        resp = jsonify(payload)
+        resp.status_code = status
+        return resp
+    return Response(orjson.dumps(payload), status=status, mimetype='application/json')
+
+
 @livestream_bp.route('/api/livestream/checkout', methods=['POST'])
 def api_livestream_checkout():
     """Create a Stripe Checkout session for spotlight or tip."""
-    data = request.get_json(force=True, silent=True) or {}
+    data = _json_body()
     stream_id = data.get('stream_id')
     pay_type = data.get('type')  # 'spotlight' or 'tip'
     fan_name = data.get('fan_name', 'Fan')
 
     if not stream_id or pay_type not in ('spotlight', 'tip'):
-        return jsonify({'error': 'Invalid request'}), 400
+        return _json_response({'error': 'Invalid request'}, 400)
 
     stripe = _get_stripe_client()
     if not stripe:
-        return jsonify({'error': 'Stripe not configured'}), 503
+        return _json_response({'error': 'Stripe not configured'}, 503)
 
     base_url = request.host_url.rstrip('/')
 
     # Create or reuse Stripe Customer so card gets saved
     customer_id = data.get('customer_id')
+    new_token = None
     if not customer_id:
-        customer = stripe.create_customer(
-            email=f'{fan_name.lower().replace(" ", "")}@fan.powerfm.live',
-            name=fan_name,
-            metadata={'source': 'livestream', 'stream_id': stream_id},
-        )
-        if customer:
-            customer_id = customer.get('id')
+        customer_id = _cached_customer(request.cookies.get(CUSTOMER_COOKIE))
+        if not customer_id:
+            customer = stripe.create_customer(
+                email=f'{fan_name.lower().replace(" ", "")}@fan.powerfm.live',
+                name=fan_name,
+                metadata={'source': 'livestream', 'stream_id': stream_id},
+            )
+            if customer:
+                customer_id = customer.get('id')
+                if customer_id:
+                    new_token = secrets.token_urlsafe(32)
+                    _remember_customer(new_token, customer_id)
 
     if pay_type == 'spotlight':
         tier = data.get('tier')
         if tier not in SPOTLIGHT_TIERS:
-            return jsonify({'error': 'Invalid tier'}), 400
+            return _json_response({'error': 'Invalid tier'}, 400)
         tier_info = SPOTLIGHT_TIERS[tier]
         product_name = f'Power FM Spotlight — {tier}'
         amount = tier_info['price']
@@ -1797,7 +2653,7 @@ def api_livestream_checkout():
     else:
         amount = data.get('amount_cents')
         if not amount or int(amount) not in TIP_PRESETS:
-            return jsonify({'error': 'Invalid tip amount'}), 400
+            return _json_response({'error': 'Invalid tip amount'}, 400)
         amount = int(amount)
         product_name = f'Power FM Super Tip — ${amount / 100:.2f}'
         success_url = f'{base_url}/live/payment-success?session_id={{CHECKOUT_SESSION_ID}}&type=tip&customer_id={customer_id or ""}'
@@ -1820,34 +2676,39 @@ def api_livestream_checkout():
         customer_id=customer_id,
     )
     if not session:
-        return jsonify({'error': 'Failed to create checkout session'}), 500
+        return _json_response({'error': 'Failed to create checkout session'}, 500)
 
-    return jsonify({
+    resp = _json_response({
         'checkout_url': session.get('url'),
         'session_id': session.get('id'),
         'customer_id': customer_id,
     })
+    if new_token:
+        resp.set_cookie(CUSTOMER_COOKIE, new_token, max_age=CUSTOMER_CACHE_TTL,
+                        path='/api/livestream/checkout', secure=request.is_secure,
+                        httponly=True, samesite='Lax')
+    return resp
 
 
 @livestream_bp.route('/api/livestream/quick-pay', methods=['POST'])
 def api_livestream_quick_pay():
     """Charge a saved payment method instantly — no popup, no redirect."""
-    data = request.get_json(force=True, silent=True) or {}
+    data = _json_body()
     customer_id = data.get('customer_id')
     stream_id = data.get('stream_id')
     pay_type = data.get('type')  # 'spotlight' or 'tip'
 
     if not customer_id or not stream_id or pay_type not in ('spotlight', 'tip'):
-        return jsonify({'error': 'Invalid request'}), 400
+        return _json_response({'error': 'Invalid request'}, 400)
 
     stripe = _get_stripe_client()
     if not stripe:
-        return jsonify({'error': 'Stripe not configured'}), 503
+        return _json_response({'error': 'Stripe not configured'}, 503)
 
     # Get saved payment methods for this customer
     pm_result = stripe.list_payment_methods(customer_id)
     if not pm_result or not pm_result.get('data'):
-        return jsonify({'error': 'No saved payment method', 'need_checkout': True}), 400
+        return _json_response({'error': 'No saved payment method', 'need_checkout': True}, 400)
 
     payment_method_id = pm_result['data'][0]['id']
     card_info = pm_result['data'][0].get('card', {})
@@ -1856,13 +2717,13 @@ def api_livestream_quick_pay():
     if pay_type == 'spotlight':
         tier = data.get('tier')
         if tier not in SPOTLIGHT_TIERS:
-            return jsonify({'error': 'Invalid tier'}), 400
+            return _json_response({'error': 'Invalid tier'}, 400)
         amount = SPOTLIGHT_TIERS[tier]['price']
         description = f'Power FM Spotlight — {tier}'
     else:
         amount = data.get('amount_cents')
         if not amount or int(amount) not in TIP_PRESETS:
-            return jsonify({'error': 'Invalid tip amount'}), 400
+            return _json_response({'error': 'Invalid tip amount'}, 400)
         amount = int(amount)
         description = f'Power FM Super Tip — ${amount / 100:.2f}'
 
@@ -1883,12 +2744,12 @@ def api_livestream_quick_pay():
         metadata=metadata,
     )
     if not pi:
-        return jsonify({'error': 'Payment failed', 'need_checkout': True}), 402
+        return _json_response({'error': 'Payment failed', 'need_checkout': True}, 402)
 
     if pi.get('status') != 'succeeded':
-        return jsonify({'error': 'Payment not completed', 'status': pi.get('status'), 'need_checkout': True}), 402
+        return _json_response({'error': 'Payment not completed', 'status': pi.get('status'), 'need_checkout': True}, 402)
 
-    return jsonify({
+    return _json_response({
         'success': True,
         'payment_intent_id': pi.get('id'),
         'card_brand': card_info.get('brand', 'card'),
@@ -1899,21 +2760,22 @@ def api_livestream_quick_pay():
 @livestream_bp.route('/live/payment-success')
 def live_payment_success():
     """Popup success page — writes to localStorage and auto-closes."""
-    return render_template_string(PAYMENT_SUCCESS_HTML)
+    return _static_page(_PAYMENT_SUCCESS_PAGE)
 
 
 def _end_stream(stream_id):
     """End a stream, clean up memory, update DB."""
+    _flush_listener_counts(stream_id)
     db = _get_ls_db()
     if db:
         try:
-            conn = db.get_connection()
-            db.end_livestream(conn, stream_id)
-            conn.close()
+            with _ls_connection(db) as conn:
+                db.end_livestream(conn, stream_id)
         except Exception:
             pass
     info = active_streams.pop(stream_id, None)
     if info:
+        room_to_stream.pop(info['room_id'], None)
         # Clean up active guest SFU peer if any
         if info.get('active_guest'):
             guest = info['active_guest']
@@ -1923,14 +2785,194 @@ def _end_stream(stream_id):
                     sfu.leave_room(info['room_id'], guest['peer_id'])
                 except Exception:
                     pass
-        socketio.emit('stream-ended', {'streamId': stream_id}, room=stream_id)
+        _drop_room_events(stream_id)
+        get_socketio().emit('stream-ended', {'streamId': stream_id}, to=stream_id)
+        _push_directory(stream_id, info, status='ended',
+                        ended_at=datetime.utcnow().isoformat())
+
+
+# ── Directory push ──
+# /live subscribes to this room instead of polling /api/livestream/streams.
+DIRECTORY_ROOM = '__directory__'
+
+
+def _push_directory(stream_id, info, status='live', **extra):
+    """Send one stream's directory card fields to every open /live page."""
+    stream = {
+        'id': stream_id,
+        'title': info.get('title', 'Live Stream'),
+        'host_name': info.get('host_name', 'DJ'),
+        'status': status,
+        'stream_type': info.get('stream_type', 'audio'),
+        'listener_count': len(info.get('listeners', ())),
+        'max_listeners': info.get('max_listeners', 0),
+        'started_at': info.get('started_at'),
+    }
+    stream.update(extra)
+    get_socketio().emit('directory-updated', {'op': 'upsert', 'stream': stream}, to=DIRECTORY_ROOM)
+
+
+# ── Batched room events ──
+# High-frequency room events are coalesced per room and flushed as one 'batch'
+# frame. Last-value-wins events (spotlight ticks, leaderboard refreshes) replace
+# their pending value; the rest (join/leave notices) are kept in order.
+BATCH_FLUSH_INTERVAL = 0.25
+_pending_events = {}  # stream_id -> OrderedDict(event name or seq -> (event, payload))
+_pending_lock = threading.Lock()
+_pending_seq = itertools.count()
+_flusher_started = False
+
+
+def _queue_room_event(stream_id, event, payload, latest_only=True):
+    """Queue an event for the next batch flush.
+
+    With latest_only, a pending event of the same name is replaced; otherwise
+    the event is appended after everything already queued for the room.
+    """
+    global _flusher_started
+    with _pending_lock:
+        key = event if latest_only else next(_pending_seq)
+        _pending_events.setdefault(stream_id, OrderedDict())[key] = (event, payload)
+        if not _flusher_started:
+            _flusher_started = True
+            get_socketio().start_background_task(_flush_room_events)
+
+
+def _drop_room_events(stream_id, event=None):
+    """Discard pending batched events for a room (all of them if event is None)."""
+    with _pending_lock:
+        if event is None:
+            _pending_events.pop(stream_id, None)
+        elif stream_id in _pending_events:
+            _pending_events[stream_id].pop(event, None)
+
+
+def _flush_room_events():
+    """Background task: every BATCH_FLUSH_INTERVAL emit one 'batch' per room."""
+    while True:
+        get_socketio().sleep(BATCH_FLUSH_INTERVAL)
+        with _pending_lock:
+            if not _pending_events:
+                continue
+            pending = list(_pending_events.items())
+            _pending_events.clear()
+        for stream_id, events in pending:
+            if not events:
+                continue
+            try:
+                get_socketio().emit('batch', list(events.values()), to=stream_id)
+            except Exception as e:
+                print(f"[livestream] Batch emit error for {stream_id}: {e}")
+
+
+# Chat messages and listener sessions are persisted off the event path:
+# handlers enqueue the livestream DB call, and one background task runs
+# whatever has accumulated every DB_WRITE_INTERVAL, one transaction per batch.
+# The queue is FIFO, so a session's start is always written before its end. If
+# the DB falls that far behind, events still go out but are not stored.
+DB_WRITE_INTERVAL = 0.1
+DB_WRITE_BATCH = 200
+_db_write_q = queue.Queue(maxsize=10_000)
+_db_writer_started = False
+_db_writer_lock = threading.Lock()
+
+
+def _queue_db_write(method, *args, **kwargs):
+    """Schedule `db.<method>(conn, *args, **kwargs)` on the background writer."""
+    global _db_writer_started
+    try:
+        _db_write_q.put_nowait((method, args, kwargs))
+    except queue.Full:
+        print(f"[livestream] DB write queue full, dropping {method}")
+        return
+    with _db_writer_lock:
+        if not _db_writer_started:
+            _db_writer_started = True
+            get_socketio().start_background_task(_write_queued)
+
+
+def _write_queued():
+    """Background task: drain the DB write queue in batches."""
+    while True:
+        get_socketio().sleep(DB_WRITE_INTERVAL)
+        batch = []
+        try:
+            while len(batch) < DB_WRITE_BATCH:
+                batch.append(_db_write_q.get_nowait())
+        except queue.Empty:
+            pass
+        db = _get_ls_db()
+        if not batch or not db:
+            continue
+        failed = 0
+        try:
+            # `with conn` commits the whole batch once (or rolls it back)
+            with _ls_connection(db) as conn, conn:
+                for method, args, kwargs in batch:
+                    try:
+                        getattr(db, method)(conn, *args, **kwargs)
+                    except Exception as e:
+                        failed += 1
+                        print(f"[livestream] DB error in {method}: {e}")
+        except Exception as e:
+            print(f"[livestream] DB error, {len(batch)} queued writes lost: {e}")
+            continue
+        if failed:
+            print(f"[livestream] {failed} of {len(batch)} queued writes failed")
+
+
+# Listener counts change on every join and leave; the DB copy only needs to
+# trail the in-memory one, so each stream's count is written at most once per
+# LISTENER_COUNT_FLUSH with the latest value and the peak seen since the last
+# write.
+LISTENER_COUNT_FLUSH = 2.0
+_dirty_counts = {}  # stream_id -> (count, peak since last write)
+_dirty_counts_lock = threading.Lock()
+_count_flusher_started = False
+
+
+def _mark_listener_count(stream_id, count):
+    global _count_flusher_started
+    with _dirty_counts_lock:
+        peak = max(count, _dirty_counts.get(stream_id, (0, 0))[1])
+        _dirty_counts[stream_id] = (count, peak)
+        if not _count_flusher_started:
+            _count_flusher_started = True
+            get_socketio().start_background_task(_flush_listener_counts)
+
+
+def _write_listener_counts(counts):
+    db = _get_ls_db()
+    if not counts or not db:
+        return
+    try:
+        with _ls_connection(db) as conn:
+            for stream_id, (count, peak) in counts:
+                db.update_livestream_listeners(conn, stream_id, count, peak)
+    except Exception:
+        pass
+
+
+def _flush_listener_counts(stream_id=None):
+    """Write one stream's pending count now, or (as a background task) all of them periodically."""
+    if stream_id is not None:
+        with _dirty_counts_lock:
+            pending = _dirty_counts.pop(stream_id, None)
+        _write_listener_counts([(stream_id, pending)] if pending else [])
+        return
+    while True:
+        get_socketio().sleep(LISTENER_COUNT_FLUSH)
+        with _dirty_counts_lock:
+            pending = list(_dirty_counts.items())
+            _dirty_counts.clear()
+        _write_listener_counts(pending)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # SOCKET.IO EVENTS
 # ══════════════════════════════════════════════════════════════════════════════
 
-@socketio.on('join-as-host')
+@_on('join-as-host')
 def handle_join_host(data):
     title = data.get('title', 'Power FM Live')
     host_name = data.get('hostName', 'DJ')
@@ -1946,11 +2988,10 @@ def handle_join_host(data):
     db = _get_ls_db()
     if db:
         try:
-            conn = db.get_connection()
-            db.create_livestream(conn, stream_id, title, host_name, room_id,
-                                 description=description, stream_type=stream_type)
-            db.start_livestream(conn, stream_id, peer_id)
-            conn.close()
+            with _ls_connection(db) as conn:
+                db.create_livestream(conn, stream_id, title, host_name, room_id,
+                                     description=description, stream_type=stream_type)
+                db.start_livestream(conn, stream_id, peer_id)
         except Exception as e:
             print(f"[livestream] DB error creating stream: {e}")
 
@@ -1963,15 +3004,17 @@ def handle_join_host(data):
         'room_id': room_id,
         'stream_type': stream_type,
         'producers': {},
-        'listeners': {},
+        'listeners': (),
         'max_listeners': 0,
         'started_at': now,
         'guest_queue': [],
         'active_guest': None,
         'tips': [],
         'leaderboard': {},
+        'leaderboard_payload': None,
         'total_tips_cents': 0,
     }
+    room_to_stream[room_id] = stream_id
 
     join_room(stream_id)
 
@@ -2001,42 +3044,43 @@ def handle_join_host(data):
             response['sfuError'] = str(e)
 
     emit('host-joined', response)
+    _push_directory(stream_id, active_streams[stream_id])
+
 
+@_on('join-directory')
+def handle_join_directory(data=None):
+    join_room(DIRECTORY_ROOM)
 
-@socketio.on('join-as-listener')
+
+@_on('join-as-listener')
 def handle_join_listener(data):
     stream_id = data.get('streamId')
     name = data.get('name', 'Listener')
     peer_id = data.get('peerId', 'listener-' + str(uuid.uuid4())[:8])
 
-    if stream_id not in active_streams:
+    info = active_streams.get(stream_id)
+    if info is None:
         emit('error', {'message': 'Stream not found'})
         return
 
-    info = active_streams[stream_id]
     room_id = info['room_id']
 
     # Track listener
-    info['listeners'][request.sid] = {'name': name, 'peerId': peer_id}
-    count = len(info['listeners'])
-    if count > info['max_listeners']:
-        info['max_listeners'] = count
+    count = _add_listener(stream_id, info, request.sid, {'name': name, 'peerId': peer_id})
 
     join_room(stream_id)
 
     # DB: add listener session
-    db = _get_ls_db()
-    if db:
-        try:
-            conn = db.get_connection()
-            db.add_listener_session(conn, stream_id, peer_id, request.sid, display_name=name)
-            db.update_livestream_listeners(conn, stream_id, count, count)
-            conn.close()
-        except Exception:
-            pass
+    if _get_ls_db():
+        _queue_db_write('add_listener_session', stream_id, peer_id, request.sid, display_name=name)
+        _mark_listener_count(stream_id, count)
 
     # Notify others
-    emit('listener-joined', {'name': name, 'listenerCount': count}, room=stream_id, include_self=False)
+    # The batch also reaches the joiner, who recognises (and skips) its own peerId
+    _queue_room_event(stream_id, 'listener-joined',
+                      {'name': name, 'listenerCount': count, 'peerId': peer_id},
+                      latest_only=False)
+    _push_directory(stream_id, info)
 
     # Build welcome response
     response = {
@@ -2046,19 +3090,8 @@ def handle_join_listener(data):
         'listenerCount': count,
         'roomId': room_id,
         'iceServers': _get_ls_config()['ICE_SERVERS'],
-        'recentChat': [],
     }
 
-    # Get recent chat from DB
-    if db:
-        try:
-            conn = db.get_connection()
-            msgs = db.get_chat_messages(conn, stream_id, limit=50)
-            response['recentChat'] = [{'name': m['sender_name'], 'message': m['message']} for m in msgs]
-            conn.close()
-        except Exception:
-            pass
-
     # Set up SFU consumer transport
     sfu = _get_sfu()
     if sfu:
@@ -2080,25 +3113,26 @@ def handle_join_listener(data):
     emit('listener-welcome', response)
 
 
-@socketio.on('connect-transport')
+@_on('connect-transport')
 def handle_connect_transport(data):
     transport_id = data.get('transportId')
     dtls_params = data.get('dtlsParameters')
     room_id = data.get('roomId')
     peer_id = data.get('peerId')
+    req_id = data.get('reqId')  # echoed so the client can match the reply
 
     sfu = _get_sfu()
     if sfu:
         try:
             sfu.connect_transport(room_id, peer_id, transport_id, dtls_params)
-            emit('transport-connected', {})
+            emit('transport-connected', {'reqId': req_id})
         except Exception as e:
-            emit('transport-connect-error', {'message': str(e)})
+            emit('transport-connect-error', {'message': str(e), 'reqId': req_id})
     else:
-        emit('transport-connect-error', {'message': 'SFU not available'})
+        emit('transport-connect-error', {'message': 'SFU not available', 'reqId': req_id})
 
 
-@socketio.on('produce')
+@_on('produce')
 def handle_produce(data):
     transport_id = data.get('transportId')
     kind = data.get('kind')
@@ -2106,35 +3140,36 @@ def handle_produce(data):
     app_data = data.get('appData', {})
     room_id = data.get('roomId')
     peer_id = data.get('peerId')
+    req_id = data.get('reqId')
 
     sfu = _get_sfu()
     if sfu:
         try:
             result = sfu.produce(room_id, peer_id, transport_id, kind, rtp_params, app_data)
             producer_id = result.get('id') if isinstance(result, dict) else result
-            emit('produced', {'producerId': producer_id})
-
-            # Notify listeners about new producer
-            for sid, stream_info in active_streams.items():
-                if stream_info.get('room_id') == room_id:
-                    socketio.emit('new-producer', {
-                        'producerId': producer_id,
-                        'kind': kind,
-                        'roomId': room_id,
-                    }, room=sid, include_self=False)
-                    break
+            emit('produced', {'producerId': producer_id, 'reqId': req_id})
+
+            # Notify listeners about new producer: one emit to the stream's room
+            stream_id = room_to_stream.get(room_id)
+            if stream_id:
+                emit('new-producer', {
+                    'producerId': producer_id,
+                    'kind': kind,
+                    'roomId': room_id,
+                }, to=stream_id, include_self=False)
         except Exception as e:
-            emit('produce-error', {'message': str(e)})
+            emit('produce-error', {'message': str(e), 'reqId': req_id})
     else:
-        emit('produce-error', {'message': 'SFU not available'})
+        emit('produce-error', {'message': 'SFU not available', 'reqId': req_id})
 
 
-@socketio.on('consume')
+@_on('consume')
 def handle_consume(data):
     producer_id = data.get('producerId')
     room_id = data.get('roomId')
     peer_id = data.get('peerId')
     rtp_capabilities = data.get('rtpCapabilities')
+    req_id = data.get('reqId')
 
     sfu = _get_sfu()
     if sfu:
@@ -2145,12 +3180,15 @@ def handle_consume(data):
                 'producerId': result.get('producerId', producer_id),
                 'kind': result.get('kind'),
                 'rtpParameters': result.get('rtpParameters'),
+                'reqId': req_id,
             })
         except Exception as e:
-            emit('consume-error', {'message': str(e)})
+            emit('consume-error', {'message': str(e), 'reqId': req_id})
+    else:
+        emit('consume-error', {'message': 'SFU not available', 'reqId': req_id})
 
 
-@socketio.on('resume-consumer')
+@_on('resume-consumer')
 def handle_resume_consumer(data):
     consumer_id = data.get('consumerId')
     room_id = data.get('roomId')
@@ -2164,7 +3202,7 @@ def handle_resume_consumer(data):
             pass
 
 
-@socketio.on('pause-producer')
+@_on('pause-producer')
 def handle_pause_producer(data):
     producer_id = data.get('producerId')
     room_id = data.get('roomId')
@@ -2178,7 +3216,7 @@ def handle_pause_producer(data):
             pass
 
 
-@socketio.on('resume-producer')
+@_on('resume-producer')
 def handle_resume_producer(data):
     producer_id = data.get('producerId')
     room_id = data.get('roomId')
@@ -2192,7 +3230,7 @@ def handle_resume_producer(data):
             pass
 
 
-@socketio.on('chat-message')
+@_on('chat-message')
 def handle_chat_message(data):
     stream_id = data.get('streamId')
     message = data.get('message', '').strip()
@@ -2201,24 +3239,18 @@ def handle_chat_message(data):
     if not message or not stream_id:
         return
 
-    # Save to DB
-    db = _get_ls_db()
-    if db:
-        try:
-            conn = db.get_connection()
-            db.add_chat_message(conn, stream_id, name, request.sid, message)
-            conn.close()
-        except Exception:
-            pass
+    if _get_ls_db():
+        _queue_db_write('add_chat_message', stream_id, name, request.sid, message)
 
-    # Check if sender is a tipper
-    is_tipper = data.get('isTipper', False)
+    # Broadcast to room (excluding sender — they already show it locally).
+    # The tipper flag is only sent when set; clients treat a missing key as false.
+    payload = {'name': name, 'message': message}
+    if data.get('isTipper'):
+        payload['isTipper'] = True
+    emit('chat-message', payload, to=stream_id, include_self=False)
 
-    # Broadcast to room (excluding sender — they already show it locally)
-    emit('chat-message', {'name': name, 'message': message, 'isTipper': is_tipper}, room=stream_id, include_self=False)
 
-
-@socketio.on('end-broadcast')
+@_on('end-broadcast')
 def handle_end_broadcast(data):
     stream_id = data.get('streamId')
     room_id = data.get('roomId')
@@ -2245,9 +3277,21 @@ def _emit_queue_update(stream_id, info):
             'name': g['name'],
             'tier': g['tier'],
             'duration': g['duration_seconds'],
-            'price': SPOTLIGHT_TIERS.get(g['tier'], {}).get('price', 0),
+            'price': SPOTLIGHT_TIER_PRICE.get(g['tier'], 0),
         } for g in info.get('guest_queue', [])]
-        socketio.emit('guest-queue-updated', {'queue': queue_data}, room=host_sid)
+        get_socketio().emit('guest-queue-updated', {'queue': queue_data}, to=host_sid)
+
+
+def _leaderboard_payload(info):
+    """Top-10 leaderboard event payload, rebuilt only after a new tip."""
+    payload = info.get('leaderboard_payload')
+    if payload is None:
+        top = heapq.nlargest(10, info['leaderboard'].items(), key=lambda x: x[1])
+        payload = info['leaderboard_payload'] = {
+            'leaderboard': top,
+            'total_cents': info['total_tips_cents'],
+        }
+    return payload
 
 
 def _end_spotlight(stream_id):
@@ -2268,30 +3312,75 @@ def _end_spotlight(stream_id):
         except Exception:
             pass
 
-    socketio.emit('spotlight-expired', {'streamId': stream_id}, room=stream_id)
+    _drop_room_events(stream_id, 'spotlight-tick')
+    get_socketio().emit('spotlight-expired', {'streamId': stream_id}, to=stream_id)
+
+
+# Every running spotlight is driven by one scheduler task instead of a sleeping
+# task each: a heap of (due, seq, stream_id, guest, ends_at) says which
+# countdown needs a tick or its expiry next. An entry only acts while its guest
+# is still the stream's active guest, so ending a spotlight early (or starting
+# the next one) needs no cancellation.
+SPOTLIGHT_TICK_INTERVAL = 10
+_spotlight_heap = []
+_spotlight_lock = threading.Lock()
+_spotlight_seq = itertools.count()
+_spotlight_wakeup = None
+
+
+def _schedule_spotlight(stream_id, guest, duration):
+    """Start the countdown for the guest that was just put on screen."""
+    global _spotlight_wakeup
+    now = time.monotonic()
+    ends_at = now + duration
+    with _spotlight_lock:
+        heapq.heappush(_spotlight_heap, (min(now + SPOTLIGHT_TICK_INTERVAL, ends_at),
+                                         next(_spotlight_seq), stream_id, guest, ends_at))
+        if _spotlight_wakeup is None:
+            _spotlight_wakeup = get_socketio().server.eio.create_event()
+            get_socketio().start_background_task(_run_spotlight_scheduler)
+    _spotlight_wakeup.set()
+
+
+def _advance_spotlight(at, stream_id, guest, ends_at):
+    """Handle one due heap entry: expire the spotlight, or re-arm it and tick."""
+    info = active_streams.get(stream_id)
+    if not info or info.get('active_guest') is not guest:
+        return
+    if at >= ends_at:
+        _end_spotlight(stream_id)
+        return
+    with _spotlight_lock:
+        heapq.heappush(_spotlight_heap, (min(at + SPOTLIGHT_TICK_INTERVAL, ends_at),
+                                         next(_spotlight_seq), stream_id, guest, ends_at))
+    _queue_room_event(stream_id, 'spotlight-tick', {
+        'streamId': stream_id,
+        'remaining': round(ends_at - at),
+    })
 
 
-def _spotlight_timer(stream_id, duration):
-    """Background greenlet: emits spotlight-tick every 10s, spotlight-expired at end."""
-    elapsed = 0
-    while elapsed < duration:
-        socketio.sleep(10)
-        elapsed += 10
-        remaining = max(0, duration - elapsed)
-        if stream_id not in active_streams:
-            return
-        info = active_streams[stream_id]
-        if not info.get('active_guest'):
-            return
-        socketio.emit('spotlight-tick', {
-            'streamId': stream_id,
-            'remaining': remaining,
-        }, room=stream_id)
-    # Time's up
-    _end_spotlight(stream_id)
+def _run_spotlight_scheduler():
+    """Background task: emit spotlight-tick every 10s and expire spotlights on time."""
+    while True:
+        with _spotlight_lock:
+            now = time.monotonic()
+            due = []
+            while _spotlight_heap and _spotlight_heap[0][0] <= now:
+                due.append(heapq.heappop(_spotlight_heap))
+        for at, _, stream_id, guest, ends_at in due:
+            # This task serves every stream; one failing countdown must not stop it
+            try:
+                _advance_spotlight(at, stream_id, guest, ends_at)
+            except Exception as e:
+                print(f"[livestream] Spotlight timer error for {stream_id}: {e}")
+        with _spotlight_lock:
+            timeout = _spotlight_heap[0][0] - time.monotonic() if _spotlight_heap else None
+        if timeout is None or timeout > 0:
+            _spotlight_wakeup.wait(timeout)
+        _spotlight_wakeup.clear()
 
 
-@socketio.on('spotlight-request')
+@_on('spotlight-request')
 def handle_spotlight_request(data):
     """Fan submits a paid spotlight request (server verifies Stripe session or PaymentIntent)."""
     stream_id = data.get('streamId')
@@ -2345,7 +3434,7 @@ def handle_spotlight_request(data):
     _emit_queue_update(stream_id, info)
 
 
-@socketio.on('approve-guest')
+@_on('approve-guest')
 def handle_approve_guest(data):
     """DJ approves a guest — server creates SFU send transport for fan."""
     stream_id = data.get('streamId')
@@ -2381,10 +3470,10 @@ def handle_approve_guest(data):
             print(f"[livestream] SFU transport error for guest: {e}")
 
     # Send approval to the fan
-    socketio.emit('spotlight-approved', response, room=guest['sid'])
+    get_socketio().emit('spotlight-approved', response, to=guest['sid'])
 
     # Set active guest
-    info['active_guest'] = {
+    active_guest = info['active_guest'] = {
         'sid': guest['sid'],
         'peer_id': guest['peer_id'],
         'name': guest['name'],
@@ -2393,20 +3482,20 @@ def handle_approve_guest(data):
     }
 
     # Notify everyone that spotlight started
-    socketio.emit('spotlight-started', {
+    get_socketio().emit('spotlight-started', {
         'streamId': stream_id,
         'name': guest['name'],
         'duration': guest['duration_seconds'],
-    }, room=stream_id)
+    }, to=stream_id)
 
     # Update queue for DJ
     _emit_queue_update(stream_id, info)
 
-    # Start countdown timer in background
-    socketio.start_background_task(_spotlight_timer, stream_id, guest['duration_seconds'])
+    # Start the countdown
+    _schedule_spotlight(stream_id, active_guest, guest['duration_seconds'])
 
 
-@socketio.on('reject-guest')
+@_on('reject-guest')
 def handle_reject_guest(data):
     """DJ rejects a guest, removes from queue."""
     stream_id = data.get('streamId')
@@ -2426,7 +3515,7 @@ def handle_reject_guest(data):
     _emit_queue_update(stream_id, info)
 
 
-@socketio.on('end-spotlight')
+@_on('end-spotlight')
 def handle_end_spotlight(data):
     """DJ ends spotlight early."""
     stream_id = data.get('streamId')
@@ -2440,7 +3529,7 @@ def handle_end_spotlight(data):
     _end_spotlight(stream_id)
 
 
-@socketio.on('super-tip')
+@_on('super-tip')
 def handle_super_tip(data):
     """Fan sends a verified Super Tip (via checkout session or quick-pay PaymentIntent)."""
     stream_id = data.get('streamId')
@@ -2487,27 +3576,23 @@ def handle_super_tip(data):
     info['leaderboard'][name] = info['leaderboard'].get(name, 0) + amount_cents
 
     # Notify everyone
-    socketio.emit('tip-received', {
+    get_socketio().emit('tip-received', {
         'name': name,
         'amount_cents': amount_cents,
-    }, room=stream_id)
+    }, to=stream_id)
 
     # Send leaderboard update
-    sorted_lb = sorted(info['leaderboard'].items(), key=lambda x: x[1], reverse=True)[:10]
-    socketio.emit('leaderboard-update', {
-        'leaderboard': sorted_lb,
-        'total_cents': info['total_tips_cents'],
-    }, room=stream_id)
+    info['leaderboard_payload'] = None
+    _queue_room_event(stream_id, 'leaderboard-update', _leaderboard_payload(info))
 
 
-@socketio.on('disconnect')
+@_on('disconnect')
 def handle_disconnect():
     sid = request.sid
     for stream_id, info in list(active_streams.items()):
         # Check if this was a listener
-        if sid in info.get('listeners', {}):
-            listener = info['listeners'].pop(sid)
-            count = len(info['listeners'])
+        listener, count = _remove_listener(stream_id, info, sid)
+        if listener is not None:
 
             # If listener was in guest queue, remove them
             info['guest_queue'] = [g for g in info.get('guest_queue', []) if g.get('sid') != sid]
@@ -2520,19 +3605,15 @@ def handle_disconnect():
                 _end_spotlight(stream_id)
 
             # DB: end listener session
-            db = _get_ls_db()
-            if db:
-                try:
-                    conn = db.get_connection()
-                    db.end_listener_session(conn, sid)
-                    conn.close()
-                except Exception:
-                    pass
+            if _get_ls_db():
+                _queue_db_write('end_listener_session', sid)
+                _mark_listener_count(stream_id, count)
 
-            socketio.emit('listener-left', {
+            _queue_room_event(stream_id, 'listener-left', {
                 'name': listener['name'],
                 'listenerCount': count,
-            }, room=stream_id)
+            }, latest_only=False)
+            _push_directory(stream_id, info)
             break
 
         # Check if this was the host
@@ -0,0 +1,49 @@
+"""
+Precompressed responses, shared by the dashboard and the livestream blueprint.
+
+A cacheable body is compressed once per supported Content-Encoding, and each
+request is served the variant it accepts under a per-encoding ETag.
+"""
+
+import gzip
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def precompress(body):
+    """Encode a cacheable response body once per supported Content-Encoding."""
+    variants = {'identity': body, 'gzip': gzip.compress(body, 9)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+def pick_encoding(available):
+    """Best Content-Encoding the client accepts out of `available`."""
+    return request.accept_encodings.best_match(
+        [e for e in ('br', 'gzip') if e in available]) or 'identity'
+
+
+def precompressed_response(variants, tag, not_modified=False, mimetype='text/html'):
+    """Serve the best of `variants`, or a 304 if the client's copy is current.
+
+    `tag` is the identity ETag; other encodings get `<tag>-<encoding>`. Pass
+    not_modified=True when another validator (e.g. If-Modified-Since) already
+    says the client is up to date.
+    """
+    encoding = pick_encoding(variants)
+    etag = tag if encoding == 'identity' else f'{tag}-{encoding}'
+    if not_modified or etag in request.if_none_match:
+        resp = Response(status=304)
+    else:
+        resp = Response(variants[encoding], mimetype=mimetype)
+        if encoding != 'identity':
+            resp.content_encoding = encoding
+    resp.set_etag(etag)
+    resp.vary.add('Accept-Encoding')
+    return resp